@@ -0,0 +1,279 @@
+"""Audio output backends for Player.
+
+Player never talks to an audio library directly; it drives an AudioBackend,
+which looks like a small subset of pygame.mixer.music plus a clock:
+- PygameBackend: the real thing (pygame.mixer.music, wall-clock time)
+- NullBackend: no device, no decoding. Tracks "play" for their known length
+  on a virtual clock that only moves when advance() is called, so hours of
+  playback can be simulated in milliseconds (headless tests and benchmarks).
+
+pygame is optional, and imported only when the first PygameBackend is created:
+importing it (and opening the mixer) is one of the slowest parts of startup.
+"""
+
+from __future__ import annotations
+import importlib.util
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+# Checked without importing; see _import_pygame().
+PYGAME_AVAILABLE = importlib.util.find_spec("pygame") is not None
+pygame = None
+MUSIC_END: Optional[int] = None  # Posted by the mixer when a track finishes or is stopped.
+
+WARM_CHUNK = 1 << 20     # Read-ahead chunk size when warming the next file.
+DEFAULT_LENGTH = 180.0   # NullBackend: seconds a track of unknown length plays for.
+
+
+class AudioBackend:
+    """Interface Player drives. Positions and lengths are in seconds."""
+
+    crossfade: float = 0.0  # Seconds a queued track overlaps the current one (0: starts at its end)
+
+    def clock(self) -> float:
+        """Monotonic time source used for positions and end predictions."""
+        raise NotImplementedError
+
+    def load(self, path: str, length: Optional[float] = None) -> None:
+        """Load a file (stops and replaces whatever was loaded). length is a hint, if known."""
+        raise NotImplementedError
+
+    def play(self, start: float = 0.0) -> None:
+        """Start the loaded file at start seconds."""
+        raise NotImplementedError
+
+    def pause(self) -> None:
+        raise NotImplementedError
+
+    def unpause(self) -> None:
+        raise NotImplementedError
+
+    def stop(self) -> None:
+        raise NotImplementedError
+
+    def set_volume(self, volume: float) -> None:
+        """Volume in [0.0, 1.0]."""
+        raise NotImplementedError
+
+    def get_busy(self) -> bool:
+        """True while a track is playing or paused."""
+        raise NotImplementedError
+
+    def queue(self, path: str, length: Optional[float] = None) -> bool:
+        """Play path right after the current track ends (gapless). False if it can't be queued.
+
+        A backend with crossfade > 0 starts path right away instead, and reports the
+        current track as ended (take_end) while it fades out.
+        """
+        raise NotImplementedError
+
+    def take_end(self) -> bool:
+        """True (once) if a track has finished since the last call."""
+        raise NotImplementedError
+
+    def discard_end(self) -> None:
+        """Forget pending end notifications (they belong to a track that was replaced)."""
+        raise NotImplementedError
+
+    def preload(self, path: str) -> None:
+        """Hint that path will play soon (e.g. warm the OS file cache)."""
+
+    def length(self) -> Optional[float]:
+        """Exact length of the loaded track, if the backend knows it (else Player uses the hint)."""
+        return None
+
+    def close(self) -> None:
+        """Release what the backend holds; it is not used again."""
+
+
+def _import_pygame() -> None:
+    """Import pygame on first use and define MUSIC_END."""
+    global pygame, MUSIC_END
+    if pygame is None:
+        if not PYGAME_AVAILABLE:
+            raise RuntimeError("pygame is not installed (pip install pygame).")
+        import pygame as _pygame
+        pygame = _pygame
+        MUSIC_END = pygame.USEREVENT + 1
+
+
+class PygameBackend(AudioBackend):
+    """pygame.mixer.music on the default audio device."""
+
+    def __init__(self) -> None:
+        _import_pygame()
+        # Initialize the mixer subsystem (opens audio device)
+        pygame.mixer.init()
+        pygame.mixer.music.set_endevent(MUSIC_END)
+        # The end event goes through pygame's event queue, which needs the (windowless)
+        # display subsystem. Without it we fall back to get_busy() in take_end().
+        try:
+            pygame.display.init()
+            self._events = True
+        except pygame.error:
+            self._events = False
+        self._playing = False  # For the get_busy() fallback: started and not stopped
+
+    def clock(self) -> float:
+        return time.monotonic()
+
+    def load(self, path: str, length: Optional[float] = None) -> None:
+        pygame.mixer.music.load(path)
+        self._playing = False
+
+    def play(self, start: float = 0.0) -> None:
+        pygame.mixer.music.play(start=start)
+        self._playing = True
+
+    def pause(self) -> None:
+        pygame.mixer.music.pause()
+
+    def unpause(self) -> None:
+        pygame.mixer.music.unpause()
+
+    def stop(self) -> None:
+        pygame.mixer.music.stop()
+        self._playing = False
+
+    def set_volume(self, volume: float) -> None:
+        pygame.mixer.music.set_volume(volume)
+
+    def get_busy(self) -> bool:
+        return pygame.mixer.music.get_busy()
+
+    def queue(self, path: str, length: Optional[float] = None) -> bool:
+        try:
+            pygame.mixer.music.queue(path)
+            return True
+        except pygame.error:
+            return False
+
+    def take_end(self) -> bool:
+        if self._events:
+            return bool(pygame.event.get(MUSIC_END))
+        # No event queue: a track we started that is no longer busy has ended.
+        # (Player doesn't ask while paused, when get_busy() is False as well.)
+        if self._playing and not pygame.mixer.music.get_busy():
+            self._playing = False
+            return True
+        return False
+
+    def discard_end(self) -> None:
+        if self._events:
+            pygame.event.clear(MUSIC_END)
+
+    def preload(self, path: str) -> None:
+        threading.Thread(target=self._warm, args=(path,), daemon=True, name="prefetch").start()
+
+    @staticmethod
+    def _warm(path: str) -> None:
+        """Background thread: read the file once so it sits in the OS cache."""
+        try:
+            with open(path, "rb", buffering=0) as f:
+                while f.read(WARM_CHUNK):
+                    pass
+        except OSError:
+            pass
+
+
+class NullBackend(AudioBackend):
+    """Silent backend on a virtual clock, for headless runs.
+
+    A track lasts its length hint, else lengths[path], else default_length. Time
+    stands still until advance(seconds) moves it; tracks that finish along the
+    way post an end event, and a queued track takes over at exactly that moment.
+    Paths are never opened.
+    """
+
+    def __init__(self, default_length: float = DEFAULT_LENGTH, lengths: Optional[Dict[str, float]] = None) -> None:
+        self.default_length = default_length
+        self.lengths: Dict[str, float] = dict(lengths or {})
+        self.volume = 1.0
+        self.now = 0.0                             # Virtual clock
+        self.path: Optional[str] = None            # Loaded file
+        self._length = default_length
+        self._started_at: Optional[float] = None   # Clock time of position 0 (None = not playing)
+        self._paused_pos: Optional[float] = None
+        self._queued: Optional[Tuple[str, float]] = None
+        self._ends = 0                             # Pending end notifications
+        self.tracks_finished = 0                   # Total natural track ends (for measurements)
+
+    def _length_of(self, path: str, length: Optional[float]) -> float:
+        if length is not None and length > 0:
+            return float(length)
+        return self.lengths.get(path, self.default_length)
+
+    # ---- virtual clock ----
+    def clock(self) -> float:
+        return self.now
+
+    def position(self) -> float:
+        """Seconds into the loaded track."""
+        if self._started_at is None:
+            return 0.0
+        if self._paused_pos is not None:
+            return self._paused_pos
+        return self.now - self._started_at
+
+    def advance(self, seconds: float) -> None:
+        """Move the clock forward, finishing (and chaining into queued) tracks on the way."""
+        target = self.now + max(0.0, seconds)
+        while self._started_at is not None and self._paused_pos is None:
+            end_at = self._started_at + self._length
+            if end_at > target:
+                break
+            self.now = end_at
+            self._ends += 1
+            self.tracks_finished += 1
+            if self._queued is not None:
+                (self.path, self._length), self._queued = self._queued, None
+                self._started_at = end_at
+            else:
+                self._started_at = None
+        self.now = target
+
+    # ---- AudioBackend ----
+    def load(self, path: str, length: Optional[float] = None) -> None:
+        self.path = path
+        self._length = self._length_of(path, length)
+        self._started_at = None
+        self._paused_pos = None
+        self._queued = None
+
+    def play(self, start: float = 0.0) -> None:
+        if self.path is None:
+            return
+        self._started_at = self.now - start
+        self._paused_pos = None
+
+    def pause(self) -> None:
+        if self._started_at is not None and self._paused_pos is None:
+            self._paused_pos = self.now - self._started_at
+
+    def unpause(self) -> None:
+        if self._paused_pos is not None:
+            self._started_at = self.now - self._paused_pos
+            self._paused_pos = None
+
+    def stop(self) -> None:
+        self._started_at = None
+        self._paused_pos = None
+        self._queued = None
+
+    def set_volume(self, volume: float) -> None:
+        self.volume = volume
+
+    def get_busy(self) -> bool:
+        return self._started_at is not None
+
+    def queue(self, path: str, length: Optional[float] = None) -> bool:
+        self._queued = (path, self._length_of(path, length))
+        return True
+
+    def take_end(self) -> bool:
+        ended, self._ends = self._ends > 0, 0
+        return ended
+
+    def discard_end(self) -> None:
+        self._ends = 0
@@ -0,0 +1,140 @@
+"""Crossfade benchmark: decode-ahead latency, buffer memory, and real-time hand-offs.
+
+Run from the project root (needs pygame; no sound card required):
+  python benchmarks/bench_crossfade.py [n_files] [seconds_each] [fade_seconds]
+
+Writes n_files (default 8) stereo 44.1 kHz WAV tones of seconds_each (default
+4) seconds, then:
+- decodes each once cold and once after decoding ahead, and reports both
+  latencies (how long a track that was not decoded ahead waits on the decode
+  worker before it starts, and what a decoded-ahead start costs)
+- plays them in shuffle order through PlayerController with a
+  CrossfadeBackend of fade_seconds (default 1.5) and a buffer budget of three
+  tracks, in real time on SDL's dummy audio driver, and reports how late each
+  crossfade started, the buffer hits/misses and the peak buffer memory
+"""
+
+from __future__ import annotations
+import math
+import os
+import struct
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import List
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import audio  # noqa: E402
+from audio import PYGAME_AVAILABLE  # noqa: E402
+from controller import PlayerController  # noqa: E402
+from crossfade import CrossfadeBackend, SoundBuffers  # noqa: E402
+from metadata import MetadataCache  # noqa: E402
+from player import Player  # noqa: E402
+from playlist_store import PlaylistStore  # noqa: E402
+
+RATE = 44_100
+
+
+def write_tone(path: Path, freq: float, seconds: float) -> None:
+    """Stereo 16-bit WAV of a sine at -12 dBFS."""
+    import wave
+    amp = 32767 * 10 ** (-12 / 20)
+    one = b"".join(struct.pack("<hh", v, v) for v in (int(amp * math.sin(2 * math.pi * freq * i / RATE)) for i in range(RATE)))
+    with wave.open(str(path), "wb") as w:
+        w.setnchannels(2)
+        w.setsampwidth(2)
+        w.setframerate(RATE)
+        w.writeframes(one * int(seconds))
+
+
+def bench_decode(paths: List[str]) -> None:
+    """get() latency for a cold decode vs. after prefetch() finished in the background."""
+    buffers = SoundBuffers()
+    cold = []
+    for p in paths:
+        t0 = time.perf_counter()
+        buffers.get(p)
+        cold.append((time.perf_counter() - t0) * 1000)
+    mb = buffers.stats()["mb"]
+    buffers.close()
+
+    buffers = SoundBuffers()
+    for p in paths:
+        buffers.prefetch(p)
+    while buffers.stats()["buffers"] < len(paths):
+        time.sleep(0.01)
+    warm = []
+    for p in paths:
+        t0 = time.perf_counter()
+        buffers.get(p)
+        warm.append((time.perf_counter() - t0) * 1000)
+    buffers.close()
+    print(f"  cold decode on play     mean {sum(cold) / len(cold):8.2f} ms  max {max(cold):8.2f} ms")
+    print(f"  decoded ahead           mean {sum(warm) / len(warm):8.3f} ms  max {max(warm):8.3f} ms")
+    print(f"  buffer memory           {mb / len(paths):8.2f} MB per track")
+
+
+def bench_playback(root: Path, paths: List[str], seconds: float, fade: float) -> None:
+    """Play every track once, shuffled and crossfaded, in real time."""
+    store = PlaylistStore(root / "playlists.json")
+    meta = MetadataCache(root / "meta.sqlite")
+    store.create_playlist("Tones")
+    store.add_tracks("Tones", [(p, Path(p).stem, int(seconds)) for p in paths])
+    track_bytes = int(seconds * RATE) * 4
+    backend = CrossfadeBackend(fade, budget=3 * track_bytes)
+    player = Player(backend)
+    ctl = PlayerController(store, player, meta)
+    ctl.set_shuffle(True)
+    ctl.play_playlist("Tones")
+
+    late_ms: List[float] = []
+    peak_mb = 0.0
+    played = [player.queue_index]
+    due = time.perf_counter() + player.length - fade  # When the first crossfade should begin
+    while len(played) < len(paths):
+        delay = ctl.next_check_ms()
+        if delay is None:
+            break
+        time.sleep(delay / 1000)
+        if ctl.check_end():
+            late_ms.append((time.perf_counter() - due) * 1000)
+            played.append(player.queue_index)
+            due = time.perf_counter() + player.length - fade
+        peak_mb = max(peak_mb, backend.stats()["mb"])
+    stats = backend.stats()
+    ctl.player.stop()
+    backend.close()
+    meta.close()
+    print(f"  tracks played           {len(played)} ({len(set(played))} distinct)")
+    print(f"  crossfade start late    mean {sum(late_ms) / max(1, len(late_ms)):8.2f} ms  max {max(late_ms, default=0):8.2f} ms")
+    print(f"  buffers                 hits {stats['hits']}  waits {stats['waits']}  misses {stats['misses']}"
+          f"  evictions {stats['evictions']}")
+    print(f"  peak buffer memory      {peak_mb:8.2f} MB  (budget {stats['budget_mb']:.2f} MB)")
+
+
+def main(n: int = 8, seconds: float = 4.0, fade: float = 1.5) -> None:
+    if not PYGAME_AVAILABLE:
+        sys.exit("pygame is required (pip install pygame).")
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        paths = []
+        for i in range(n):
+            path = root / f"tone {i:03d}.wav"
+            write_tone(path, 220 * 2 ** (i / 12), seconds)
+            paths.append(str(path))
+        print(f"{n} files of {seconds:g} s, crossfade {fade:g} s")
+        audio._import_pygame()
+        audio.pygame.mixer.init(RATE, -16, 2)
+        bench_decode(paths)
+        bench_playback(root, paths, seconds, fade)
+
+
+if __name__ == "__main__":
+    main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 8,
+        float(sys.argv[2]) if len(sys.argv) > 2 else 4.0,
+        float(sys.argv[3]) if len(sys.argv) > 3 else 1.5,
+    )
@@ -0,0 +1,55 @@
+"""Duplicate scan benchmark: cold (hashing) and warm (cached) find_duplicates().
+
+Run from the project root:
+  python benchmarks/bench_dedupe.py [n_files]
+
+Generates n_files (default 2,000) tagged MP3s of equal length (so their sizes
+collide and every file needs a sampled hash, the worst case), plus 1% byte
+copies under other names, and a playlist that lists every file once and 1%
+of them twice. Reports the scan time and how many files needed a full hash.
+"""
+
+from __future__ import annotations
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from dedupe import FingerprintCache, find_duplicates, remove_duplicates  # noqa: E402
+from playlist_store import PlaylistStore  # noqa: E402
+from synth import make_files  # noqa: E402
+
+
+def main(n: int = 2_000) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        base = Path(tmp)
+        files = make_files(base / "mp3", n)
+        copies = []
+        for i in range(0, n, 100):
+            copy = base / "mp3" / f"copy of {i:06d}.mp3"
+            shutil.copyfile(files[i], copy)
+            copies.append(copy)
+        store = PlaylistStore(base / "playlists.json", journal=True)
+        store.create_playlist("Library")
+        entries = [(p, None, None) for p in files + copies] + [(files[i], None, None) for i in range(1, n, 100)]
+        store.add_tracks("Library", entries)
+        print(f"{n:,} files + {len(copies)} copies, {len(entries):,} playlist entries")
+
+        cache = FingerprintCache(base / "fingerprints.sqlite")
+        for label in ("cold", "warm"):
+            playlists = {"Library": store.get_tracks("Library")}
+            t0 = time.perf_counter()
+            groups = find_duplicates(playlists, cache)
+            ms = (time.perf_counter() - t0) * 1000
+            print(f"  {label:<6} {ms:9.1f} ms  {len(groups)} groups, {cache.misses} hashes computed so far")
+        t0 = time.perf_counter()
+        removed = remove_duplicates(store, groups)
+        print(f"  remove {(time.perf_counter() - t0) * 1000:9.1f} ms  {removed} entries, one save")
+        cache.close()
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 2_000)
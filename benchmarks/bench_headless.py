@@ -0,0 +1,82 @@
+"""Headless session benchmark: simulated playback plus library edits, no display or sound card.
+
+Run from the project root:
+  python benchmarks/bench_headless.py [n_tracks] [hours]
+
+Builds a journaled PlaylistStore with n_tracks (default 10,000) in a temp
+directory, plays it in shuffle mode on audio.NullBackend's virtual clock for
+the given number of hours (default 24), and between tracks adds and removes
+tracks in the playing playlist the way a user would. Reports wall time per
+operation and the player's gap stats (0 ms when the queued hand-off worked).
+"""
+
+from __future__ import annotations
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from audio import NullBackend  # noqa: E402
+from controller import PlayerController, run_simulated  # noqa: E402
+from metadata import MetadataCache  # noqa: E402
+from player import Player  # noqa: E402
+from playlist_store import PlaylistStore  # noqa: E402
+from synth import duration_of  # noqa: E402
+
+
+def main(n: int = 10_000, hours: float = 24.0) -> None:
+    rng = random.Random(42)
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        store = PlaylistStore(root / "playlists.json", journal=True)
+        meta = MetadataCache(root / "metadata_cache.sqlite")
+        backend = NullBackend()
+        ctl = PlayerController(store, Player(backend), meta)
+
+        t0 = time.perf_counter()
+        store.create_playlist("Library")
+        store.add_tracks("Library", ((f"/music/{i:06d}.mp3", f"Track {i}", duration_of(i)) for i in range(n)))
+        print(f"add {n:,} tracks (one batch)      {(time.perf_counter() - t0) * 1000:9.1f} ms")
+
+        ctl.set_shuffle(True)
+        ctl.play_playlist("Library")
+
+        played = adds = removes = 0
+        t_play = t_add = t_remove = 0.0
+        next_id = n
+        budget = hours * 3600.0
+        while backend.clock() < budget and ctl.player.active:
+            # Play through the current track (and into the next one).
+            t = time.perf_counter()
+            played += run_simulated(ctl, min(ctl.player.seconds_remaining() or 1.0, budget - backend.clock()) + 0.01)
+            t_play += time.perf_counter() - t
+            # Library churn while listening: a couple of adds, sometimes a removal.
+            for _ in range(2):
+                t = time.perf_counter()
+                store.add_track("Library", f"/music/{next_id:06d}.mp3", f"Track {next_id}", duration_of(next_id))
+                t_add += time.perf_counter() - t
+                next_id += 1
+                adds += 1
+            if rng.random() < 0.5:
+                t = time.perf_counter()
+                store.remove_tracks_at("Library", [rng.randrange(len(ctl.player.queue))])
+                t_remove += time.perf_counter() - t
+                removes += 1
+
+        gaps = ctl.player.gap_stats()
+        print(f"simulated {backend.clock() / 3600:.1f} h of playback, {played:,} track changes")
+        print(f"  playback logic   {t_play * 1000:9.1f} ms total  {t_play / max(played, 1) * 1e6:9.1f} µs/track")
+        print(f"  add_track        {t_add * 1000:9.1f} ms total  {t_add / max(adds, 1) * 1e6:9.1f} µs/op  ({adds:,} ops)")
+        print(f"  remove_tracks_at {t_remove * 1000:9.1f} ms total  {t_remove / max(removes, 1) * 1e6:9.1f} µs/op  ({removes:,} ops)")
+        print(f"  gaps: {gaps['count']} recorded, mean {gaps['mean']:.2f} ms, max {gaps['max']:.2f} ms")
+        meta.close()
+
+
+if __name__ == "__main__":
+    main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 10_000,
+        float(sys.argv[2]) if len(sys.argv) > 2 else 24.0,
+    )
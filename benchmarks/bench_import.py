@@ -0,0 +1,81 @@
+"""Folder import benchmark: first import, unchanged rescan and a rescan after churn.
+
+Run from the project root:
+  python benchmarks/bench_import.py [n_files]
+
+Creates n_files (default 50,000) small placeholder .mp3 files in an
+artist/album tree under a temp directory and imports it with
+library.import_folders(). Placeholders have no tags, so the first import
+measures the walk plus one failed parse per file; what matters is the
+rescans, which should touch no file contents at all. Then 1% of the files
+are modified, 1% deleted and 1% added, and the tree is rescanned again.
+"""
+
+from __future__ import annotations
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from audio import NullBackend  # noqa: E402
+from controller import PlayerController  # noqa: E402
+from library import LibraryIndex, import_folders  # noqa: E402
+from metadata import MetadataCache  # noqa: E402
+from player import Player  # noqa: E402
+from playlist_store import PlaylistStore  # noqa: E402
+
+
+def _path(root: Path, i: int) -> Path:
+    return root / f"Artist {i % 500:03d}" / f"Album {i % 2000:04d}" / f"{i:06d} - Track {i}.mp3"
+
+
+def make_tree(root: Path, n: int) -> None:
+    for i in range(n):
+        p = _path(root, i)
+        p.parent.mkdir(parents=True, exist_ok=True)
+        p.write_bytes(b"\x00" * 16)
+
+
+def main(n: int = 50_000) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        base = Path(tmp)
+        music = base / "music"
+        t0 = time.perf_counter()
+        make_tree(music, n)
+        print(f"create {n:,} files                {(time.perf_counter() - t0) * 1000:9.1f} ms")
+
+        store = PlaylistStore(base / "playlists.json", journal=True)
+        meta = MetadataCache(":memory:", max_entries=n * 2)
+        ctl = PlayerController(store, Player(NullBackend()), meta)
+        index = LibraryIndex(base / "library_index.sqlite")
+        store.create_playlist("Library")
+
+        def run(label: str) -> None:
+            t = time.perf_counter()
+            added, updated, removed = import_folders(ctl, index, "Library", [music])
+            ms = (time.perf_counter() - t) * 1000
+            print(f"{label:<33} {ms:9.1f} ms  (+{added} ~{updated} -{removed}, {len(store.get_tracks('Library')):,} tracks)")
+
+        run("first import")
+        run("rescan, unchanged")
+        run("rescan, unchanged (again)")
+
+        step = 100
+        for i in range(0, n, step):
+            p = _path(music, i)
+            p.write_bytes(b"\x00" * 32)           # changed (size differs)
+            _path(music, i + 1).unlink()         # deleted
+        for i in range(n, n + n // step):
+            p = _path(music, i)
+            p.parent.mkdir(parents=True, exist_ok=True)
+            p.write_bytes(b"\x00" * 16)           # new
+        run("rescan after 1% churn each way")
+        index.close()
+        meta.close()
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 50_000)
@@ -0,0 +1,126 @@
+"""Multi-process store benchmark: several writers on one playlists.json while another process follows.
+
+Run from the project root:
+  python benchmarks/bench_multiprocess.py [writers] [ops_each]
+
+Starts `writers` processes (default 4), each with its own journaled
+PlaylistStore on the same files (and a small compaction threshold, so
+snapshots get replaced under the others' feet). Each adds ops_each (default
+500) tracks one at a time to a shared playlist and to its own, and every
+tenth step removes the shared playlist's first track (an index-based edit,
+refused with StoreConflict if another writer got there in between). This
+process follows along with refresh(), keeping a mirror from the ops it is
+handed. At the end it checks that no write was lost (the final version
+equals the number of ops committed), and that both its store and the mirror
+match a fresh load. Reports write throughput and the cost of refresh().
+"""
+
+from __future__ import annotations
+import multiprocessing
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from playlist_store import PlaylistStore, StoreConflict, move_items  # noqa: E402
+
+COMPACT_BYTES = 64 * 1024
+
+
+def writer(path: str, k: int, n: int) -> Tuple[int, int, int, float]:
+    """Worker process: returns (ops committed, removes refused, removes done, seconds)."""
+    store = PlaylistStore(path, journal=True, compact_bytes=COMPACT_BYTES)
+    mine = f"Writer {k}"
+    t0 = time.perf_counter()
+    store.create_playlist(mine)
+    ops, refused, removed = 1, 0, 0
+    for i in range(n):
+        store.add_track("Shared", f"/music/w{k}/{i:05d}.mp3", duration="03:00")
+        store.add_track(mine, f"/music/w{k}/{i:05d}.mp3")
+        ops += 2
+        if i % 10 == 9:
+            try:
+                if store.remove_tracks_at("Shared", [0]):
+                    ops += 1
+                    removed += 1
+            except StoreConflict:
+                refused += 1
+    return ops, refused, removed, time.perf_counter() - t0
+
+
+class Mirror:
+    """A listener's view of the store (paths per playlist), kept only from ops."""
+
+    def __init__(self, store: PlaylistStore) -> None:
+        self.lists: Dict[str, List[str]] = {n: [t.path for t in store.get_tracks(n)] for n in store.list_playlists()}
+        store.subscribe(self.apply)
+
+    def apply(self, op: Dict[str, Any]) -> None:
+        kind = op["op"]
+        if kind == "create":
+            self.lists[op["name"]] = []
+        elif kind == "delete":
+            self.lists.pop(op["name"], None)
+        elif kind == "rename":
+            self.lists[op["new"]] = self.lists.pop(op["old"])
+        elif kind == "add":
+            self.lists[op["playlist"]].extend(t.path for t in op["items"])
+        elif kind == "update":
+            self.lists[op["playlist"]][op["index"]] = op["fields"].get("path", self.lists[op["playlist"]][op["index"]])
+        elif kind == "remove":
+            for i in sorted(op["indices"], reverse=True):
+                self.lists[op["playlist"]].pop(i)
+        elif kind == "move":
+            tracks = self.lists[op["playlist"]]
+            tracks[:] = move_items(tracks, op["indices"], op["to"])
+
+
+def snapshot(store: PlaylistStore) -> Dict[str, List[str]]:
+    return {n: [t.path for t in store.get_tracks(n)] for n in store.list_playlists()}
+
+
+def main(writers: int = 4, n: int = 500) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        path = str(Path(tmp) / "playlists.json")
+        follower = PlaylistStore(path, journal=True, compact_bytes=COMPACT_BYTES)
+        follower.create_playlist("Shared")
+        mirror = Mirror(follower)
+
+        idle: List[float] = []
+        changed: List[float] = []
+        context = multiprocessing.get_context("spawn")
+        t0 = time.perf_counter()
+        with ProcessPoolExecutor(writers, mp_context=context) as pool:
+            futures = [pool.submit(writer, path, k, n) for k in range(writers)]
+            while not all(f.done() for f in futures):
+                t = time.perf_counter()
+                (changed if follower.refresh() else idle).append((time.perf_counter() - t) * 1000)
+                time.sleep(0.005)
+            results = [f.result() for f in futures]
+        wall = time.perf_counter() - t0
+        follower.refresh()
+
+        ops = 1 + sum(r[0] for r in results)
+        fresh = PlaylistStore(path, journal=True)
+        print(f"{writers} writers x {n} steps: {ops} ops in {wall:.2f} s ({ops / wall:.0f} ops/s overall)")
+        for k, (w_ops, refused, removed, secs) in enumerate(results):
+            print(f"  writer {k}: {w_ops} ops in {secs:.2f} s, {removed} removes, {refused} refused (conflict)")
+        print(f"  refresh() idle     {len(idle):5d} calls  mean {sum(idle) / max(1, len(idle)) * 1000:8.1f} µs")
+        print(f"  refresh() changed  {len(changed):5d} calls  mean {sum(changed) / max(1, len(changed)):8.2f} ms")
+        print(f"  final version {fresh.seq} (ops committed {ops}): {'ok' if fresh.seq == ops else 'LOST WRITES'}")
+        expected = snapshot(fresh)
+        print(f"  follower matches a fresh load: {snapshot(follower) == expected}")
+        print(f"  op-fed mirror matches a fresh load: {mirror.lists == expected}")
+        shared = writers * n - sum(r[2] for r in results)
+        print(f"  shared playlist {len(expected['Shared'])} tracks (expected {shared})")
+
+
+if __name__ == "__main__":
+    main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 4,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 500,
+    )
@@ -0,0 +1,89 @@
+"""Playlist file benchmark: read, import, export and re-read a large M3U and PLS.
+
+Run from the project root:
+  python benchmarks/bench_playlist_files.py [n_entries]
+
+Writes an extended M3U with n_entries (default 100,000) relative entries,
+reads it with playlist_files.read_playlist() (peak reader memory measured
+with tracemalloc while only counting entries), imports it into a journal
+store that has the search index and smart playlists subscribed the way the
+app does (PlayerController.import_entries: IMPORT_CHUNK entries per write,
+one write per Tk tick in the app, then a rename into place) and reports the
+slowest chunk, which is the longest the Tk thread is held, then exports it
+as .m3u8 and .pls and reads the .pls back.
+"""
+
+from __future__ import annotations
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import List
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from audio import NullBackend  # noqa: E402
+from controller import PlayerController  # noqa: E402
+from metadata import MetadataCache  # noqa: E402
+from player import Player  # noqa: E402
+from playlist_files import read_playlist, write_playlist  # noqa: E402
+from playlist_store import PlaylistStore  # noqa: E402
+from search import SearchIndex  # noqa: E402
+from smart import SmartPlaylists  # noqa: E402
+
+
+def _ms(t0: float) -> str:
+    return f"{(time.perf_counter() - t0) * 1000:9.1f} ms"
+
+
+def main(n: int = 100_000) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        base = Path(tmp)
+        source = base / "mix.m3u"
+        with source.open("w", encoding="utf-8") as f:
+            f.write("#EXTM3U\n")
+            for i in range(n):
+                f.write(f"#EXTINF:{180 + i % 120},Song {i} – Artist {i % 500}\n")
+                f.write(f"Music\\Artist {i % 500:03d}\\Album {i % 2000:04d}\\{i:06d} - Song {i}.mp3\n")
+        print(f"{n:,} entries, {source.stat().st_size / 1e6:.1f} MB")
+
+        tracemalloc.start()
+        t0 = time.perf_counter()
+        count = sum(1 for _ in read_playlist(source))
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        print(f"stream (count only)     {_ms(t0)}  peak {peak / 1024:.0f} KiB")
+
+        t0 = time.perf_counter()
+        entries = list(read_playlist(source))
+        print(f"read (worker thread)    {_ms(t0)}")
+        assert len(entries) == count == n
+        del entries
+
+        store = PlaylistStore(base / "playlists.json", journal=True)
+        SmartPlaylists(store, base / "smart_playlists.json")
+        SearchIndex(store)
+        controller = PlayerController(store, Player(NullBackend()), MetadataCache(base / "meta.sqlite"))
+        chunk_ms: List[float] = []
+        store.subscribe_batches(lambda ops: chunk_ms.append(time.perf_counter()))
+        t0 = time.perf_counter()
+        name, added = controller.import_entries("Mix", read_playlist(source))
+        total = _ms(t0)
+        steps = [b - a for a, b in zip([t0] + chunk_ms, chunk_ms)]
+        print(f"import (chunked)        {total}  {added:,} tracks, {len(steps)} writes, "
+              f"slowest {max(steps) * 1000:.1f} ms (includes reading the chunk)")
+
+        tracks = store.get_tracks(name)
+        for ext in (".m3u8", ".pls"):
+            t0 = time.perf_counter()
+            write_playlist(base / f"out{ext}", tracks)
+            print(f"export {ext:<6}           {_ms(t0)}")
+        t0 = time.perf_counter()
+        back = list(read_playlist(base / "out.pls"))
+        print(f"read .pls               {_ms(t0)}")
+        assert [e.path for e in back] == [t.path for t in tracks]
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
@@ -0,0 +1,61 @@
+"""Missing-file check and bulk relink benchmark.
+
+Run from the project root:
+  python benchmarks/bench_relink.py [n_files]
+
+Creates n_files (default 50,000) small placeholder .mp3 files in an
+artist/album tree, builds a playlist that points at the same tree under an
+old root that no longer exists (as after a drive letter change), and times
+find_missing(), plan_relinks() against the new root and apply_relinks().
+Album track names repeat across albums ("01 - Intro.mp3"), so matching needs
+the folder names, not just the file name.
+"""
+
+from __future__ import annotations
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from playlist_store import PlaylistStore  # noqa: E402
+from relink import apply_relinks, find_missing, plan_relinks  # noqa: E402
+
+
+def _rel(i: int) -> str:
+    return f"Artist {i // 1000:03d}/Album {i // 10:05d}/{i % 10 + 1:02d} - Song {i % 37}.mp3"
+
+
+def main(n: int = 50_000) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        base = Path(tmp)
+        new_root = base / "new"
+        t0 = time.perf_counter()
+        for i in range(n):
+            p = new_root / _rel(i)
+            p.parent.mkdir(parents=True, exist_ok=True)
+            p.write_bytes(b"\x00" * (16 + i % 64))
+        print(f"create {n:,} files                {(time.perf_counter() - t0) * 1000:9.1f} ms")
+
+        store = PlaylistStore(base / "playlists.json", journal=True)
+        store.create_playlist("Library")
+        store.add_tracks("Library", ((f"{base}/old/{_rel(i)}", None, None) for i in range(n)))
+
+        t0 = time.perf_counter()
+        missing = find_missing({"Library": store.get_tracks("Library")})
+        print(f"find_missing                      {(time.perf_counter() - t0) * 1000:9.1f} ms  ({len(missing):,} missing)")
+        t0 = time.perf_counter()
+        plan = plan_relinks(missing, new_root)
+        print(
+            f"plan_relinks                      {(time.perf_counter() - t0) * 1000:9.1f} ms  "
+            f"({len(plan.relinks):,} matched, {len(plan.ambiguous)} ambiguous, {len(plan.unmatched)} unmatched)"
+        )
+        t0 = time.perf_counter()
+        updated = apply_relinks(store, plan.relinks)
+        print(f"apply_relinks (one transaction)   {(time.perf_counter() - t0) * 1000:9.1f} ms  ({updated:,} updated)")
+        assert not find_missing({"Library": store.get_tracks("Library")})
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 50_000)
@@ -0,0 +1,225 @@
+"""Remote-control load test: request latency at a steady command rate, with a subscriber attached.
+
+Run from the project root:
+  python benchmarks/bench_remote.py [rate] [seconds] [clients] [address]
+
+Sends rate (default 400) commands per second for seconds (default 5) over
+clients (default 4) connections, plus one connection subscribed to events.
+
+Without an address it serves an in-process player (NullBackend, a journaled
+store with a 1,000-track playlist) on a Unix socket (TCP on localhost where
+there are none), from a Tcl interpreter whose event loop runs here the way
+Tk's main loop runs in the app, and the mix includes next, seek and queue
+edits. With an address (MP3_PLAYER_REMOTE of a running player; the token is
+read from MP3_PLAYER_REMOTE_TOKEN) only commands that leave playback alone
+are sent: status, queue pages, and volume set to its current value.
+
+Latency is measured from when each request was due to be sent, so a stall
+also counts against the requests queued behind it. Reports p50/p95/p99/max
+and, in-process, how long requests waited for the Tk loop (perf "remote.wait").
+"""
+
+from __future__ import annotations
+import asyncio
+import json
+import os
+import random
+import socket
+import sys
+import tempfile
+import threading
+import time
+import tkinter
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import perf  # noqa: E402
+from audio import NullBackend  # noqa: E402
+from controller import PlayerController  # noqa: E402
+from metadata import MetadataCache  # noqa: E402
+from player import Player  # noqa: E402
+from playlist_store import PlaylistStore  # noqa: E402
+from remote import TOKEN_ENV, RemoteCommands, RemoteServer, _encode, parse_address  # noqa: E402
+
+GENTLE_MIX = [("status", 6), ("queue", 2), ("volume", 2)]
+FULL_MIX = GENTLE_MIX + [("next", 1), ("seek", 1), ("enqueue", 1), ("dequeue", 1)]
+
+
+def percentile(values: List[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))] if ordered else 0.0
+
+
+async def open_connection(address: str) -> Tuple[asyncio.StreamReader, asyncio.StreamWriter]:
+    kind, addr = parse_address(address)
+    if kind == "unix":
+        return await asyncio.open_unix_connection(addr)
+    return await asyncio.open_connection(*addr)
+
+
+async def request(reader, writer, msg: Dict[str, Any]) -> Dict[str, Any]:
+    """Send msg and read lines up to its reply (events on the same connection are skipped)."""
+    writer.write(_encode(msg))
+    while True:
+        reply = json.loads(await reader.readline())
+        if "event" not in reply:
+            return reply
+
+
+def make_request(cmd: str, rng: random.Random, state: Dict[str, Any], k: int) -> Dict[str, Any]:
+    if cmd == "queue":
+        return {"cmd": "queue", "offset": rng.randrange(max(1, state["queue_length"])), "limit": 20}
+    if cmd == "volume":
+        return {"cmd": "volume", "value": state["volume"]}
+    if cmd == "seek":
+        return {"cmd": "seek", "position": rng.uniform(0, 60)}
+    if cmd == "enqueue":
+        return {"cmd": "enqueue", "paths": [f"/music/remote/{k:06d}.mp3"]}
+    if cmd == "dequeue":
+        return {"cmd": "dequeue", "index": rng.randrange(1, state["queue_length"] // 2)}  # Valid whatever the others do
+    return {"cmd": cmd}
+
+
+async def load(address: str, token: Optional[str], rate: float, seconds: float, clients: int,
+               mix: List[Tuple[str, int]]) -> Dict[str, Any]:
+    """Drive the server; returns latencies (ms), error count and events seen."""
+    names = [name for name, weight in mix for _ in range(weight)]
+    latencies: List[float] = []
+    errors: List[str] = []
+    events = 0
+
+    async def connect():
+        reader, writer = await open_connection(address)
+        sock = writer.get_extra_info("socket")
+        if sock is not None and sock.family != getattr(socket, "AF_UNIX", None):
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        if token:
+            await request(reader, writer, {"cmd": "auth", "token": token})
+        return reader, writer
+
+    reader, writer = await connect()
+    state = (await request(reader, writer, {"cmd": "status"}))["result"]
+    writer.close()
+
+    async def subscriber(stop: asyncio.Event) -> None:
+        nonlocal events
+        reader, writer = await connect()
+        await request(reader, writer, {"cmd": "subscribe"})
+        while not stop.is_set():
+            try:
+                line = await asyncio.wait_for(reader.readline(), 0.2)
+            except asyncio.TimeoutError:
+                continue
+            if not line:
+                break
+            events += 1
+        writer.close()
+
+    async def client(c: int, start: float) -> None:
+        rng = random.Random(c)
+        reader, writer = await connect()
+        interval = clients / rate
+        k = 0
+        while True:
+            due = start + c * interval / clients + k * interval
+            if due - start >= seconds:
+                break
+            delay = due - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            reply = await request(reader, writer, make_request(rng.choice(names), rng, state, c * 1_000_000 + k))
+            latencies.append((time.perf_counter() - due) * 1000)
+            if not reply.get("ok"):
+                errors.append(reply.get("error", "?"))
+            elif isinstance(reply.get("result"), dict) and "queue_length" in reply["result"]:
+                state["queue_length"] = reply["result"]["queue_length"]
+            k += 1
+        writer.close()
+
+    stop = asyncio.Event()
+    watcher = asyncio.ensure_future(subscriber(stop))
+    await asyncio.sleep(0.1)
+    t0 = time.perf_counter() + 0.05
+    await asyncio.gather(*(client(c, t0) for c in range(clients)))
+    wall = time.perf_counter() - t0
+    stop.set()
+    await watcher
+    return {"latencies": latencies, "errors": errors, "events": events, "wall": wall}
+
+
+def serve_in_process(tmp: Path) -> Tuple[Any, RemoteServer, threading.Event]:
+    """A player on NullBackend behind a RemoteServer on a Tcl interpreter (not started yet)."""
+    store = PlaylistStore(tmp / "playlists.json", journal=True)
+    meta = MetadataCache(tmp / "metadata_cache.sqlite")
+    store.create_playlist("Library")
+    store.add_tracks("Library", ((f"/music/{i:06d}.mp3", f"Track {i}", 180 + i % 120) for i in range(1000)))
+    ctl = PlayerController(store, Player(NullBackend()), meta)
+    ctl.play_playlist("Library")
+
+    root = tkinter.Tcl()
+    commands = RemoteCommands(ctl)
+    if hasattr(socket, "AF_UNIX"):
+        address = f"unix:{tmp / 'remote.sock'}"
+    else:
+        address = "127.0.0.1:0"
+    server = RemoteServer(root, commands, address)
+    # Like the app: every change is published to subscribers
+    commands.on_change = lambda cmd: server.publish(dict(commands.cmd_status({}), event="now_playing"))
+    return root, server, threading.Event()
+
+
+def report(result: Dict[str, Any], rate: float, clients: int) -> None:
+    lat = result["latencies"]
+    print(f"{len(lat)} commands over {clients} connections in {result['wall']:.2f} s "
+          f"({len(lat) / result['wall']:.0f}/s, target {rate:g}/s), {len(result['errors'])} refused")
+    print(f"  latency  p50 {percentile(lat, 0.5):6.2f} ms  p95 {percentile(lat, 0.95):6.2f} ms  "
+          f"p99 {percentile(lat, 0.99):6.2f} ms  max {max(lat, default=0):6.2f} ms")
+    print(f"  events received by the subscriber: {result['events']}")
+    if result["errors"]:
+        print(f"  first refusal: {result['errors'][0]}")
+
+
+def main(rate: float = 400, seconds: float = 5.0, clients: int = 4, address: Optional[str] = None) -> None:
+    if address is not None:
+        result = asyncio.run(load(address, os.environ.get(TOKEN_ENV), rate, seconds, clients, GENTLE_MIX))
+        report(result, rate, clients)
+        return
+    with tempfile.TemporaryDirectory() as tmp:
+        root, server, done = serve_in_process(Path(tmp))
+        server.start()
+        perf.enable()
+        results: Dict[str, Any] = {}
+
+        def run_client() -> None:
+            try:
+                results.update(asyncio.run(load(server.bound, None, rate, seconds, clients, FULL_MIX)))
+            finally:
+                done.set()
+
+        def tick() -> None:
+            if not done.is_set():
+                root.after(50, tick)
+
+        threading.Thread(target=run_client, daemon=True).start()
+        root.after(50, tick)
+        while not done.is_set():
+            root.tk.dooneevent(0)  # What Tk's mainloop does: block until a file event or timer is due
+        server.close()
+        print(f"in-process player at {server.bound}")
+        report(results, rate, clients)
+        stats = perf.snapshot()
+        for name in ("remote.wait", "remote.command"):
+            s = stats.get(name)
+            if s:
+                print(f"  {name:15s} p50 {s['p50_ms']:6.3f} ms  p95 {s['p95_ms']:6.3f} ms  max {s['max_ms']:6.3f} ms")
+
+
+if __name__ == "__main__":
+    main(
+        float(sys.argv[1]) if len(sys.argv) > 1 else 400,
+        float(sys.argv[2]) if len(sys.argv) > 2 else 5.0,
+        int(sys.argv[3]) if len(sys.argv) > 3 else 4,
+        sys.argv[4] if len(sys.argv) > 4 else None,
+    )
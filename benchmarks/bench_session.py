@@ -0,0 +1,97 @@
+"""Session persistence benchmark: cost of the periodic save and fidelity of the restore.
+
+Run from the project root:
+  python benchmarks/bench_session.py [n_tracks] [hours]
+
+Builds a journaled PlaylistStore with one n_tracks (default 100,000)
+playlist, plays it in shuffle mode on audio.NullBackend's virtual clock for
+the given number of hours (default 8), and saves the session every
+SESSION_SAVE_MS of virtual time like the app does. Reports the cost of a
+save (state capture, encoding and write), what a save costs when nothing
+changed (paused), and the file size after the run. Then it opens the store
+afresh, restores the session into a new controller, and checks that
+playlist, track, position, shuffle cycle and history all came back.
+"""
+
+from __future__ import annotations
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import List
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from audio import NullBackend  # noqa: E402
+from controller import PlayerController, run_simulated  # noqa: E402
+from metadata import MetadataCache  # noqa: E402
+from player import Player  # noqa: E402
+from playlist_store import PlaylistStore  # noqa: E402
+from session import SESSION_SAVE_MS, SessionFile  # noqa: E402
+from synth import duration_of  # noqa: E402
+
+
+def main(n: int = 100_000, hours: float = 8.0) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        music = root / "music"
+        store = PlaylistStore(root / "playlists.json", journal=True)
+        meta = MetadataCache(root / "metadata_cache.sqlite")
+        store.create_playlist("Library")
+        store.add_tracks("Library", ((str(music / f"{i:06d}.mp3"), f"Track {i}", duration_of(i)) for i in range(n)))
+        ctl = PlayerController(store, Player(NullBackend()), meta)
+        ctl.set_shuffle(True)
+        ctl.play_playlist("Library")
+        session = SessionFile(root / "session.json")
+
+        saves: List[float] = []
+        changes = 0
+        step = SESSION_SAVE_MS / 1000
+        for _ in range(int(hours * 3600 / step)):
+            changes += run_simulated(ctl, step)
+            t = time.perf_counter()
+            session.save(ctl.session_state())
+            saves.append((time.perf_counter() - t) * 1e6)
+        ctl.player.backend.advance(37.3)  # Somewhere mid-track, then pause: the state to resume
+        ctl.player.pause()
+        session.save(ctl.session_state())
+        t = time.perf_counter()
+        for _ in range(1000):
+            session.save(ctl.session_state())
+        idle_us = (time.perf_counter() - t) * 1000
+        size = session.path.stat().st_size
+
+        print(f"{n:,} tracks, {hours:g} h in shuffle ({changes} track changes), a save every {step:g} s")
+        saves.sort()
+        print(f"  save while playing   {len(saves):6d} saves  mean {sum(saves) / len(saves):7.1f} µs  "
+              f"p95 {saves[int(0.95 * len(saves))]:7.1f} µs  max {saves[-1]:7.1f} µs")
+        print(f"  save while paused    {idle_us:7.1f} µs per call (unchanged: nothing written)")
+        print(f"  session.json         {size:,} bytes")
+
+        expected = ctl.session_state()
+        player = ctl.player
+        music.mkdir()
+        Path(player.current_file).touch()  # restore_session() wants the file to exist
+        store2 = PlaylistStore(root / "playlists.json", journal=True)
+        ctl2 = PlayerController(store2, Player(NullBackend()), meta)
+        t = time.perf_counter()
+        ok = ctl2.restore_session(SessionFile(root / "session.json").load())
+        restore_ms = (time.perf_counter() - t) * 1000
+        p2 = ctl2.player
+        print(f"  restore              {restore_ms:7.2f} ms (store already open)  restored: {ok}")
+        checks = {
+            "playlist": ctl2.playing_playlist == ctl.playing_playlist,
+            "track": (p2.queue_index, str(p2.current_file)) == (player.queue_index, str(player.current_file)),
+            "position": abs(p2.elapsed() - player.elapsed()) < 0.1 and p2.paused,
+            "shuffle cycle": set(ctl2.order.snapshot()["drawn"]) == set(expected["order"]["drawn"]),
+            "history": ctl2.order.history() == ctl.order.history(),
+        }
+        print("  " + "  ".join(f"{k}: {'ok' if v else 'MISMATCH'}" for k, v in checks.items()))
+        meta.close()
+
+
+if __name__ == "__main__":
+    main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 100_000,
+        float(sys.argv[2]) if len(sys.argv) > 2 else 8.0,
+    )
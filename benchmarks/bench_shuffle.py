@@ -0,0 +1,62 @@
+"""Microbenchmarks for the shuffle engine at library scale.
+
+Run from the project root:
+  python benchmarks/bench_shuffle.py [n_tracks]
+
+Times (per operation) reset, draws, peeks, history back/forward, appends,
+mid-queue removals and one batch removal on a queue of n tracks (default 100,000), next to the old
+list-based pool (shuffle a list, then pop(0) per pick) for reference.
+"""
+
+from __future__ import annotations
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from shuffle import ShuffleEngine  # noqa: E402
+
+
+def timed(label: str, ops: int, fn) -> float:
+    """Run fn() once, print total and per-op time, return seconds."""
+    t0 = time.perf_counter()
+    fn()
+    dt = time.perf_counter() - t0
+    per = dt / max(ops, 1)
+    print(f"  {label:<34} {dt * 1000:10.2f} ms total  {per * 1e6:10.3f} µs/op  ({ops} ops)")
+    return dt
+
+
+def main(n: int = 100_000) -> None:
+    print(f"ShuffleEngine, n = {n:,}")
+    engine = ShuffleEngine(n, seed=1234)
+    picks = min(n, 50_000)
+
+    timed("reset", 1, lambda: engine.reset(n))
+    timed("advance (draw + record)", picks, lambda: [engine.advance() for _ in range(picks)])
+    timed("peek_next + advance", picks, lambda: [(engine.peek_next(), engine.advance()) for _ in range(picks)])
+    timed("back", 500, lambda: [engine.back() for _ in range(500)])
+    timed("advance through history", 500, lambda: [engine.advance() for _ in range(500)])
+    timed("append", 10_000, lambda: [engine.append() for _ in range(10_000)])
+    rng = random.Random(5)
+    timed("remove (random index)", 20, lambda: [engine.remove(rng.randrange(len(engine))) for _ in range(20)])
+    timed("remove (last index)", 1000, lambda: [engine.remove(len(engine) - 1) for _ in range(1000)])
+    timed("remove_many (1,000 random indices)", 1, lambda: engine.remove_many(rng.sample(range(len(engine)), 1000)))
+
+    print(f"Legacy list pool, n = {n:,}")
+    pool: list = []
+
+    def legacy_init() -> None:
+        pool[:] = range(n)  # A fresh pool each run, never one a previous run drained
+        random.shuffle(pool)
+        pool.remove(0)
+
+    legacy_picks = min(n - 1, 5_000)  # The current track was removed from the pool
+    timed("init (shuffle + remove)", 1, legacy_init)
+    timed("pop(0)", legacy_picks, lambda: [pool.pop(0) for _ in range(legacy_picks)])
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
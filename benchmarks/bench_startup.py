@@ -0,0 +1,71 @@
+"""Cold-start timings: module import cost, and time to first frame / interactive.
+
+Run from the project root:
+  python benchmarks/bench_startup.py [runs]
+
+Each measurement is a fresh interpreter (so nothing is cached in sys.modules):
+- "import main" wall time, plus the cost of the optional libraries the app now
+  defers (pygame, mutagen) for reference
+- if a display is available, `python main.py --startup-report`, which prints
+  the time to first frame and time to interactive and exits
+"""
+
+from __future__ import annotations
+import importlib.util
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict, List
+
+ROOT = Path(__file__).resolve().parent.parent
+
+_IMPORT = "import time; t = time.perf_counter(); import {mod}; print((time.perf_counter() - t) * 1000)"
+
+
+def import_ms(module: str, runs: int) -> List[float]:
+    """Milliseconds to import module in fresh interpreters."""
+    out = []
+    for _ in range(runs):
+        res = subprocess.run(
+            [sys.executable, "-c", _IMPORT.format(mod=module)],
+            cwd=ROOT, capture_output=True, text=True, check=True,
+        )
+        out.append(float(res.stdout.strip().splitlines()[-1]))
+    return out
+
+
+def startup_report(runs: int) -> List[Dict[str, float]]:
+    """Parse `main.py --startup-report` output ("imports 80 ms, first_frame 150 ms, ...")."""
+    out = []
+    for _ in range(runs):
+        res = subprocess.run(
+            [sys.executable, "main.py", "--startup-report"],
+            cwd=ROOT, capture_output=True, text=True, timeout=120,
+        )
+        if res.returncode != 0:
+            raise RuntimeError(res.stderr.strip().splitlines()[-1] if res.stderr else "main.py failed")
+        line = res.stdout.strip().splitlines()[-1]
+        out.append({k: float(v.split()[0]) for k, v in (p.strip().split(" ", 1) for p in line.split(","))})
+    return out
+
+
+def main(runs: int = 5) -> None:
+    print(f"median of {runs} fresh interpreters")
+    print(f"  {'import main':<24} {statistics.median(import_ms('main', runs)):8.1f} ms")
+    for mod in ("pygame", "mutagen.mp3"):
+        if importlib.util.find_spec(mod.split(".")[0]) is None:
+            print(f"  {'import ' + mod:<24} {'not installed':>8}")
+        else:
+            print(f"  {'import ' + mod:<24} {statistics.median(import_ms(mod, runs)):8.1f} ms  (deferred to first use)")
+    try:
+        reports = startup_report(runs)
+    except Exception as e:  # No display (headless build box), Tk missing, ...
+        print(f"  startup report skipped: {e}")
+        return
+    for key in reports[0]:
+        print(f"  {key:<24} {statistics.median(r[key] for r in reports):8.1f} ms")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5)
@@ -0,0 +1,63 @@
+"""Memory footprint of playlist entries: plain dicts vs. Track objects.
+
+Run from the project root:
+  python benchmarks/bench_track_memory.py [n_tracks]
+
+Builds a synthetic library of n tracks (default 100,000) spread over three
+playlists that share files (as a real library does), decodes it from JSON the
+way PlaylistStore loads playlists.json, and measures the live memory
+(tracemalloc) and load time of both representations.
+"""
+
+from __future__ import annotations
+import gc
+import json
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from synth import entries  # noqa: E402
+from track import Track  # noqa: E402
+
+
+def library_json(n: int) -> str:
+    """playlists.json text: "All" holds n tracks, two more playlists reuse half of them each."""
+    tracks = [{"path": path, "title": title, "duration": duration} for path, title, duration in entries(n)]
+    return json.dumps({"playlists": {"All": tracks, "Evens": tracks[::2], "Odds": tracks[1::2]}})
+
+
+def measure(label: str, text: str, build) -> float:
+    """Decode text with build(), print live memory and time, return bytes per entry."""
+    gc.collect()
+    t0 = time.perf_counter()
+    build(json.loads(text))
+    dt = time.perf_counter() - t0  # Timed separately: tracing slows allocation down a lot
+    gc.collect()
+    tracemalloc.start()
+    data = build(json.loads(text))
+    gc.collect()
+    current, _peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    entries = sum(len(v) for v in data.values())
+    print(f"  {label:<8} {current / 2**20:8.1f} MiB live  {current / entries:7.1f} B/entry  {dt * 1000:8.1f} ms load")
+    del data
+    return current / entries
+
+
+def main(n: int = 100_000) -> None:
+    text = library_json(n)
+    print(f"{n:,} tracks in 3 playlists ({2 * n:,} entries)")
+    as_dicts = measure("dicts", text, lambda d: d["playlists"])
+    as_tracks = measure(
+        "Track",
+        text,
+        lambda d: {name: [Track.from_dict(t) for t in ts] for name, ts in d["playlists"].items()},
+    )
+    print(f"  Track uses {as_tracks / as_dicts:.0%} of the dict footprint")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
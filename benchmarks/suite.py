@@ -0,0 +1,350 @@
+"""Benchmark suite for the hot paths, with JSON results and a regression check.
+
+Run from the project root:
+  python benchmarks/suite.py run [--sizes 1000,10000,100000] [--out results.json]
+                                 [--repeat 5] [--scan-files 1000] [--only store,shuffle]
+  python benchmarks/suite.py compare baseline.json results.json [--threshold 0.10]
+
+"run" builds a synthetic library per size in a temp directory and times:
+  store.*    PlaylistStore snapshot load/save, journaled single and batch add/remove
+  switch.*   playlist switching: get_tracks (JSON), lazy first load (SQLite), and
+             TrackTable.show when a display is available
+  shuffle.*  ShuffleEngine reset and picks
+  search.*   SearchIndex build, token/prefix/multi-word queries, incremental add/remove
+  meta.*     MetadataScanner over generated tagged MP3s (at most --scan-files of
+             them): cold cache, warm LRU, and a new process reading the sidecar
+Each benchmark runs --repeat times (setup excluded); the median and min are
+recorded, in seconds per operation.
+
+"compare" prints the change for every benchmark present in both files and exits
+with status 1 if any got slower by more than the threshold (and by more than
+--min-delta seconds per timed run, so sub-millisecond noise doesn't fail it).
+It compares the best run ("min") by default, which is far less noisy on shared
+machines than the median; --stat median compares medians instead.
+"""
+
+from __future__ import annotations
+import argparse
+import gc
+import json
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from metadata import META_AVAILABLE, MetadataCache  # noqa: E402
+from playlist_store import PlaylistStore  # noqa: E402
+from scanner import MetadataScanner  # noqa: E402
+from search import SearchIndex  # noqa: E402
+from shuffle import ShuffleEngine  # noqa: E402
+from sqlite_store import migrate_json_to_sqlite, SqlitePlaylistStore  # noqa: E402
+from synth import entries, make_files  # noqa: E402
+
+GROUPS = ("store", "switch", "shuffle", "search", "meta")
+BATCH = 1000           # Items per batch add/remove
+SINGLE_OPS = 50        # Single adds/removes per timed run
+PICKS = 10_000         # Shuffle picks per timed run
+QUERIES = {            # search.* query kinds and the synthetic-library queries that exercise them
+    "token": ["track 4242", "artist 123", "album 0999"],
+    "prefix": ["tr", "art 4", "alb 01"],
+    "miss": ["zzz", "track zzz"],
+}
+
+Results = Dict[str, Dict[str, Any]]
+
+
+def label(n: int) -> str:
+    return f"{n // 1000}k" if n % 1000 == 0 else str(n)
+
+
+class Runner:
+    """Times callables and collects results under "<name>[<size>]" keys."""
+
+    def __init__(self, repeat: int) -> None:
+        self.repeat = repeat
+        self.results: Results = {}
+
+    def bench(
+        self,
+        name: str,
+        fn: Callable[[Any], Any],
+        setup: Callable[[], Any] = lambda: None,
+        ops: int = 1,
+    ) -> None:
+        """Run setup() then time fn(setup_result), repeat times; record seconds per op.
+
+        Like timeit, the garbage collector is paused while timing (after a collection).
+        """
+        times = []
+        for _ in range(self.repeat):
+            arg = setup()
+            gc.collect()
+            gc.disable()
+            try:
+                t0 = time.perf_counter()
+                fn(arg)
+                times.append((time.perf_counter() - t0) / ops)
+            finally:
+                gc.enable()
+        self.results[name] = {"median": statistics.median(times), "min": min(times), "runs": len(times), "ops": ops}
+        print(f"  {name:<34} {self.results[name]['median'] * 1000:10.3f} ms/op")
+
+    def skip(self, name: str, reason: str) -> None:
+        self.results[name] = {"skipped": reason}
+        print(f"  {name:<34} skipped ({reason})")
+
+
+# ---- benchmark groups ----
+def bench_store(r: Runner, tmp: Path, n: int) -> None:
+    tag = label(n)
+    lib = entries(n)
+    base = tmp / f"store-{tag}.json"
+    store = PlaylistStore(base)
+    store.create_playlist("Library")
+    store.add_tracks("Library", lib)
+
+    r.bench(f"store.load[{tag}]", lambda _: PlaylistStore(base))
+    r.bench(f"store.save[{tag}]", lambda s: s._save(), setup=lambda: store)
+
+    def journaled() -> PlaylistStore:
+        path = tmp / f"journal-{tag}.json"
+        path.write_bytes(base.read_bytes())
+        path.with_name(path.name + ".journal").unlink(missing_ok=True)
+        return PlaylistStore(path, journal=True)
+
+    extra = entries(BATCH, root="/new")
+    r.bench(
+        f"store.add_one[{tag}]",
+        lambda s: [s.add_track("Library", *e) for e in extra[:SINGLE_OPS]],
+        setup=journaled,
+        ops=SINGLE_OPS,
+    )
+    r.bench(f"store.add_batch[{tag}]", lambda s: s.add_tracks("Library", extra), setup=journaled)
+    rng = random.Random(7)
+    r.bench(
+        f"store.remove_one[{tag}]",
+        lambda s: [s.remove_tracks_at("Library", [rng.randrange(n - SINGLE_OPS)]) for _ in range(SINGLE_OPS)],
+        setup=journaled,
+        ops=SINGLE_OPS,
+    )
+    picks = sorted(rng.sample(range(n), min(BATCH, n // 2)))
+    r.bench(f"store.remove_batch[{tag}]", lambda s: s.remove_tracks_at("Library", picks), setup=journaled)
+
+
+def bench_switch(r: Runner, tmp: Path, n: int) -> None:
+    tag = label(n)
+    lib = entries(n)
+    path = tmp / f"switch-{tag}.json"
+    store = PlaylistStore(path)
+    with store.transaction():
+        for name in ("A", "B"):
+            store.create_playlist(name)
+            store.add_tracks(name, lib)
+    r.bench(f"switch.get_tracks.json[{tag}]", lambda _: (store.get_tracks("A"), store.get_tracks("B")), ops=2)
+
+    db = tmp / f"switch-{tag}.db"
+    migrate_json_to_sqlite(path, db)
+    sq = SqlitePlaylistStore(db)
+
+    def unloaded() -> SqlitePlaylistStore:
+        sq.unload("A")
+        return sq
+
+    r.bench(f"switch.get_tracks.sqlite[{tag}]", lambda s: s.get_tracks("A"), setup=unloaded)
+    sq.close()
+
+    try:
+        import tkinter as tk
+        root = tk.Tk()
+    except Exception as e:  # No display (headless build box) or no Tk at all
+        r.skip(f"switch.track_table[{tag}]", type(e).__name__)
+        return
+    from track_view import TrackTable
+    meta = MetadataCache(tmp / "switch-meta.sqlite")
+    table = TrackTable(root, meta)
+    table.pack(fill="both", expand=True)
+    root.geometry("900x560")
+    root.update()
+    tracks = {"A": store.get_tracks("A"), "B": store.get_tracks("B")}
+
+    def show_both(_) -> None:
+        for name in ("A", "B"):
+            table.show(name, tracks[name])
+            root.update_idletasks()
+
+    r.bench(f"switch.track_table[{tag}]", show_both, ops=2)
+    table.close()
+    root.destroy()
+    meta.close()
+
+
+def bench_shuffle(r: Runner, _tmp: Path, n: int) -> None:
+    tag = label(n)
+    engine = ShuffleEngine(n, seed=1)
+    picks = min(PICKS, n)
+    r.bench(f"shuffle.reset[{tag}]", lambda e: e.reset(n), setup=lambda: engine)
+    r.bench(
+        f"shuffle.pick[{tag}]",
+        lambda e: [e.advance() for _ in range(picks)],
+        setup=lambda: (engine.reset(n), engine)[1],
+        ops=picks,
+    )
+
+
+def bench_search(r: Runner, tmp: Path, n: int) -> None:
+    tag = label(n)
+    store = PlaylistStore(tmp / f"search-{tag}.json", journal=True)
+    store.create_playlist("Library")
+    store.add_tracks("Library", entries(n))
+    r.bench(f"search.build[{tag}]", lambda s: SearchIndex(s).close(), setup=lambda: store)
+    index = SearchIndex(store)
+    for kind, queries in QUERIES.items():
+        r.bench(f"search.{kind}[{tag}]", lambda qs: [index.search(q) for q in qs], setup=lambda qs=queries: qs, ops=len(queries))
+    new = entries(BATCH, "/new")
+    r.bench(
+        f"search.add_batch[{tag}]",
+        lambda items: store.add_tracks("Library", items),
+        setup=lambda: (store.remove_tracks_at("Library", range(n, n + BATCH)), new)[1],
+    )
+    index.close()
+
+
+class _Loop:
+    """Stand-in for the Tk root the scanner schedules on: runs after() callbacks in order."""
+
+    def __init__(self) -> None:
+        self._due: List[tuple] = []
+
+    def after(self, ms: int, fn: Callable[[], None]) -> None:
+        self._due.append((time.perf_counter() + ms / 1000.0, fn))
+
+    def run(self) -> None:
+        while self._due:
+            self._due.sort(key=lambda d: d[0])
+            when, fn = self._due.pop(0)
+            time.sleep(max(0.0, when - time.perf_counter()))
+            fn()
+
+
+def bench_meta(r: Runner, tmp: Path, n: int, files: List[Path]) -> None:
+    tag = label(n)
+    paths = files[: min(n, len(files))]
+    loop = _Loop()
+
+    def scan(cache: MetadataCache) -> None:
+        done: List[bool] = []
+        MetadataScanner(loop, cache).start(paths, lambda d, t: None, lambda res, c: done.append(c))
+        loop.run()
+        assert done == [False]
+
+    sidecar = tmp / f"meta-{tag}.sqlite"
+    opened: List[MetadataCache] = []
+
+    def fresh() -> MetadataCache:
+        for c in opened:
+            c.close()
+        opened.clear()
+        sidecar.unlink(missing_ok=True)
+        opened.append(MetadataCache(sidecar))
+        return opened[-1]
+
+    def reopened() -> MetadataCache:
+        for c in opened:
+            c.close()
+        opened.clear()
+        opened.append(MetadataCache(sidecar))
+        return opened[-1]
+
+    r.bench(f"meta.scan.cold[{tag}]", scan, setup=fresh, ops=len(paths))
+    r.bench(f"meta.scan.warm[{tag}]", scan, setup=lambda: opened[-1], ops=len(paths))
+    r.bench(f"meta.scan.sidecar[{tag}]", scan, setup=reopened, ops=len(paths))
+    for c in opened:
+        c.close()
+
+
+# ---- commands ----
+def run(args: argparse.Namespace) -> int:
+    sizes = [int(s) for s in args.sizes.split(",")]
+    groups = args.only.split(",") if args.only else list(GROUPS)
+    r = Runner(args.repeat)
+    with tempfile.TemporaryDirectory() as d:
+        tmp = Path(d)
+        files: List[Path] = []
+        if "meta" in groups:
+            count = min(max(sizes), args.scan_files)
+            t0 = time.perf_counter()
+            files = make_files(tmp / "mp3", count)
+            print(f"generated {count:,} tagged MP3s in {time.perf_counter() - t0:.1f} s")
+        for n in sizes:
+            print(f"n = {n:,}")
+            for group in groups:
+                if group == "meta":
+                    bench_meta(r, tmp, n, files)
+                else:
+                    globals()[f"bench_{group}"](r, tmp, n)
+    report = {
+        "meta": {
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "mutagen": META_AVAILABLE,
+            "repeat": args.repeat,
+            "sizes": sizes,
+        },
+        "results": r.results,
+    }
+    Path(args.out).write_text(json.dumps(report, indent=2), encoding="utf-8")
+    print(f"wrote {args.out}")
+    return 0
+
+
+def compare(args: argparse.Namespace) -> int:
+    base = json.loads(Path(args.baseline).read_text(encoding="utf-8"))["results"]
+    new = json.loads(Path(args.results).read_text(encoding="utf-8"))["results"]
+    regressions = 0
+    for name in sorted(set(base) & set(new)):
+        b, c = base[name].get(args.stat), new[name].get(args.stat)
+        if b is None or c is None:
+            continue
+        change = (c - b) / b if b else 0.0
+        # min_delta applies to a whole timed run, not to the per-op figure
+        slower = change > args.threshold and (c - b) * new[name].get("ops", 1) > args.min_delta
+        regressions += slower
+        flag = "REGRESSION" if slower else ("faster" if change < -args.threshold else "")
+        print(f"  {name:<34} {b * 1000:10.3f} -> {c * 1000:10.3f} ms  {change:+7.1%}  {flag}")
+    only = sorted(set(base) ^ set(new))
+    if only:
+        print(f"  (not in both runs: {', '.join(only)})")
+    print(f"{regressions} regression(s) over {args.threshold:.0%}")
+    return 1 if regressions else 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    sub = parser.add_subparsers(dest="command", required=True)
+    p_run = sub.add_parser("run", help="run the benchmarks and write JSON results")
+    p_run.add_argument("--sizes", default="1000,10000,100000", help="comma-separated library sizes")
+    p_run.add_argument("--out", default="bench_results.json")
+    p_run.add_argument("--repeat", type=int, default=5)
+    p_run.add_argument("--scan-files", type=int, default=1000, help="max generated MP3s to scan per size")
+    p_run.add_argument("--only", default="", help=f"comma-separated groups ({','.join(GROUPS)})")
+    p_run.set_defaults(fn=run)
+    p_cmp = sub.add_parser("compare", help="compare two result files")
+    p_cmp.add_argument("baseline")
+    p_cmp.add_argument("results")
+    p_cmp.add_argument("--threshold", type=float, default=0.10, help="allowed slowdown (0.10 = 10%%)")
+    p_cmp.add_argument("--min-delta", type=float, default=0.0005, help="ignore slowdowns below this many seconds per timed run")
+    p_cmp.add_argument("--stat", choices=("min", "median"), default="min", help="which timing to compare")
+    p_cmp.set_defaults(fn=compare)
+    args = parser.parse_args(argv)
+    return args.fn(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,70 @@
+"""Synthetic libraries for the benchmarks: track entries and real (silent) tagged MP3 files.
+
+The MP3s are written byte by byte, so generating them needs no encoder and no
+mutagen: an ID3v2.4 tag (TIT2 title, TPE1 artist) followed by silent MPEG-1
+Layer III frames (128 kbps, 44.1 kHz, mono). mutagen reads them like any other
+file, so tag scanning is measured on the same code path as a real library.
+"""
+
+from __future__ import annotations
+from pathlib import Path
+from typing import List, Tuple
+
+Entry = Tuple[str, str, str]  # (path, title, "MM:SS") as passed to PlaylistStore.add_tracks
+
+_FRAME_HEADER = bytes((0xFF, 0xFB, 0x90, 0xC0))  # MPEG-1 L3, 128 kbps, 44.1 kHz, no padding, mono
+_FRAME_BYTES = 144 * 128_000 // 44_100            # 417
+_FRAME_SECONDS = 1152 / 44_100
+
+
+def _syncsafe(n: int) -> bytes:
+    """ID3v2.4 size: 4 bytes of 7 bits each."""
+    return bytes(((n >> 21) & 0x7F, (n >> 14) & 0x7F, (n >> 7) & 0x7F, n & 0x7F))
+
+
+def _text_frame(frame_id: str, text: str) -> bytes:
+    body = b"\x03" + text.encode("utf-8")  # 3 = UTF-8
+    return frame_id.encode("ascii") + _syncsafe(len(body)) + b"\x00\x00" + body
+
+
+def id3_tag(title: str, artist: str) -> bytes:
+    """A minimal ID3v2.4 tag with title and artist."""
+    frames = _text_frame("TIT2", title) + _text_frame("TPE1", artist)
+    return b"ID3\x04\x00\x00" + _syncsafe(len(frames)) + frames
+
+
+def write_mp3(path: Path, title: str, artist: str, seconds: float = 2.0) -> None:
+    """Write a silent MP3 of about seconds length with title/artist tags."""
+    frame = _FRAME_HEADER + bytes(_FRAME_BYTES - len(_FRAME_HEADER))
+    count = max(1, round(seconds / _FRAME_SECONDS))
+    path.write_bytes(id3_tag(title, artist) + frame * count)
+
+
+def duration_of(i: int) -> str:
+    """Synthetic stored duration for entry i: 2:00 to 5:59."""
+    secs = 120 + (i * 37) % 240
+    return f"{secs // 60:02d}:{secs % 60:02d}"
+
+
+def entries(n: int, root: str = "/music") -> List[Entry]:
+    """n playlist entries spread over artist/album folders (the files need not exist)."""
+    return [
+        (
+            f"{root}/Artist {i % 500:03d}/Album {i % 2000:04d}/{i:06d} - Track {i}.mp3",
+            f"Track {i} – Artist {i % 500:03d}",
+            duration_of(i),
+        )
+        for i in range(n)
+    ]
+
+
+def make_files(folder: Path, n: int, seconds: float = 2.0) -> List[Path]:
+    """Create (or reuse) n tagged MP3s under folder; returns their paths."""
+    folder.mkdir(parents=True, exist_ok=True)
+    paths = []
+    for i in range(n):
+        p = folder / f"{i:06d}.mp3"
+        if not p.exists():
+            write_mp3(p, f"Track {i}", f"Artist {i % 500:03d}", seconds)
+        paths.append(p)
+    return paths
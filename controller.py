@@ -0,0 +1,491 @@
+"""Playback/session logic, independent of any UI toolkit.
+
+PlayerController owns what used to live in the Tk App: which playlist is
+playing, shuffle / repeat-one, the shuffle order and history, keeping the
+play queue in step with store edits, and deciding what plays next when a
+track ends. The UI calls its methods from button handlers and schedules
+next_check_ms()/check_end() on its own timer (Tk after()).
+
+With an audio.NullBackend nothing needs a display or a sound card:
+run_simulated() drives the same end-of-track path on the backend's virtual
+clock, so hours of playback take milliseconds (see benchmarks/bench_headless.py).
+"""
+
+from __future__ import annotations
+from itertools import islice
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Optional, Tuple
+
+from metadata import META_AVAILABLE, Meta, MetadataCache, parse_duration
+from player import Player
+from playlist_store import PlaylistStore, move_items
+from shuffle import ShuffleEngine
+from track import Track, to_seconds
+
+if TYPE_CHECKING:
+    from library import ImportPlan
+    from playlist_files import Entry
+
+# Track-end detection: sleep until shortly before the expected end, then watch closely.
+END_LEAD_MS = 1000      # Wake up this long before the expected end of a track.
+END_CHECK_MS = 5        # Check interval around the expected end.
+END_SLOW_CHECK_MS = 250 # Check interval when the length is unknown or well overdue.
+SESSION_QUEUE_CAP = 1000  # Longest ad-hoc queue saved with the session (longer: just the track)
+IMPORT_CHUNK = 5000     # Playlist-file entries written to the store per step while importing
+
+
+def display_title(path: Path, meta: Meta) -> str:
+    """"Title – Artist" if both tags exist, else the title tag, else the filename stem."""
+    title, artist, _duration = meta
+    return f"{title} – {artist}" if title and artist else (title or path.stem)
+
+
+class PlayerController:
+    """Queue, shuffle/repeat and track-end handling on top of a store, a player and a metadata cache."""
+
+    def __init__(self, store: PlaylistStore, player: Player, meta: MetadataCache) -> None:
+        self.store = store
+        self.player = player
+        self.meta = meta
+        self.current_file: Path | None = None
+        self.shuffle: bool = False
+        self.repeat_one: bool = False
+        self.order = ShuffleEngine()       # Shuffle draws + bounded play history (Prev/Next)
+        self.playing_playlist: str | None = None  # Playlist loaded into the player's queue
+        self._current_removed = False      # Playing track was removed from the queue mid-play
+        # Store edits to the playing playlist are mirrored into the queue
+        self.store.subscribe(self._sync_queue)
+
+    # ---- transport ----
+    def play_file(self, p: Path) -> str:
+        """Play a single file right away; returns its display title."""
+        self.current_file = p
+        meta = self.meta.get(p)
+        self.player.play_file_now(p, parse_duration(meta[2]))
+        return display_title(p, meta)
+
+    def play_playlist(self, name: str) -> bool:
+        """Load a playlist into the player and start it. False if it is empty or missing."""
+        tracks = self.store.get_tracks(name)
+        if not tracks:
+            return False
+        self._start_queue(tracks, None)
+        self.playing_playlist = name
+        return True
+
+    def play_tracks(self, tracks: List[Track], start: int = 0) -> bool:
+        """Play an ad-hoc queue (e.g. search results) from tracks[start]. False if it is empty.
+
+        The queue is not tied to a playlist, so later store edits leave it alone.
+        """
+        if not tracks:
+            return False
+        self._start_queue(list(tracks), start)
+        self.playing_playlist = None
+        return True
+
+    def _start_queue(self, tracks: List[Track], start: Optional[int]) -> None:
+        """Load tracks into the player with a fresh shuffle cycle and history, then start playing.
+
+        start=None begins where the mode says (first track, or a shuffle draw).
+        """
+        self.player.load_queue(tracks)
+        self._current_removed = False
+        self.order.reset(len(tracks))
+        if start is None and self.shuffle:
+            self.player.play_index(self.order.advance())
+        elif start is None:
+            self.player.play_queue_from_start()
+            self.order.record(self.player.queue_index)
+        else:
+            self.player.play_index(start)
+            self.order.record(start)
+
+    def next(self) -> None:
+        """Advance to the next track, honoring repeat-one and shuffle behavior."""
+        if self.player.queue_len() == 0:
+            return
+        nxt = self._next_index(commit=True)
+        if nxt is None:
+            # Past the end of the queue
+            self.player.stop()
+            self.player.queue_index = -1
+        else:
+            self.player.play_index(nxt)
+
+    def prev(self) -> None:
+        """Go to the previous track. In shuffle, use the history to step back."""
+        self._current_removed = False
+        if self.shuffle and self.order.can_go_back():
+            # Move backward in shuffle history
+            self.player.play_index(self.order.back())
+        else:
+            # Sequential previous
+            self.player.prev_in_queue()
+            if self.player.queue_index != -1:
+                self.order.record(self.player.queue_index)
+
+    def jump(self, index: int) -> None:
+        """Play queue entry index now (it becomes the current entry of the shuffle history)."""
+        if not 0 <= index < self.player.queue_len():
+            raise ValueError(f"No queue entry {index}.")
+        self._current_removed = False
+        self.player.play_index(index)
+        self.order.record(index)
+
+    # ---- queue edits ----
+    # A playlist queue is edited through the store (so the playlist changes too and
+    # _sync_queue mirrors it back); an ad-hoc queue is edited directly.
+    def enqueue(self, paths: Iterable[Path | str]) -> int:
+        """Append files to the playing queue, with their tags. Returns the count added."""
+        items = []
+        for p in map(Path, paths):
+            meta = self.meta.get(p)
+            items.append((p, display_title(p, meta), meta[2]))
+        if self.playing_playlist is not None:
+            return self.store.add_tracks(self.playing_playlist, items)
+        tracks = [Track(str(p), title, to_seconds(duration)) for p, title, duration in items]
+        if tracks:
+            self._edit_queue({"op": "add", "items": tracks})
+        return len(tracks)
+
+    def dequeue(self, index: int) -> None:
+        """Remove queue entry index (a playing track plays on; Next goes to its successor)."""
+        if not 0 <= index < self.player.queue_len():
+            raise ValueError(f"No queue entry {index}.")
+        if self.playing_playlist is not None:
+            self.store.remove_tracks_at(self.playing_playlist, [index])
+        else:
+            self._edit_queue({"op": "remove", "indices": [index]})
+
+    def move_in_queue(self, index: int, to: int) -> None:
+        """Move queue entry index to position to."""
+        if not 0 <= index < self.player.queue_len():
+            raise ValueError(f"No queue entry {index}.")
+        if self.playing_playlist is not None:
+            self.store.move_tracks(self.playing_playlist, [index], to)
+        else:
+            self._edit_queue({"op": "move", "indices": [index], "to": to})
+
+    def set_shuffle(self, on: bool) -> None:
+        """Enable/disable shuffle mode."""
+        self.shuffle = on
+        self._prefetch_next()  # The predicted next track changes with the mode
+
+    def set_repeat_one(self, on: bool) -> None:
+        """Enable/disable repeat-one mode."""
+        self.repeat_one = on
+        self._prefetch_next()
+
+    # ---- library edits ----
+    def add_scanned(self, playlist: str, results: Iterable[Tuple[Path, Meta]]) -> int:
+        """Add (path, metadata) scan results to a playlist in one batch. Returns the count added."""
+        items = [(p, display_title(p, meta), meta[2]) for p, meta in results]
+        return self.store.add_tracks(playlist, items)
+
+    def apply_import(
+        self, playlist: str, plan: "ImportPlan", results: Iterable[Tuple[Path, Meta]]
+    ) -> Tuple[int, int, int]:
+        """Commit a folder import (library.plan_import) in one save: refresh changed tracks,
+        drop deleted ones, append new ones. Returns (added, updated, removed).
+        """
+        metas = {str(p): meta for p, meta in results}
+        changed = set(plan.changed)
+        deleted = set(plan.deleted)
+        tracks = self.store.get_tracks(playlist)
+        with self.store.transaction():
+            updated = 0
+            for i, t in enumerate(tracks):
+                meta = metas.get(t.path) if t.path in changed else None
+                if meta is not None:
+                    self.store.update_track_at(playlist, i, title=display_title(Path(t.path), meta), duration=meta[2])
+                    updated += 1
+            removed = self.store.remove_tracks_at(playlist, [i for i, t in enumerate(tracks) if t.path in deleted])
+            added = self.add_scanned(playlist, [(Path(p), metas[p]) for p in plan.new if p in metas])
+        return added, updated, removed
+
+    def free_name(self, base: str) -> str:
+        """base, or "base (2)", "base (3)"… whichever no playlist has yet."""
+        existing = set(self.store.list_playlists())
+        name, n = base, 1
+        while name in existing:
+            n += 1
+            name = f"{base} ({n})"
+        return name
+
+    # A playlist file is imported a chunk at a time into a playlist under a temporary name, each
+    # chunk its own short write (no transaction, and so no store lock, held between chunks), then
+    # renamed into place; a failed import deletes it. The UI runs one step per Tk tick.
+    def begin_import(self, base: str) -> str:
+        """Create the temporary playlist for importing a file named base; returns its name."""
+        temp = self.free_name(f"{base} (importing…)")
+        self.store.create_playlist(temp)
+        return temp
+
+    def import_chunk(self, temp: str, entries: Iterable["Entry"]) -> int:
+        """Append playlist-file entries (playlist_files) to the import's playlist; returns the count added."""
+        return self.store.add_tracks(temp, ((e.path, e.title, e.seconds) for e in entries))
+
+    def finish_import(self, temp: str, base: str) -> str:
+        """Give the imported playlist a free name based on base; returns it."""
+        name = self.free_name(base)
+        self.store.rename_playlist(temp, name)
+        return name
+
+    def abort_import(self, temp: str) -> None:
+        """Drop what a failed import wrote."""
+        if temp in self.store.list_playlists():
+            self.store.delete_playlist(temp)
+
+    def import_entries(self, base: str, entries: Iterable["Entry"]) -> Tuple[str, int]:
+        """Import playlist-file entries as a new playlist the way the app does, without the Tk ticks.
+
+        Returns (playlist name, tracks added); nothing is kept if reading or adding fails.
+        """
+        temp = self.begin_import(base)
+        added = 0
+        entries = iter(entries)
+        try:
+            while True:
+                chunk = list(islice(entries, IMPORT_CHUNK))
+                if not chunk:
+                    break
+                added += self.import_chunk(temp, chunk)
+        except BaseException:
+            self.abort_import(temp)
+            raise
+        return self.finish_import(temp, base), added
+
+    def add_file(self, playlist: str, p: Path) -> None:
+        """Append one file to a playlist, with its tags."""
+        meta = self.meta.get(p)
+        self.store.add_track(playlist, p, title=display_title(p, meta), duration=meta[2])
+
+    # ---- track-end handling ----
+    def next_check_ms(self) -> Optional[int]:
+        """Delay until the UI should call check_end(), or None while stopped/paused.
+
+        We sleep until just before the expected end and then check every
+        END_CHECK_MS, so the next track starts within a few ms of the end event.
+        With crossfading we instead wake up when the overlap should begin.
+        """
+        if self.player.paused or not self.player.active:
+            return None
+        remaining = self.player.seconds_remaining()
+        fade = self.player.crossfade
+        if remaining is None:
+            delay = END_SLOW_CHECK_MS
+        elif fade and remaining > fade:
+            delay = max(END_CHECK_MS, int((remaining - fade) * 1000) + 1)  # Round up: not before the fade point
+        elif remaining * 1000 > END_LEAD_MS:
+            delay = max(END_CHECK_MS, int(remaining * 1000) - END_LEAD_MS)
+        elif remaining > 0:
+            delay = END_CHECK_MS
+        else:
+            # Stored durations are rounded and VBR estimates drift; don't spin if overdue.
+            overdue_ms = -1000 * (self.player.length - self.player.elapsed())
+            delay = END_CHECK_MS if overdue_ms < END_LEAD_MS else END_SLOW_CHECK_MS
+
+        # A freshly started track gets its successor predicted and read ahead.
+        if self.player.prefetched_index is None:
+            self._prefetch_next()
+        return delay
+
+    def check_end(self) -> bool:
+        """Timer callback: advance if the current track ended. True if the track changed."""
+        ended = self.player.take_end_event()
+        if not ended and self.player.active:
+            remaining = self.player.seconds_remaining()
+            lead = self.player.crossfade or END_LEAD_MS / 1000
+            if remaining is not None and remaining <= lead:
+                # Close to the end: let the mixer switch to the next track by itself.
+                self.player.queue_prefetched()
+                # A crossfade starts it right away, which ends the current track now.
+                ended = bool(self.player.crossfade) and self.player.take_end_event()
+        if not ended:
+            return False
+        if self.player.queue_len() > 0 and self.player.queue_index != -1:
+            self.player.advance_to(self._next_index(commit=True))
+        return True
+
+    def _prefetch_next(self) -> None:
+        """Tell the player which queue entry is expected next so it can read it ahead."""
+        if self.player.queue_len() > 0 and self.player.queue_index != -1:
+            self.player.prefetch(self._next_index(commit=False))
+
+    def _next_index(self, commit: bool) -> int | None:
+        """Queue index the current track leads to (None = end of queue).
+
+        With commit=False this only peeks (for prefetching); with commit=True the
+        shuffle engine and history advance as if the track had been played.
+        """
+        idx = self.player.queue_index
+        n = self.player.queue_len()
+        if n == 0 or (idx == -1 and not self._current_removed):
+            return None
+        if commit:
+            # If the playing track was removed, queue_index already points at its successor.
+            removed, self._current_removed = self._current_removed, False
+        else:
+            removed = self._current_removed
+        if self.repeat_one and not removed:
+            return idx
+        if self.shuffle:
+            return self.order.advance() if commit else self.order.peek_next()
+        nxt = idx if removed else idx + 1
+        if nxt >= n:
+            return None
+        if commit:
+            self.order.record(nxt)
+        return nxt
+
+    # ---- store sync ----
+    def _sync_queue(self, op: Dict[str, Any]) -> None:
+        """Keep the player's queue and the shuffle engine in step with the playing playlist."""
+        kind = op["op"]
+        if kind == "rename" and op["old"] == self.playing_playlist:
+            self.playing_playlist = op["new"]
+            return
+        if kind == "delete" and op["name"] == self.playing_playlist:
+            self.playing_playlist = None  # Keep playing the queue we have
+            return
+        if self.playing_playlist is None or op.get("playlist") != self.playing_playlist:
+            return
+        self._edit_queue(op)
+
+    def _edit_queue(self, op: Dict[str, Any]) -> None:
+        """Apply an add/remove/move op (store op shape) to the player's queue and the shuffle engine."""
+        kind = op["op"]
+        if kind == "add":
+            for item in op["items"]:
+                self.player.queue.append(item)
+                self.order.append()
+        elif kind == "remove":
+            for i in reversed(op["indices"]):
+                if self.player.remove_from_queue(i):
+                    self._current_removed = True
+            self.order.remove_many(op["indices"])
+        elif kind == "move":
+            # Reordering is rare: reorder the queue, follow the current track, restart the cycle.
+            current = self.player.current_track()
+            self.player.queue = move_items(self.player.queue, op["indices"], op["to"])
+            ids = [id(t) for t in self.player.queue]
+            if current is not None and not self._current_removed and id(current) in ids:
+                self.player.queue_index = ids.index(id(current))
+            self.order.reset(len(self.player.queue))
+            if self.player.queue_index != -1:
+                self.order.record(self.player.queue_index)
+        else:
+            return  # "update" edits the shared Track objects in place
+        if self.player.active:
+            self._prefetch_next()
+
+    # ---- session ----
+    def session_state(self) -> Optional[Dict[str, Any]]:
+        """JSON-ready state for restore_session() after a restart; None while stopped.
+
+        A playlist queue is saved by name, an ad-hoc one as its entries (up to
+        SESSION_QUEUE_CAP), along with the index, the shuffle cycle and history
+        (ShuffleEngine.snapshot) and the position.
+        """
+        player = self.player
+        if not player.active or player.current_file is None:
+            return None
+        state: Dict[str, Any] = {
+            "path": str(player.current_file),
+            "position": round(player.elapsed(), 1),
+            "paused": player.paused,
+            "volume": player.volume,
+            "shuffle": self.shuffle,
+            "repeat_one": self.repeat_one,
+        }
+        if player.queue_index != -1:
+            if self.playing_playlist is not None:
+                state["playlist"] = self.playing_playlist
+            elif player.queue_len() <= SESSION_QUEUE_CAP:
+                state["queue"] = [t.to_dict() for t in player.queue]
+            else:
+                return state
+            state["index"] = player.queue_index
+            state["order"] = self.order.snapshot()
+        return state
+
+    def restore_session(self, state: Dict[str, Any]) -> bool:
+        """Pick up where a session_state() left off: same queue, shuffle order, track and position.
+
+        Playback resumes, or stays paused, where it was. Returns False (nothing
+        changed) if the track's file is gone. A playlist that was deleted or no
+        longer holds the track is dropped and the track plays on its own; one that
+        changed length starts a fresh shuffle cycle. May raise pygame.error.
+        """
+        path = state.get("path")
+        if not isinstance(path, str) or not Path(path).is_file():
+            return False
+        tracks: List[Track] = []
+        name = state.get("playlist")
+        if isinstance(name, str):
+            tracks = self.store.get_tracks(name)
+        elif isinstance(state.get("queue"), list):
+            tracks = [Track.from_dict(d) for d in state["queue"] if isinstance(d, dict) and "path" in d]
+            name = None
+        index = state.get("index")
+        if not (isinstance(index, int) and 0 <= index < len(tracks) and tracks[index].path == path):
+            index = next((i for i, t in enumerate(tracks) if t.path == path), None)
+        self.shuffle = bool(state.get("shuffle"))
+        self.repeat_one = bool(state.get("repeat_one"))
+        self.player.set_volume(float(state.get("volume", self.player.volume)))
+        self._current_removed = False
+        if index is None:
+            self.player.load_queue([])
+            self.playing_playlist = None
+            self.order.reset(0)
+            self.player.load(path)
+        else:
+            self.player.load_queue(tracks)
+            self.playing_playlist = name
+            self.order.reset(len(tracks))
+            if not self.order.restore(state.get("order")):
+                self.order.record(index)
+            self.player.queue_index = index
+            self.player.load(path, tracks[index].seconds)
+        self.current_file = Path(path)
+        self.player.start_at(float(state.get("position") or 0.0), paused=bool(state.get("paused")))
+        self._prefetch_next()
+        return True
+
+    # ---- display ----
+    def now_playing(self) -> str:
+        """Status line for the current queue entry (or the last loaded file)."""
+        tr = self.player.current_track()
+        if tr:
+            p = Path(tr.path)
+            # Prefer stored title; fall back to metadata or filename
+            title = tr.title or p.stem
+            if META_AVAILABLE and (not tr.title or " – " not in tr.title):
+                _t, _a, _ = self.meta.get(p)
+                if _t and _a:
+                    title = f"{_t} – {_a}"
+            self.current_file = p
+            return f"Now playing: {title}"
+        # No active queue item; show last loaded file or default message
+        if self.current_file:
+            return f"Loaded: {self.current_file.name}"
+        return "No file loaded"
+
+
+def run_simulated(controller: PlayerController, seconds: float) -> int:
+    """Play for seconds of virtual time on a NullBackend, firing check_end() as a UI timer would.
+
+    Returns the number of track changes seen.
+    """
+    backend = controller.player.backend
+    end = backend.clock() + seconds
+    changes = 0
+    while backend.clock() < end:
+        delay = controller.next_check_ms()
+        if delay is None:
+            break  # Stopped or paused: nothing would wake us up
+        backend.advance(min(delay / 1000.0, end - backend.clock()))
+        if controller.check_end():
+            changes += 1
+    return changes
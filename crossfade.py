@@ -0,0 +1,381 @@
+"""Crossfading audio backend: pre-decoded pygame Sounds on two mixer channels.
+
+pygame.mixer.music streams one file at a time, so the best it can do between
+tracks is a gapless switch. CrossfadeBackend plays fully decoded
+pygame.mixer.Sound buffers instead, alternating between two Channels: when
+Player hands it the next track (queue(), called `seconds` before the end) the
+new track starts on the idle channel and the two are faded against each other
+(equal-power curve) by a small fader thread.
+
+Decoding a track takes a noticeable fraction of a second and its buffer is
+large (about 10 MB per minute of 44.1 kHz stereo), so SoundBuffers decodes
+ahead: preload() (Player.prefetch, i.e. the controller's prediction of the
+next track, which already follows shuffle and repeat-one) queues the file for
+a background thread. Buffers are kept in LRU order within a byte budget; the
+playing and predicted tracks are never evicted. Decode latency, hits/misses
+and memory use are reported by stats() (and decode time by perf as
+"crossfade.decode").
+
+A track that was not decoded ahead is never decoded on the caller's (Tk)
+thread: load() and queue() return at once and the decode worker finishes the
+switch when the Sound is ready (_loaded, _queued). Until then the track counts
+as playing, so Player's clock runs from its play() call.
+"""
+
+from __future__ import annotations
+import math
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Dict, Optional, Tuple
+
+import audio
+import perf
+from audio import AudioBackend
+
+CROSSFADE_SECONDS = 6.0              # Default overlap between tracks
+BUFFER_BUDGET = 512 * 1024 * 1024    # Bytes of decoded audio kept (about 50 minutes at 44.1 kHz stereo)
+FADE_STEP = 0.02                     # Seconds between fader volume updates
+
+
+class SoundBuffers:
+    """Decoded Sounds by path: decode-ahead on a worker thread, LRU eviction within a byte budget."""
+
+    def __init__(self, budget: int = BUFFER_BUDGET) -> None:
+        self.budget = budget
+        self._lock = threading.Lock()
+        self._sounds: "OrderedDict[str, Tuple[Any, int]]" = OrderedDict()  # path -> (Sound, bytes); LRU first
+        self._pending: Dict[str, Future] = {}
+        self._pinned: Dict[str, str] = {}   # "current"/"next" role -> path kept regardless of the budget
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="decode-ahead")
+        self.bytes = 0
+        self.hits = 0       # get() found the buffer ready
+        self.waits = 0      # get() waited for a decode that was already running
+        self.misses = 0     # get() had to decode on the spot
+        self.evictions = 0
+        self._decode_ms: list = []  # Recent decode times (ms)
+
+    def prefetch(self, path: str) -> None:
+        """Start decoding path in the background unless it is buffered or on its way."""
+        with self._lock:
+            if path in self._sounds or path in self._pending:
+                return
+            self._pending[path] = self._executor.submit(self._decode, path)
+
+    def fetch(self, path: str) -> Future:
+        """A Future of path's Sound: already done if buffered, else its (possibly new) background decode."""
+        with self._lock:
+            entry = self._sounds.get(path)
+            if entry is not None:
+                self._sounds.move_to_end(path)
+                self.hits += 1
+                done: Future = Future()
+                done.set_result(entry[0])
+                return done
+            future = self._pending.get(path)
+            if future is not None:
+                self.waits += 1
+            else:
+                self.misses += 1
+                future = self._pending[path] = self._executor.submit(self._decode, path)
+            return future
+
+    def get(self, path: str):
+        """The decoded Sound for path, waiting for its decode if it was not decoded ahead. Raises pygame.error."""
+        return self.fetch(path).result()  # The decode's own reference: valid even if already evicted
+
+    def pin(self, role: str, path: Optional[str]) -> None:
+        """Keep path buffered while it has role ("current" or "next"); None releases the role."""
+        with self._lock:
+            if path is None:
+                self._pinned.pop(role, None)
+            else:
+                self._pinned[role] = path
+            self._evict()
+
+    @perf.timed("crossfade.decode")
+    def _decode(self, path: str):
+        """Worker thread: decode path into a Sound, add it to the buffers and return it."""
+        t0 = time.perf_counter()
+        try:
+            sound = audio.pygame.mixer.Sound(path)
+        except BaseException:
+            with self._lock:
+                self._pending.pop(path, None)
+            raise
+        freq, size, channels = audio.pygame.mixer.get_init()
+        nbytes = int(sound.get_length() * freq) * channels * (abs(size) // 8)
+        with self._lock:
+            self._pending.pop(path, None)
+            self._decode_ms = (self._decode_ms + [(time.perf_counter() - t0) * 1000])[-50:]
+            if path not in self._sounds:
+                self.bytes += nbytes
+            self._sounds[path] = (sound, nbytes)
+            self._evict()
+        return sound
+
+    def _evict(self) -> None:
+        """Drop least recently used buffers past the budget, never a pinned one (caller holds the lock)."""
+        pinned = set(self._pinned.values())
+        for path in list(self._sounds):
+            if self.bytes <= self.budget:
+                break
+            if path not in pinned:
+                self.bytes -= self._sounds.pop(path)[1]
+                self.evictions += 1
+
+    def stats(self) -> Dict[str, float]:
+        """Buffer count and memory, budget, lookup counters and recent decode latency (ms)."""
+        with self._lock:
+            recent = self._decode_ms
+            return {
+                "buffers": len(self._sounds),
+                "mb": self.bytes / 2 ** 20,
+                "budget_mb": self.budget / 2 ** 20,
+                "hits": self.hits,
+                "waits": self.waits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "decode_last_ms": recent[-1] if recent else 0.0,
+                "decode_mean_ms": sum(recent) / len(recent) if recent else 0.0,
+                "decode_max_ms": max(recent) if recent else 0.0,
+            }
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        with self._lock:
+            self._sounds.clear()
+            self.bytes = 0
+
+
+class CrossfadeBackend(AudioBackend):
+    """Sounds on two pygame mixer channels, crossfaded over `seconds` when the next track is queued.
+
+    Unlike the music stream, a queued track starts right away (Player queues it
+    `crossfade` seconds before the end) and the switch is reported as a track end
+    at once, so Player adopts the incoming track while the outgoing one fades.
+    """
+
+    def __init__(self, seconds: float = CROSSFADE_SECONDS, budget: int = BUFFER_BUDGET) -> None:
+        audio._import_pygame()
+        audio.pygame.mixer.init()
+        self.crossfade = max(0.1, seconds)
+        self.buffers = SoundBuffers(budget)
+        self._channels = (audio.pygame.mixer.Channel(0), audio.pygame.mixer.Channel(1))
+        self._lock = threading.RLock()  # Shared with the fader thread
+        self._current = 0                # Index of the channel carrying the current track
+        self._sound = None               # Current track's Sound
+        self._path: Optional[str] = None
+        self._loading: Optional[Future] = None   # Decode of the loaded track, still running
+        self._start = 0.0                        # Where play() asked the loading track to start
+        self._queuing: Optional[Future] = None   # Decode of a queued track, still running
+        self._volume = 1.0
+        self._playing = False            # Started and not stopped (for end detection)
+        self._paused = False
+        self._ends = 0                   # Pending end notifications
+        self._fade_start: Optional[float] = None  # clock() when the running fade began
+        self._fade_from = 1.0            # Outgoing track's volume when its fade began
+        self._fader: Optional[threading.Thread] = None
+
+    def clock(self) -> float:
+        return time.monotonic()
+
+    # ---- AudioBackend ----
+    def load(self, path: str, length: Optional[float] = None) -> None:
+        """Load path; if it was not decoded ahead, the decode worker finishes the load (_loaded)."""
+        with self._lock:
+            self._halt()
+            self._path = path
+            self.buffers.pin("current", path)
+            future = self.buffers.fetch(path)
+            if future.done():
+                self._sound = future.result()  # Raises pygame.error for a file already known not to decode
+                self._loading = None
+                return
+            self._sound = None
+            self._loading = future
+            future.add_done_callback(self._loaded)
+
+    def length(self) -> Optional[float]:
+        with self._lock:
+            return self._sound.get_length() if self._sound is not None else None
+
+    def play(self, start: float = 0.0) -> None:
+        with self._lock:
+            if self._loading is not None:
+                self._halt()
+                self._start = start
+                self._playing = True  # Started by _loaded once decoded
+                return
+            if self._sound is None:
+                return
+            self._halt()
+            self._start_channel(start)
+
+    def _start_channel(self, start: float) -> None:
+        """Play the current Sound from start seconds on the current channel (caller holds the lock)."""
+        sound = self._sound
+        if start > 0:
+            # Sounds always start at their beginning: play a copy of the tail instead.
+            freq, size, channels = audio.pygame.mixer.get_init()
+            frame = channels * (abs(size) // 8)
+            sound = audio.pygame.mixer.Sound(buffer=sound.get_raw()[int(start * freq) * frame:])
+        channel = self._channels[self._current]
+        channel.set_volume(self._volume)
+        channel.play(sound)
+        self._playing = True
+        self._paused = False
+
+    def pause(self) -> None:
+        with self._lock:
+            self._finish_fade()  # Pausing mid-fade completes it
+            self._channels[self._current].pause()
+            self._paused = True
+
+    def unpause(self) -> None:
+        with self._lock:
+            self._channels[self._current].unpause()
+            self._paused = False
+
+    def stop(self) -> None:
+        with self._lock:
+            self._halt()
+
+    def set_volume(self, volume: float) -> None:
+        with self._lock:
+            self._volume = volume
+            if self._fade_start is None:
+                self._channels[self._current].set_volume(volume)
+            # Mid-fade the fader applies it on its next step.
+
+    def get_busy(self) -> bool:
+        with self._lock:
+            return self._playing and (self._paused or self._loading is not None
+                                      or self._channels[self._current].get_busy())
+
+    def queue(self, path: str, length: Optional[float] = None) -> bool:
+        """Start path on the other channel now and fade between the two.
+
+        If path was not decoded ahead, the fade starts (and the end is reported)
+        when the decode worker has it (_queued).
+        """
+        with self._lock:
+            if not self._playing or self._paused:
+                return False
+            future = self.buffers.fetch(path)
+            if not future.done():
+                self._queuing = future
+                future.add_done_callback(lambda f: self._queued(f, path))
+                return True
+            try:
+                sound = future.result()
+            except audio.pygame.error:
+                return False
+            self._fade_to(sound, path)
+        return True
+
+    def _fade_to(self, sound, path: str) -> None:
+        """Start sound on the idle channel and fade the current one out (caller holds the lock)."""
+        self._finish_fade()
+        outgoing = self._channels[self._current]
+        self._current = 1 - self._current
+        incoming = self._channels[self._current]
+        incoming.set_volume(0.0)
+        incoming.play(sound)
+        self._sound, self._path = sound, path
+        self.buffers.pin("current", path)
+        self._fade_from = outgoing.get_volume()
+        self._fade_start = self.clock()
+        self._ends += 1  # The outgoing track is over as far as Player is concerned
+        if self._fader is None or not self._fader.is_alive():
+            self._fader = threading.Thread(target=self._fade, daemon=True, name="crossfade")
+            self._fader.start()
+
+    def _loaded(self, future: Future) -> None:
+        """Decode worker: the loaded track's Sound is ready; start it if play() asked for it meanwhile."""
+        with self._lock:
+            if future is not self._loading:
+                return  # Another load() replaced it
+            self._loading = None
+            if future.cancelled() or future.exception() is not None:
+                if self._playing:
+                    self._playing = False
+                    self._ends += 1  # An undecodable track ends at once
+                return
+            self._sound = future.result()
+            if self._playing:
+                paused = self._paused
+                self._start_channel(self._start)
+                if paused:
+                    self._channels[self._current].pause()
+                    self._paused = True
+
+    def _queued(self, future: Future, path: str) -> None:
+        """Decode worker: a queued track's Sound is ready; fade to it unless playback moved on."""
+        with self._lock:
+            if future is not self._queuing:
+                return
+            self._queuing = None
+            if future.cancelled() or future.exception() is not None:
+                return  # Unreadable: the current track plays out and Player loads the next one
+            if self._playing and not self._paused and self._loading is None:
+                self._fade_to(future.result(), path)
+
+    def take_end(self) -> bool:
+        with self._lock:
+            if (self._playing and not self._paused and self._loading is None
+                    and not self._channels[self._current].get_busy()):
+                self._playing = False  # Played out with nothing queued
+                self._ends += 1
+            ended, self._ends = self._ends > 0, 0
+            return ended
+
+    def discard_end(self) -> None:
+        with self._lock:
+            self._ends = 0
+
+    def preload(self, path: str) -> None:
+        self.buffers.pin("next", path)
+        self.buffers.prefetch(path)
+
+    # ---- fading ----
+    def _fade(self) -> None:
+        """Fader thread: move both channels along an equal-power curve until the fade is done."""
+        while True:
+            with self._lock:
+                if self._fade_start is None:
+                    return
+                t = (self.clock() - self._fade_start) / self.crossfade
+                if t >= 1.0:
+                    self._finish_fade()
+                    return
+                self._channels[self._current].set_volume(self._volume * math.sin(t * math.pi / 2))
+                self._channels[1 - self._current].set_volume(self._fade_from * math.cos(t * math.pi / 2))
+            time.sleep(FADE_STEP)
+
+    def _finish_fade(self) -> None:
+        """End a running fade: outgoing channel stopped, incoming at full volume (caller holds the lock)."""
+        if self._fade_start is None:
+            return
+        self._fade_start = None
+        self._channels[1 - self._current].stop()
+        self._channels[self._current].set_volume(self._volume)
+
+    def _halt(self) -> None:
+        """Stop both channels, any fade and any queued decode's fade (caller holds the lock)."""
+        self._fade_start = None
+        self._queuing = None
+        for channel in self._channels:
+            channel.stop()
+        self._playing = False
+        self._paused = False
+
+    def stats(self) -> Dict[str, float]:
+        """SoundBuffers.stats() plus the crossfade length."""
+        return dict(self.buffers.stats(), crossfade_s=self.crossfade)
+
+    def close(self) -> None:
+        """Stop playback and release the decoded buffers."""
+        self.stop()
+        self.buffers.close()
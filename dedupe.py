@@ -0,0 +1,247 @@
+"""Duplicate detection within playlists: same file (normalized path) or same content.
+
+Content fingerprints are computed lazily and in stages, so most files are never
+read:
+1. size (one stat per file): a file with a unique size has no duplicate
+2. hash of sampled blocks (start, middle, end) for files whose sizes collide
+3. full-content hash only for files whose sampled hashes also collide
+Hashing runs on a thread pool (file reads and hashlib release the GIL) and the
+results are cached in a sidecar SQLite file keyed by (path, size, mtime_ns),
+like MetadataCache, so a second scan of an unchanged library reads nothing.
+
+find_duplicates() reports groups per playlist; remove_duplicates() drops every
+entry but the first of each group in one store transaction (one save).
+"""
+
+from __future__ import annotations
+import hashlib
+import os
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+import perf
+from playlist_store import PlaylistStore
+from track import Track
+
+SAMPLE_BYTES = 64 * 1024   # Size of each sampled block
+SAMPLES = 3                # Blocks sampled: start, middle, end
+CHUNK_BYTES = 1024 * 1024  # Read size for full hashes
+
+
+class DuplicateGroup(NamedTuple):
+    """Entries of one playlist that are the same track; the first one is kept."""
+
+    playlist: str
+    reason: str              # "same file" or "same content"
+    indices: List[int]       # Positions at scan time, ascending
+    tracks: List[Track]
+
+    @property
+    def extra(self) -> int:
+        """Entries that removal would drop."""
+        return len(self.tracks) - 1
+
+
+def normalize_path(path: str) -> str:
+    """Path key that treats "a/./b.mp3", "a/b.mp3" and (on Windows) "A\\B.MP3" as one file."""
+    return os.path.normcase(os.path.normpath(path))
+
+
+def sample_hash(path: str, size: int) -> str:
+    """Hash of size and SAMPLES evenly spread blocks (the whole file if it is small)."""
+    h = hashlib.blake2b(size.to_bytes(8, "little"), digest_size=16)
+    with open(path, "rb") as f:
+        if size <= SAMPLE_BYTES * SAMPLES:
+            h.update(f.read())
+        else:
+            for k in range(SAMPLES):
+                f.seek((size - SAMPLE_BYTES) * k // (SAMPLES - 1))
+                h.update(f.read(SAMPLE_BYTES))
+    return h.hexdigest()
+
+
+def full_hash(path: str) -> str:
+    """Hash of the whole file."""
+    h = hashlib.blake2b(digest_size=32)
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK_BYTES), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+class FingerprintCache:
+    """Sampled and full hashes per (path, size, mtime_ns), in memory and in SQLite. Thread-safe."""
+
+    def __init__(self, db_path: Path | str = "fingerprints.sqlite") -> None:
+        self.db_path = Path(db_path)
+        self._lock = threading.Lock()
+        self._mem: Dict[Tuple[str, str], Tuple[int, int, str]] = {}  # (path, kind) -> (size, mtime_ns, digest)
+        self.hits = 0
+        self.misses = 0
+        self._db: Optional[sqlite3.Connection] = self._open_db()
+
+    def _open_db(self) -> Optional[sqlite3.Connection]:
+        """Open (or create) the sidecar database; run memory-only if that fails."""
+        try:
+            db = sqlite3.connect(str(self.db_path), check_same_thread=False)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS fingerprints ("
+                " path TEXT NOT NULL, kind TEXT NOT NULL, size INTEGER NOT NULL, mtime_ns INTEGER NOT NULL,"
+                " digest TEXT NOT NULL, PRIMARY KEY (path, kind))"
+            )
+            db.commit()
+            return db
+        except sqlite3.Error:
+            return None
+
+    def get(self, path: str, kind: str, size: int, mtime_ns: int) -> str:
+        """kind "sample" or "full" digest of path, computed only if not cached for this size/mtime."""
+        key = (path, kind)
+        with self._lock:
+            entry = self._mem.get(key)
+            if entry is None and self._db is not None:
+                try:
+                    entry = self._db.execute(
+                        "SELECT size, mtime_ns, digest FROM fingerprints WHERE path = ? AND kind = ?", key
+                    ).fetchone()
+                except sqlite3.Error:
+                    entry = None
+            if entry is not None and entry[0] == size and entry[1] == mtime_ns:
+                self._mem[key] = entry
+                self.hits += 1
+                return entry[2]
+        digest = sample_hash(path, size) if kind == "sample" else full_hash(path)
+        with self._lock:
+            self.misses += 1
+            self._mem[key] = (size, mtime_ns, digest)
+            if self._db is not None:
+                try:
+                    self._db.execute(
+                        "INSERT OR REPLACE INTO fingerprints (path, kind, size, mtime_ns, digest) VALUES (?, ?, ?, ?, ?)",
+                        (path, kind, size, mtime_ns, digest),
+                    )
+                    self._db.commit()
+                except sqlite3.Error:
+                    pass
+        return digest
+
+    def last_known(self, path: str) -> Optional[Tuple[int, Optional[str]]]:
+        """(size, sampled digest or None) recorded for path, even if the file has since moved away."""
+        with self._lock:
+            entry = self._mem.get((path, "sample"))
+            if entry is not None:
+                return entry[0], entry[2]
+            if self._db is None:
+                return None
+            try:
+                rows = self._db.execute("SELECT kind, size, digest FROM fingerprints WHERE path = ?", (path,)).fetchall()
+            except sqlite3.Error:
+                return None
+        if not rows:
+            return None
+        digests = {kind: (size, digest) for kind, size, digest in rows}
+        size = next(iter(digests.values()))[0]
+        return size, digests["sample"][1] if "sample" in digests else None
+
+    def close(self) -> None:
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+
+def _stat(path: str) -> Optional[Tuple[int, int]]:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_size, st.st_mtime_ns
+
+
+@perf.timed("dedupe.fingerprint")
+def content_keys(paths: Iterable[str], cache: FingerprintCache, workers: int | None = None) -> Dict[str, str]:
+    """Map each path that has a byte-identical twin among paths to a shared content key.
+
+    Paths with no twin (or that can't be read) are left out.
+    """
+    paths = list(dict.fromkeys(paths))
+    workers = workers or min(16, (os.cpu_count() or 2) * 2)
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="dedupe") as pool:
+        stats = dict(zip(paths, pool.map(_stat, paths)))
+        by_size: Dict[int, List[str]] = {}
+        for p, st in stats.items():
+            if st is not None:
+                by_size.setdefault(st[0], []).append(p)
+
+        def digests(kind: str, group: List[str]) -> Dict[str, List[str]]:
+            """Bucket paths by their kind digest (unreadable files are dropped)."""
+            def one(p: str) -> Optional[str]:
+                try:
+                    return cache.get(p, kind, *stats[p])
+                except OSError:
+                    return None
+            buckets: Dict[str, List[str]] = {}
+            for p, d in zip(group, pool.map(one, group)):
+                if d is not None:
+                    buckets.setdefault(d, []).append(p)
+            return buckets
+
+        colliding = [p for group in by_size.values() if len(group) > 1 for p in group]
+        keys: Dict[str, str] = {}
+        sampled = [g for g in digests("sample", colliding).values() if len(g) > 1]
+        for digest, group in digests("full", [p for g in sampled for p in g]).items():
+            if len(group) > 1:
+                for p in group:
+                    keys[p] = digest
+    return keys
+
+
+def find_duplicates(
+    playlists: Dict[str, List[Track]],
+    cache: Optional[FingerprintCache] = None,
+    workers: int | None = None,
+) -> List[DuplicateGroup]:
+    """Duplicate groups within each playlist (by normalized path, then by content if cache is given).
+
+    playlists maps names to track lists (e.g. store.get_tracks() copies taken on the UI thread),
+    so this can run on a worker thread.
+    """
+    keys: Dict[str, str] = {}
+    if cache is not None:
+        files = {normalize_path(t.path) for tracks in playlists.values() for t in tracks}
+        keys = content_keys(files, cache, workers)
+
+    groups: List[DuplicateGroup] = []
+    for name, tracks in playlists.items():
+        buckets: Dict[str, List[int]] = {}
+        for i, t in enumerate(tracks):
+            norm = normalize_path(t.path)
+            buckets.setdefault(keys.get(norm, "path:" + norm), []).append(i)
+        for key, indices in buckets.items():
+            if len(indices) > 1:
+                same_path = len({normalize_path(tracks[i].path) for i in indices}) == 1
+                reason = "same file" if same_path else "same content"
+                groups.append(DuplicateGroup(name, reason, indices, [tracks[i] for i in indices]))
+    groups.sort(key=lambda g: (g.playlist, g.indices[0]))
+    return groups
+
+
+def remove_duplicates(store: PlaylistStore, groups: Iterable[DuplicateGroup]) -> int:
+    """Remove all but the first entry of each group, in one save. Returns the number removed.
+
+    Entries are matched by identity, so edits made since the scan don't shift what is removed.
+    """
+    drop: Dict[str, set] = {}
+    for g in groups:
+        drop.setdefault(g.playlist, set()).update(id(t) for t in g.tracks[1:])
+    removed = 0
+    with store.transaction():
+        for name, ids in drop.items():
+            indices = [i for i, t in enumerate(store.get_tracks(name)) if id(t) in ids]
+            removed += store.remove_tracks_at(name, indices)
+    return removed
@@ -0,0 +1,238 @@
+"""Recursive folder import, kept incremental by a (playlist, path, size, mtime) index.
+
+walk_audio() lists every audio file under a folder with os.scandir (one stat
+per file, no per-file Path objects). LibraryIndex remembers the size and mtime
+each file had when it was last imported into each playlist (sidecar SQLite,
+next to the metadata cache), so plan_import() can tell a re-import what
+actually changed for that playlist, even if the same folder was re-imported
+into another one in between:
+- new: on disk but not in the playlist yet -> tags read, track added
+- changed: in the playlist, but size or mtime differ from the index -> tags re-read, track updated
+- deleted: in the playlist under the folder but gone from disk -> track removed
+Unchanged files are never opened, so rescanning an unchanged tree costs one
+directory walk plus one range query on the index.
+"""
+
+from __future__ import annotations
+import os
+import sqlite3
+import threading
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+import perf
+
+if TYPE_CHECKING:
+    from controller import PlayerController
+
+AUDIO_EXTENSIONS = frozenset({".mp3"})  # What Player and read_metadata() handle
+
+FileStat = Tuple[int, int]  # (size, mtime_ns)
+
+
+class ImportPlan(NamedTuple):
+    """What a folder import will do to one playlist (paths are absolute strings)."""
+
+    new: List[str]                # Files to read and add, sorted
+    changed: List[str]            # Playlist tracks whose file changed since the last import
+    deleted: List[str]            # Playlist tracks under the folders whose file is gone
+    record: Dict[str, FileStat]   # Index rows to (re)write once the plan is applied
+    gone: List[str]               # Index rows to drop (file no longer on disk)
+    playlist: str                 # Whose index rows record and gone are
+
+    @property
+    def to_read(self) -> List[str]:
+        """Files whose tags must be read: new ones, then changed ones."""
+        return self.new + self.changed
+
+
+@perf.timed("library.walk")
+def walk_audio(root: Path | str, extensions: frozenset = AUDIO_EXTENSIONS) -> Dict[str, FileStat]:
+    """Every audio file under root (recursively) -> (size, mtime_ns).
+
+    Symlinked folders are not followed (no cycles); unreadable folders and files are skipped.
+    """
+    found: Dict[str, FileStat] = {}
+    stack = [os.fspath(root)]
+    while stack:
+        try:
+            it = os.scandir(stack.pop())
+        except OSError:
+            continue
+        with it:
+            for entry in it:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                    elif os.path.splitext(entry.name)[1].lower() in extensions and entry.is_file():
+                        st = entry.stat()
+                        found[entry.path] = (st.st_size, st.st_mtime_ns)
+                except OSError:
+                    continue
+    return found
+
+
+class LibraryIndex:
+    """(size, mtime_ns) of every imported file as of its last import into each playlist, in SQLite.
+
+    Safe to call from worker threads (plan_import() normally runs off the Tk thread).
+    Subscribe apply() to the store so the rows follow playlist renames and deletes.
+    """
+
+    def __init__(self, db_path: Path | str = "library_index.sqlite") -> None:
+        self.db_path = Path(db_path)
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = self._open_db()
+
+    def _open_db(self) -> Optional[sqlite3.Connection]:
+        """Open (or create) the index; without it every import reads all tags again."""
+        try:
+            db = sqlite3.connect(str(self.db_path), check_same_thread=False)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            db.execute("DROP TABLE IF EXISTS files")  # Old global index: re-imports adopt the files again
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                " playlist TEXT NOT NULL, path TEXT NOT NULL, size INTEGER NOT NULL, mtime_ns INTEGER NOT NULL,"
+                " PRIMARY KEY (playlist, path))"
+            )
+            db.execute("CREATE INDEX IF NOT EXISTS entries_path ON entries (path)")
+            db.commit()
+            return db
+        except sqlite3.Error:
+            return None
+
+    def under(self, playlist: str, root: str) -> Dict[str, FileStat]:
+        """Files below the folder root indexed for playlist (a range scan on the primary key)."""
+        prefix = os.path.join(root, "")
+        upper = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+        with self._lock:
+            if self._db is None:
+                return {}
+            try:
+                rows = self._db.execute(
+                    "SELECT path, size, mtime_ns FROM entries WHERE playlist = ? AND path >= ? AND path < ?",
+                    (playlist, prefix, upper),
+                ).fetchall()
+            except sqlite3.Error:
+                return {}
+        return {path: (size, mtime_ns) for path, size, mtime_ns in rows}
+
+    def get(self, path: str) -> Optional[FileStat]:
+        """(size, mtime_ns) recorded for path at its last import into any playlist, or None."""
+        with self._lock:
+            if self._db is None:
+                return None
+            try:
+                row = self._db.execute(
+                    "SELECT size, mtime_ns FROM entries WHERE path = ? LIMIT 1", (path,)
+                ).fetchone()
+            except sqlite3.Error:
+                return None
+        return (row[0], row[1]) if row else None
+
+    def commit(self, plan: ImportPlan) -> None:
+        """Store the plan's file states in one transaction (call after the playlist was updated)."""
+        with self._lock:
+            if self._db is None or not (plan.record or plan.gone):
+                return
+            try:
+                with self._db:
+                    self._db.executemany(
+                        "INSERT OR REPLACE INTO entries (playlist, path, size, mtime_ns) VALUES (?, ?, ?, ?)",
+                        ((plan.playlist, path, size, mtime_ns) for path, (size, mtime_ns) in plan.record.items()),
+                    )
+                    self._db.executemany(
+                        "DELETE FROM entries WHERE playlist = ? AND path = ?", ((plan.playlist, p) for p in plan.gone)
+                    )
+            except sqlite3.Error:
+                pass
+
+    def apply(self, op: Dict[str, Any]) -> None:
+        """Store listener: a renamed playlist keeps its rows, a deleted one loses them."""
+        kind = op["op"]
+        if kind == "rename":
+            sql, args = "UPDATE OR REPLACE entries SET playlist = ? WHERE playlist = ?", (op["new"], op["old"])
+        elif kind == "delete":
+            sql, args = "DELETE FROM entries WHERE playlist = ?", (op["name"],)
+        else:
+            return
+        with self._lock:
+            if self._db is None:
+                return
+            try:
+                with self._db:
+                    self._db.execute(sql, args)
+            except sqlite3.Error:
+                pass
+
+    def close(self) -> None:
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+
+@perf.timed("library.plan")
+def plan_import(
+    roots: Sequence[Path | str],
+    playlist: str,
+    playlist_paths: Iterable[str],
+    index: LibraryIndex,
+    files: Sequence[Path | str] = (),
+) -> ImportPlan:
+    """Compare the folders on disk with playlist's tracks (playlist_paths) and its index rows.
+
+    files are single files dropped alongside the folders; they are added if missing.
+
+    Raises ValueError if a folder does not exist (so an unmounted drive is not
+    mistaken for a library whose files were all deleted).
+    """
+    in_playlist = set(playlist_paths)
+    new: Dict[str, None] = {}  # Ordered set: overlapping roots may list a file twice
+    changed: Dict[str, None] = {}
+    deleted: Dict[str, None] = {}
+    record: Dict[str, FileStat] = {}
+    gone: List[str] = []
+    for root in roots:
+        root = os.path.abspath(root)
+        if not os.path.isdir(root):
+            raise ValueError(f"Folder not found: {root}")
+        found = walk_audio(root)
+        known = index.under(playlist, root)
+        for path, st in found.items():
+            if path not in in_playlist:
+                new[path] = None
+                record[path] = st
+            elif known.get(path) != st:
+                if path in known:
+                    changed[path] = None
+                record[path] = st  # Also adopts tracks that were added by drag-and-drop
+        prefix = os.path.join(root, "")
+        for path in in_playlist:
+            if path.startswith(prefix) and path not in found:
+                deleted[path] = None
+        gone.extend(p for p in known if p not in found)
+    for f in files:
+        path = os.path.abspath(f)
+        if path not in in_playlist and path not in new:
+            new[path] = None
+    return ImportPlan(sorted(new), list(changed), list(deleted), record, gone, playlist)
+
+
+def import_folders(
+    controller: "PlayerController",
+    index: LibraryIndex,
+    playlist: str,
+    roots: Sequence[Path | str],
+) -> Tuple[int, int, int]:
+    """Synchronous import (scripts, benchmarks): plan, read tags, apply, update the index.
+
+    Returns (added, updated, removed). The Tk app runs the same steps with the walk
+    on a worker thread and the tag reads on MetadataScanner.
+    """
+    plan = plan_import(roots, playlist, (t.path for t in controller.store.get_tracks(playlist)), index)
+    results = [(Path(p), controller.meta.get(p)) for p in plan.to_read]
+    counts = controller.apply_import(playlist, plan, results)
+    index.commit(plan)
+    return counts
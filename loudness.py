@@ -0,0 +1,281 @@
+"""Loudness analysis (ITU-R BS.1770 integrated loudness and sample peak) for volume normalization.
+
+Tracks are decoded to 16-bit PCM by pygame (mixer.Sound) in worker processes:
+decoding and the maths are CPU-bound, so a process pool scales with cores
+where threads would serialize on the GIL. Each worker measures its track in
+100 ms blocks with vectorized NumPy: the K-weighting filter is applied in the
+frequency domain (block spectrum times the filter's magnitude response, so no
+sample-by-sample IIR loop), block energies are combined into the standard
+400 ms gating blocks, and the absolute (-70 LUFS) and relative (-10 LU) gates
+give the integrated loudness.
+
+Results go to the metadata cache (MetadataCache.put_loudness), keyed like the
+tags by (path, size, mtime_ns) and written as each track finishes, so an
+interrupted batch resumes where it stopped: LoudnessScanner skips tracks
+that already have a valid entry. At play time Player scales its volume by
+track_gain() of the stored measurement.
+
+NumPy is optional (pip install numpy); without it LOUDNESS_AVAILABLE is False
+and playback is simply not normalized.
+"""
+
+from __future__ import annotations
+import importlib.util
+import math
+import os
+import queue
+import threading
+from concurrent.futures import FIRST_COMPLETED, Future, wait
+from typing import Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from audio import PYGAME_AVAILABLE
+from metadata import MetadataCache
+
+NUMPY_AVAILABLE = importlib.util.find_spec("numpy") is not None  # pip install numpy
+LOUDNESS_AVAILABLE = NUMPY_AVAILABLE and PYGAME_AVAILABLE
+np = None  # numpy, imported on first use (it is slow to import; the Tk process rarely needs it)
+
+TARGET_LUFS = -18.0      # Normalize to this loudness (the ReplayGain 2 reference level)
+ANALYSIS_RATE = 44_100   # Decode rate in the workers
+BLOCK_SECONDS = 0.1      # Energy is measured per 100 ms; four of them make a gating block
+SPAN_BLOCKS = 600        # Blocks transformed per NumPy batch (one minute of audio)
+IN_FLIGHT = 4            # Tracks queued per worker process (bounds memory and cancel latency)
+DRAIN_MS = 100           # How often the Tk loop picks up progress
+
+ProgressFn = Callable[[int, int], None]  # (done, total)
+DoneFn = Callable[[int, bool, Optional[Exception]], None]  # (analyzed, cancelled, why the batch failed)
+
+
+class Loudness(NamedTuple):
+    """Measurement of one track."""
+
+    lufs: float   # Integrated loudness
+    peak: float   # Sample peak, 1.0 = full scale
+
+
+def track_gain(loudness: Optional[Tuple[float, float]], target: float = TARGET_LUFS) -> float:
+    """Volume factor in (0, 1] that brings a track measured at (lufs, peak) to target without clipping.
+
+    pygame can only attenuate, so quieter-than-target tracks play at full volume (1.0),
+    as do tracks that were never measured (None).
+    """
+    if loudness is None:
+        return 1.0
+    lufs, peak = loudness
+    gain_db = target - lufs
+    if peak > 0:
+        gain_db = min(gain_db, -20 * math.log10(peak))
+    return min(1.0, 10 ** (gain_db / 20))
+
+
+# ---- measurement (NumPy) ----
+def _import_numpy() -> None:
+    global np
+    if np is None:
+        import numpy
+        np = numpy
+
+
+def _biquad_power(b, a, w):
+    """|H|^2 of a biquad at angular frequencies w (radians per sample)."""
+    z = np.exp(-1j * w)
+    h = (b[0] + b[1] * z + b[2] * z * z) / (a[0] + a[1] * z + a[2] * z * z)
+    return np.abs(h) ** 2
+
+
+def _k_weighting(freqs, rate: int):
+    """Power response of the BS.1770 K-weighting filter (high shelf + high pass) at freqs (Hz).
+
+    The two biquads are designed for rate as in the standard's 48 kHz reference.
+    """
+    w = 2 * np.pi * np.asarray(freqs) / rate
+    # Stage 1: +4 dB high shelf around 1.68 kHz (head acoustics)
+    k = math.tan(math.pi * 1681.974450955533 / rate)
+    vh, vb, q = 10 ** (3.999843853973347 / 20), 10 ** (3.999843853973347 / 40), 0.7071752369554196
+    a0 = 1 + k / q + k * k
+    shelf = _biquad_power(
+        (vh + vb * k / q + k * k, 2 * (k * k - vh), vh - vb * k / q + k * k),
+        (a0, 2 * (k * k - 1), 1 - k / q + k * k),
+        w,
+    )
+    # Stage 2: high pass at 38 Hz (RLB weighting)
+    k = math.tan(math.pi * 38.13547087602444 / rate)
+    q = 0.5003270373238773
+    a0 = 1 + k / q + k * k
+    highpass = _biquad_power((1, -2, 1), (a0, 2 * (k * k - 1), 1 - k / q + k * k), w)
+    return shelf * highpass
+
+
+def _block_energies(pcm, rate: int):
+    """K-weighted mean square of each 100 ms block, summed over channels.
+
+    pcm is an int16 array of shape (frames, channels). Blocks are transformed
+    SPAN_BLOCKS at a time; by Parseval, weighting each block's spectrum gives
+    the energy the filtered block would have.
+    """
+    size = int(rate * BLOCK_SECONDS)
+    count = len(pcm) // size
+    bins = np.fft.rfftfreq(size, 1 / rate)
+    weight = _k_weighting(bins, rate)
+    weight[1:-1 if size % 2 == 0 else None] *= 2  # rfft keeps one side of the spectrum
+    weight /= size * size * 32768.0 ** 2          # Mean square of full-scale samples
+    energies = np.empty(count)
+    for start in range(0, count, SPAN_BLOCKS):
+        stop = min(count, start + SPAN_BLOCKS)
+        blocks = pcm[start * size:stop * size].reshape(stop - start, size, -1).astype(np.float32)
+        power = np.abs(np.fft.rfft(blocks, axis=1)) ** 2     # (blocks, bins, channels)
+        energies[start:stop] = np.einsum("bfc,f->b", power, weight)
+    return energies
+
+
+def _integrated(energies) -> Optional[float]:
+    """Gated loudness (LUFS) from 100 ms block energies; None if everything is below the gate."""
+    if len(energies) < 4:
+        return None
+    # 400 ms gating blocks with 75% overlap: means of four consecutive 100 ms blocks.
+    sums = np.cumsum(np.concatenate(([0.0], energies)))
+    gating = (sums[4:] - sums[:-4]) / 4
+    with np.errstate(divide="ignore"):
+        levels = -0.691 + 10 * np.log10(gating)
+    kept = gating[levels > -70.0]
+    if not len(kept):
+        return None
+    relative = -0.691 + 10 * math.log10(kept.mean()) - 10.0
+    kept = gating[levels > max(-70.0, relative)]
+    return -0.691 + 10 * math.log10(kept.mean())
+
+
+def measure(pcm, rate: int) -> Optional[Loudness]:
+    """Loudness of int16 PCM (a NumPy array of shape (frames, channels)); None for silence or very short clips."""
+    _import_numpy()
+    lufs = _integrated(_block_energies(pcm, rate))
+    if lufs is None:
+        return None
+    peak = max(int(pcm.max()), -int(pcm.min())) / 32768.0  # No abs(): it would overflow at -32768
+    return Loudness(lufs, peak)
+
+
+# ---- worker processes ----
+def _init_worker() -> None:
+    """Process pool initializer: open a device-less mixer for decoding only."""
+    os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+    _import_numpy()
+    import pygame
+    pygame.mixer.init(frequency=ANALYSIS_RATE, size=-16, channels=2)
+
+
+def analyze_file(path: str) -> Optional[Loudness]:
+    """Decode path and measure it (runs in a worker process). None if undecodable or silent."""
+    import pygame  # Already imported by _init_worker
+    try:
+        raw = pygame.mixer.Sound(path).get_raw()
+    except (pygame.error, OSError):
+        return None
+    rate, _size, channels = pygame.mixer.get_init()
+    return measure(np.frombuffer(raw, dtype=np.int16).reshape(-1, channels), rate)
+
+
+class LoudnessScanner:
+    """Analyzes many files on a process pool, off the Tk thread; one batch at a time.
+
+    Mirrors MetadataScanner: callbacks run on the Tk thread via after(). Each result
+    is stored in the cache as it arrives, so cancel() (or quitting) loses at most the
+    tracks in flight.
+    """
+
+    def __init__(self, root, cache: MetadataCache, workers: int | None = None) -> None:
+        self.root = root  # any Tk widget; used only for after()
+        self.cache = cache
+        self.workers = workers or max(1, (os.cpu_count() or 2) - 1)  # Leave a core for playback
+        self._cancel = threading.Event()
+        self._progress: "queue.Queue[Tuple[int, int]]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._on_progress: Optional[ProgressFn] = None
+        self._on_done: Optional[DoneFn] = None
+        self._error: Optional[Exception] = None  # What stopped the last batch early, if anything
+
+    @property
+    def busy(self) -> bool:
+        """True while a batch is in flight."""
+        return self._thread is not None
+
+    def start(self, paths: Sequence[str], on_progress: ProgressFn, on_done: DoneFn) -> None:
+        """Analyze the paths that have no valid cached loudness; callbacks run on the Tk thread."""
+        if self.busy:
+            raise RuntimeError("An analysis is already running.")
+        self._cancel.clear()
+        self._error = None
+        self._progress = queue.Queue()
+        self._on_progress = on_progress
+        self._on_done = on_done
+        self._thread = threading.Thread(target=self._run, args=(list(paths),), daemon=True, name="loudness")
+        self._thread.start()
+        self.root.after(DRAIN_MS, self._drain)
+
+    def cancel(self) -> None:
+        """Stop after the tracks in flight (their results are still stored)."""
+        self._cancel.set()
+
+    def _run(self, paths: List[str]) -> None:
+        """Background thread: feed the pool a few tracks per worker at a time, store each result."""
+        # Imported here, not at the top: together they cost `import main` about 20 ms
+        import multiprocessing
+        from concurrent.futures import ProcessPoolExecutor
+
+        analyzed = 0
+        try:
+            todo = self.cache.without_loudness(dict.fromkeys(paths))
+            total = len(todo)
+            self._progress.put((0, total))
+            if not todo:
+                return
+            # spawn, not fork: a forked child would inherit the app's open mixer and Tk state.
+            context = multiprocessing.get_context("spawn")
+            with ProcessPoolExecutor(self.workers, mp_context=context, initializer=_init_worker) as pool:
+                pending: Dict[Future, Tuple[str, int, int]] = {}
+                it = iter(todo)
+                while True:
+                    while not self._cancel.is_set() and len(pending) < self.workers * IN_FLIGHT:
+                        item = next(it, None)
+                        if item is None:
+                            break
+                        pending[pool.submit(analyze_file, item[0])] = item
+                    if not pending:
+                        break
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        path, size, mtime_ns = pending.pop(future)
+                        try:
+                            result = future.result()
+                        except Exception:  # A crashed decoder: record nothing, retry next time
+                            continue
+                        self.cache.put_loudness(path, size, mtime_ns, result)
+                        analyzed += 1
+                    self._progress.put((analyzed, total))
+        except Exception as e:  # Pool failed to start or broke, cache unreadable: on_done reports it
+            self._error = e
+        finally:
+            self._progress.put((-1, analyzed))  # Sentinel: finished
+
+    def _drain(self) -> None:
+        """Tk thread: report progress; hand over to on_done once the batch thread exits."""
+        finished: Optional[int] = None
+        latest: Optional[Tuple[int, int]] = None
+        try:
+            while True:
+                done, total = self._progress.get_nowait()
+                if done < 0:
+                    finished = total
+                else:
+                    latest = (done, total)
+        except queue.Empty:
+            pass
+        if latest is not None and self._on_progress is not None:
+            self._on_progress(*latest)
+        if finished is None:
+            self.root.after(DRAIN_MS, self._drain)
+            return
+        self._thread = None
+        on_done, self._on_done, self._on_progress = self._on_done, None, None
+        if on_done is not None:
+            on_done(finished, self._cancel.is_set(), self._error)
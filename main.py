@@ -1,11 +1,23 @@
 from __future__ import annotations
-import random
+import time
+_T0 = time.perf_counter()  # Start of the startup timing report (see App._on_first_frame)
+
+import os
+import queue
+import sys
+import tempfile
+import threading
 import tkinter as tk
+from concurrent.futures import Future, ThreadPoolExecutor
+from itertools import islice
 from tkinter import ttk, filedialog, simpledialog, messagebox
 from pathlib import Path
+from typing import Dict, Tuple
 
 # --- Drag-and-drop support ---
-# tkinterdnd2 lets users drop files from the OS onto the window.
+# tkinterdnd2 lets users drop files from the OS onto the window. It is a small pure-Python
+# module and App has to subclass its Tk, so it stays a top-level import; the drop target
+# itself is registered once the library has loaded.
 try:
     from tkinterdnd2 import TkinterDnD, DND_FILES  # pip install tkinterdnd2
     BaseTk = TkinterDnD.Tk
@@ -15,77 +27,90 @@ except Exception:
     BaseTk = tk.Tk
     DND_AVAILABLE = False
 
-# --- Metadata support (ID3 tags and duration) ---
-# mutagen reads MP3 tags like Title/Artist and audio length.
-try:
-    from mutagen.mp3 import MP3  # pip install mutagen
-    from mutagen.id3 import ID3
-    META_AVAILABLE = True
-except Exception:
-    META_AVAILABLE = False
-
-from playlist_store import PlaylistStore
+import perf
+from audio import PygameBackend
+from controller import IMPORT_CHUNK, PlayerController
+from crossfade import CrossfadeBackend
+from dedupe import DuplicateGroup, FingerprintCache, find_duplicates, remove_duplicates
+from library import ImportPlan, LibraryIndex, plan_import
+from loudness import LOUDNESS_AVAILABLE, LoudnessScanner, track_gain
+from metadata import MetadataCache
 from player import Player
+from playlist_files import read_playlist, write_playlist
+from playlist_store import PlaylistStore, StoreConflict
+from relink import Missing, RelinkPlan, apply_relinks, find_missing, plan_relinks
+from scanner import MetadataScanner
+from search import SearchHit, SearchIndex
+from search_panel import SearchPanel
+from seek_bar import SeekBar
+from session import SESSION_SAVE_MS, SessionFile
+from smart import SmartPlaylists, SmartRule
+from sqlite_store import open_store
+from perf_panel import PerfPanel
+from track_view import TrackTable
 
 
 APP_TITLE = "MP3 Player with Playlists"
-POLL_MS = 500  # Polling interval (ms) to detect when a track finishes.
-
-
-def fmt_duration(secs: float | int | None) -> str:
-    """Format seconds as MM:SS. Return placeholder for unknown."""
-    if secs is None:
-        return "--:--"
-    try:
-        secs = int(round(secs))
-        m, s = divmod(secs, 60)
-        return f"{m:02d}:{s:02d}"
-    except Exception:
-        return "--:--"
-
-
-def read_metadata(path: Path) -> tuple[str | None, str | None, str | None]:
-    """Return (title, artist, duration_str). Falls back to (None, None, None) if unavailable."""
-    if not META_AVAILABLE:
-        return None, None, None
-    try:
-        # MP3(..., ID3=ID3) ensures we can read tag frames like TIT2 (title) and TPE1 (artist).
-        audio = MP3(str(path), ID3=ID3)
-        title = None
-        artist = None
-        if audio.tags:
-            t = audio.tags.get("TIT2")  # Title frame
-            a = audio.tags.get("TPE1")  # Lead artist frame
-            title = str(t.text[0]) if t and t.text else None
-            artist = str(a.text[0]) if a and a.text else None
-        # audio.info.length is the length in seconds (float)
-        duration = fmt_duration(getattr(audio.info, "length", None))
-        return title, artist, duration
-    except Exception:
-        # Malformed or missing tags shouldn't crash the app.
-        return None, None, None
+LOAD_POLL_MS = 20  # How often the Tk loop checks whether the library has finished loading.
+STORE_WATCH_MS = 1000  # How often to look for playlist edits made by another window or a script.
+DUPLICATES_LISTED = 15  # Groups named in the duplicate report before "… and N more".
+PLAYLIST_FILETYPES = [("Playlists", "*.m3u8 *.m3u *.pls"), ("All files", "*.*")]
+IMPORT_AHEAD = 2  # Playlist-file chunks the reader may get ahead of the store (bounds memory)
+REMOTE_ENV = "MP3_PLAYER_REMOTE"  # Address to serve the remote-control protocol on (remote.py); unset: off
+CROSSFADE_CHOICES = {"Off": 0.0, "2 s": 2.0, "4 s": 4.0, "6 s": 6.0, "8 s": 8.0, "12 s": 12.0}
+
+Sidecars = Tuple[MetadataCache, LibraryIndex, FingerprintCache]
+
+
+def open_sidecars() -> Sidecars:
+    """Open the SQLite caches next to playlists.json (on the library-load thread, not Tk's)."""
+    return (
+        MetadataCache("metadata_cache.sqlite"),
+        LibraryIndex("library_index.sqlite"),
+        FingerprintCache("fingerprints.sqlite"),
+    )
 
 
 class App(BaseTk):
-    """Main Tkinter application window and UI logic."""
+    """Main Tkinter application window and UI logic.
 
-    def __init__(self) -> None:
+    Startup paints the window first: playlists are loaded on a background thread
+    after the first frame (controls stay disabled until then), and the audio mixer
+    and mutagen are only initialized when first used.
+    """
+
+    def __init__(self, startup_report: bool = False) -> None:
+        self.startup_ms: Dict[str, float] = {"imports": (time.perf_counter() - _T0) * 1000}
+        self._startup_report = startup_report
         super().__init__()
         self.title(APP_TITLE)
         self.geometry("900x560")
         self.minsize(820, 520)
 
         # Core components
-        self.store = PlaylistStore()   # JSON-backed playlist storage
-        self.player = Player()         # Audio playback wrapper
+        # playlists.db (SQLite) once migrated, otherwise playlists.json + append-only journal;
+        # opened after the first frame (see _on_first_frame)
+        self.store: PlaylistStore | None = None
+        self.player = Player()         # Audio playback wrapper (opens the device on first use)
+        # SQLite sidecars next to playlists.json, opened with the store (see open_sidecars):
+        self.meta: MetadataCache | None = None               # Cached tag/duration reads
+        self.library: LibraryIndex | None = None             # (path, size, mtime) of imported files
+        self.fingerprints: FingerprintCache | None = None    # Content hashes for duplicate checks
+        self.scanner: MetadataScanner | None = None          # Thread-pool tag reads for bulk adds
+        self.loudness: LoudnessScanner | None = None         # Process-pool loudness analysis
+        self.player.gain_for = self._track_gain              # Volume normalization (toggle in the toolbar)
+        self.session = SessionFile("session.json")  # What was playing, resumed on the next start
+        # Queue, shuffle/repeat and track-end logic (no Tk in there); created with the store
+        self.controller: PlayerController | None = None
+        self.search_index: SearchIndex | None = None  # Built in the background once the store is open
+        self.smart: SmartPlaylists | None = None      # Rule-based playlists, kept up to date from the store
 
         # UI state
-        self.current_file: Path | None = None
-        self.shuffle: bool = False
-        self.repeat_one: bool = False
-        self.shuffle_pool: list[int] = []  # Remaining indices to play in shuffle mode
-        self.history: list[int] = []       # Indices already played (for Prev/Next in shuffle)
-        self.history_pos: int = -1         # Pointer into history (supports back/forward)
+        self._end_watch: str | None = None # Pending after() id of the track-end check
+        self._perf_panel: PerfPanel | None = None
+        self._search_panel: SearchPanel | None = None
+        self.remote = None  # remote.RemoteServer while MP3_PLAYER_REMOTE is set
+        self._imports: Dict[str, threading.Event] = {}  # Running playlist-file imports: temporary name -> cancel flag
 
         # Window grid layout: top row controls, bottom row playlist panel
         self.columnconfigure(0, weight=1)
@@ -93,26 +118,172 @@ class App(BaseTk):
 
         self._build_top_controls()
         self._build_playlist_panel()
+        self._set_controls_enabled(False)
+        self.status_var.set("Loading playlists…")
+
+        # Hidden debug panel with hot-path timings (instrumentation is off until it opens)
+        self.bind("<F12>", lambda e: self._open_perf_panel())
+        self.protocol("WM_DELETE_WINDOW", self._on_close)
+        self.after(0, self._on_first_frame)
+
+    # ---------------- Startup ----------------
+    def _on_first_frame(self) -> None:
+        """Runs once the event loop starts: paint, then load the library off the Tk thread."""
+        self.update_idletasks()  # Lay out, map and draw the (still empty) window
+        self.startup_ms["first_frame"] = (time.perf_counter() - _T0) * 1000
+        loader = ThreadPoolExecutor(max_workers=1, thread_name_prefix="library-load")
+        sidecars = loader.submit(open_sidecars)
+        future = loader.submit(open_store)
+        loader.shutdown(wait=False)
+        self.after(LOAD_POLL_MS, self._poll_library, future, sidecars)
+
+    def _poll_library(self, future: "Future[PlaylistStore]", sidecars: "Future[Sidecars]") -> None:
+        """Wait for the background load; then wire up the store and enable the UI."""
+        if not (future.done() and sidecars.done()):
+            self.after(LOAD_POLL_MS, self._poll_library, future, sidecars)
+            return
+        self.meta, self.library, self.fingerprints = sidecars.result()  # These run memory-only rather than fail
+        self.track_table.meta = self.meta
+        self.scanner = MetadataScanner(self, self.meta)
+        self.loudness = LoudnessScanner(self, self.meta)
+        try:
+            self.store = future.result()
+        except Exception as e:
+            # Unreadable or locked database, unwritable folder...: start rather than hang on "Loading".
+            messagebox.showerror(APP_TITLE, f"Could not open the playlists:\n{e}\n\n"
+                                 "Starting with an empty library; changes made now will not be kept.")
+            self.store = PlaylistStore(Path(tempfile.mkdtemp(prefix="mp3-player-")) / "playlists.json")
+            self.session = SessionFile(self.store.db_path.with_name("session.json"))  # Keep the real one
+        self.controller = PlayerController(self.store, self.player, self.meta)
+        # Store changes update the table incrementally (the controller syncs the play queue)
+        self.store.subscribe(self.track_table.apply)
+        self.store.subscribe(self.library.apply)  # Index rows follow playlist renames and deletes
+        # Definitions sit next to the store's file (so the fallback leaves the real ones alone)
+        self.smart = SmartPlaylists(self.store, self.store.db_path.with_name("smart_playlists.json"), background=True)
+        self.after(LOAD_POLL_MS, self._poll_smart)
+        self.search_index = SearchIndex(self.store, background=True)
         self._refresh_playlists()
+        self.bind("<Control-f>", lambda e: self._open_search())
+        self.after(STORE_WATCH_MS, self._watch_store)
 
         # Drag-and-drop registration (if available)
         if DND_AVAILABLE:
             self.drop_target_register(DND_FILES)
             self.dnd_bind("<<Drop>>", self._on_drop_files)
 
-        # Start periodic polling to auto-advance tracks when one finishes.
-        self.after(POLL_MS, self._poll_playback)
+        self._set_controls_enabled(True)
+        self.seek_bar.refresh()  # Back to disabled until something plays
+        self.status_var.set("")
+        if os.environ.get(REMOTE_ENV):
+            self._start_remote(os.environ[REMOTE_ENV])
+        self.update_idletasks()
+        self.startup_ms["interactive"] = (time.perf_counter() - _T0) * 1000
+        self._report_startup()
+        if not self._startup_report:
+            self.after_idle(self._restore_session)
+            self.after(SESSION_SAVE_MS, self._save_session)
+
+    def _poll_smart(self) -> None:
+        """Wait for the smart playlists' background mirror; their catch-up edits then run here."""
+        if not self.smart.ready():
+            self.after(LOAD_POLL_MS, self._poll_smart)
+
+    def _restore_session(self) -> None:
+        """Resume the last run's playback (session.json): same queue, order, track and position."""
+        state = self.session.load()
+        if state is None:
+            return
+        try:
+            if not self.controller.restore_session(state):
+                return
+        except Exception as e:  # pygame.error (file no longer decodes), RuntimeError (no pygame), odd state
+            self.player.stop()
+            self.status_var.set(f"Could not resume the last session: {e}")
+            return
+        self.btn_shuffle.state(["selected" if self.controller.shuffle else "!selected"])
+        self.repeat_var.set(self.controller.repeat_one)
+        self.vol.set(round(self.player.volume * 100))
+        self._update_now_playing_label_from_queue()
+        self._arm_end_watch()
+
+    def _save_session(self) -> None:
+        """Timer: save the session if it changed (nothing is written while paused or stopped)."""
+        self.session.save(self.controller.session_state())
+        self.after(SESSION_SAVE_MS, self._save_session)
+
+    def _on_close(self) -> None:
+        """Window closed: save the session at the exact position, stop serving remote control, quit."""
+        if self.controller is not None:
+            self.session.save(self.controller.session_state())
+        if self.remote is not None:
+            self.remote.close()
+        for temp, cancel in self._imports.items():
+            cancel.set()  # Readers stop instead of waiting on a queue nobody drains
+            try:
+                self.controller.abort_import(temp)
+            except (OSError, ValueError):
+                pass
+        self.destroy()
+
+    def _start_remote(self, address: str) -> None:
+        """Serve remote control on address; if it can't be bound, say so in the status bar and run without."""
+        from remote import TOKEN_ENV, RemoteCommands, RemoteServer  # asyncio is slow to import; only when asked for
+        commands = RemoteCommands(self.controller, self._on_remote_command)
+        try:
+            server = RemoteServer(self, commands, address, os.environ.get(TOKEN_ENV))
+            server.start()
+        except (OSError, ValueError) as e:
+            self.status_var.set(f"Remote control off: {e}")
+            return
+        self.remote = server
+
+    def _on_remote_command(self, _cmd: str) -> None:
+        """A remote command changed playback: bring the window along (label, volume slider, end timer)."""
+        self.vol.set(round(self.player.volume * 100))
+        self._update_now_playing_label_from_queue()
+        self._arm_end_watch()
+
+    def _publish_state(self) -> None:
+        """Tell remote-control subscribers what is playing now."""
+        if self.remote is not None and self.remote.subscribed:
+            self.remote.publish(dict(self.remote.handle({"cmd": "status"}), event="now_playing"))
+
+    def report_callback_exception(self, exc, val, tb) -> None:
+        """Tk callback errors: an edit refused because another window changed the playlists is just reported."""
+        if isinstance(val, StoreConflict):
+            messagebox.showwarning("Playlists changed", str(val))
+            return
+        super().report_callback_exception(exc, val, tb)
+
+    def _report_startup(self) -> None:
+        """Record startup timings in perf; print them (and quit) for --startup-report."""
+        for key in ("first_frame", "interactive"):
+            perf.record(f"startup.{key}", self.startup_ms[key] / 1000)
+        if self._startup_report or perf.enabled():
+            print(", ".join(f"{k} {v:.0f} ms" for k, v in self.startup_ms.items()), flush=True)
+        if self._startup_report:
+            self.after_idle(self.destroy)
+
+    def _set_controls_enabled(self, enabled: bool) -> None:
+        """Enable/disable every button, toggle, slider and dropdown in the window."""
+        flag = "!disabled" if enabled else "disabled"
+        stack = list(self.winfo_children())
+        while stack:
+            w = stack.pop()
+            stack.extend(w.winfo_children())
+            if isinstance(w, (ttk.Button, ttk.Checkbutton, ttk.Scale, ttk.Combobox)):
+                w.state([flag])
 
     # ---------------- UI builders ----------------
     def _build_top_controls(self) -> None:
         """Build the top toolbar: transport controls, volume, shuffle/repeat, add-to-playlist."""
         frame = ttk.Frame(self, padding=12)
         frame.grid(row=0, column=0, sticky="ew")
-        frame.columnconfigure(8, weight=1)
+        frame.columnconfigure(10, weight=1)
 
         # A label that displays the current/now playing file or title
         self.current_label_var = tk.StringVar(value="No file loaded")
-        ttk.Label(frame, textvariable=self.current_label_var).grid(row=0, column=0, columnspan=9, sticky="w")
+        ttk.Label(frame, textvariable=self.current_label_var).grid(row=0, column=0, columnspan=11, sticky="w")
 
         # Row 1: Load / Play / Pause / Stop
         ttk.Button(frame, text="Load MP3", command=self._on_load_file).grid(row=1, column=0, padx=2, pady=8)
@@ -120,6 +291,10 @@ class App(BaseTk):
         ttk.Button(frame, text="Pause ⏯", command=self._on_pause_toggle).grid(row=1, column=2, padx=2)
         ttk.Button(frame, text="Stop ⏹", command=self._on_stop).grid(row=1, column=3, padx=2)
 
+        # Row 2: position and seek bar (redrawn only when the time shown or a pixel changes)
+        self.seek_bar = SeekBar(frame, self.player, self._on_seek)
+        self.seek_bar.grid(row=2, column=0, columnspan=11, sticky="ew")
+
         # Volume slider (0..100 mapped to 0.0..1.0)
         ttk.Label(frame, text="Volume").grid(row=1, column=4, padx=(20, 4))
         self.vol = tk.DoubleVar(value=70)
@@ -137,8 +312,23 @@ class App(BaseTk):
         self.btn_repeat = ttk.Checkbutton(frame, text="Repeat One", variable=self.repeat_var, command=self._toggle_repeat)
         self.btn_repeat.grid(row=1, column=7, padx=2)
 
+        # Per-track volume normalization from analyzed loudness (tracks not analyzed play as is)
+        self.normalize_var = tk.BooleanVar(value=True)
+        ttk.Checkbutton(
+            frame, text="Normalize", variable=self.normalize_var, command=self._toggle_normalize
+        ).grid(row=1, column=8, padx=2)
+
+        # Crossfade length ("Off" = gapless hand-off on the music stream)
+        fade = ttk.Frame(frame)
+        fade.grid(row=1, column=9, padx=(8, 2))
+        ttk.Label(fade, text="Crossfade").pack(side=tk.LEFT, padx=(0, 4))
+        self.crossfade_combo = ttk.Combobox(fade, values=list(CROSSFADE_CHOICES), state="readonly", width=5)
+        self.crossfade_combo.set("Off")
+        self.crossfade_combo.pack(side=tk.LEFT)
+        self.crossfade_combo.bind("<<ComboboxSelected>>", self._on_crossfade)
+
         # Add currently loaded file to selected playlist
-        ttk.Button(frame, text="Add to Playlist…", command=self._on_add_current_to_playlist).grid(row=1, column=8, padx=6)
+        ttk.Button(frame, text="Add to Playlist…", command=self._on_add_current_to_playlist).grid(row=1, column=10, padx=6)
 
     def _build_playlist_panel(self) -> None:
         """Build the lower panel: playlist selection, track table, and playlist actions."""
@@ -159,37 +349,37 @@ class App(BaseTk):
         ttk.Button(left, text="New",    command=self._on_new_playlist).pack(side=tk.LEFT, padx=2)
         ttk.Button(left, text="Rename", command=self._on_rename_playlist).pack(side=tk.LEFT, padx=2)
         ttk.Button(left, text="Delete", command=self._on_delete_playlist).pack(side=tk.LEFT, padx=2)
+        ttk.Button(left, text="Smart…", command=self._on_smart_playlist).pack(side=tk.LEFT, padx=2)
+        ttk.Button(left, text="Import…", command=self._on_import_playlist_file).pack(side=tk.LEFT, padx=(12, 2))
+        ttk.Button(left, text="Export…", command=self._on_export_playlist_file).pack(side=tk.LEFT, padx=2)
+        ttk.Button(left, text="Search…", command=self._open_search).pack(side=tk.LEFT, padx=(12, 2))
 
-        # Track table shows index, title, duration, and file path
-        cols = ("#", "Title", "Duration", "Path")
-        self.tree = ttk.Treeview(outer, columns=cols, show="headings")
-        self.tree.grid(row=1, column=0, columnspan=2, sticky="nsew", pady=(8, 0))
-        self.tree.heading("#", text="#")
-        self.tree.heading("Title", text="Title")
-        self.tree.heading("Duration", text="Duration")
-        self.tree.heading("Path", text="Path")
-        self.tree.column("#", width=40, anchor=tk.CENTER)
-        self.tree.column("Title", width=280)
-        self.tree.column("Duration", width=90, anchor=tk.CENTER)
-        self.tree.column("Path", width=460)
-
-        # Scrollbar for the track table
-        vsb = ttk.Scrollbar(outer, orient="vertical", command=self.tree.yview)
-        vsb.grid(row=1, column=2, sticky="ns")
-        self.tree.configure(yscroll=vsb.set)
+        # Track table (index, title, duration, path); only visible rows are materialized
+        self.track_table = TrackTable(outer, self.meta)
+        self.track_table.grid(row=1, column=0, columnspan=3, sticky="nsew", pady=(8, 0))
 
         # Bottom row: playback and editing controls for the selected playlist
         btns = ttk.Frame(outer)
         btns.grid(row=2, column=0, columnspan=2, sticky="ew", pady=10)
-        btns.columnconfigure(4, weight=1)
+        btns.columnconfigure(8, weight=1)
 
         ttk.Button(btns, text="Play Playlist ▶", command=self._on_play_playlist).grid(row=0, column=0, padx=2)
         ttk.Button(btns, text="Prev ⏮",           command=self._on_prev).grid(row=0, column=1, padx=2)
         ttk.Button(btns, text="Next ⏭",           command=self._on_next).grid(row=0, column=2, padx=2)
         ttk.Button(btns, text="Remove Track",     command=self._on_remove_track).grid(row=0, column=3, padx=8)
+        ttk.Button(btns, text="Import Folder…",   command=self._on_import_folder).grid(row=0, column=4, padx=2)
+        ttk.Button(btns, text="Duplicates…",      command=self._on_find_duplicates).grid(row=0, column=5, padx=2)
+        ttk.Button(btns, text="Check Files…",     command=self._on_check_files).grid(row=0, column=6, padx=2)
+        ttk.Button(btns, text="Loudness…",        command=self._on_analyze_loudness).grid(row=0, column=7, padx=2)
+
+        # Progress of background scans (bulk adds) with a Cancel button while one runs
+        self.status_var = tk.StringVar(value="")
+        ttk.Label(btns, textvariable=self.status_var).grid(row=0, column=8, sticky="e", padx=6)
+        self.btn_cancel_scan = ttk.Button(btns, text="Cancel", command=lambda: self.scanner.cancel())
+        self.btn_cancel_loudness = ttk.Button(btns, text="Stop Analysis", command=lambda: self.loudness.cancel())
 
         if DND_AVAILABLE:
-            tip = ttk.Label(outer, text="Tip: Drag & drop MP3 files to add them to the selected playlist.")
+            tip = ttk.Label(outer, text="Tip: Drag & drop MP3 files or folders to add them to the selected playlist.")
             tip.grid(row=3, column=0, columnspan=2, sticky="w", pady=(6, 0))
 
     # ---------------- Event handlers ----------------
@@ -202,45 +392,51 @@ class App(BaseTk):
 
     def _play_single(self, p: Path) -> None:
         """Load a single file for immediate playback and update 'Loaded' label."""
-        self.current_file = p
-        title, artist, duration = read_metadata(p)
         # Prefer "Title – Artist" if tags exist; otherwise show filename stem
-        nice_title = f"{title} – {artist}" if title and artist else (title or p.stem)
+        nice_title = self.controller.play_file(p)
         self.current_label_var.set(f"Loaded: {nice_title}")
-        self.player.play_file_now(p)
+        self._arm_end_watch()
 
     def _on_play(self) -> None:
         """Resume/Start playback of current file."""
-        if self.current_file is None:
+        if self.controller.current_file is None:
             messagebox.showinfo("No file", "Load an MP3 first or play a playlist.")
             return
         self.player.play()
+        self._arm_end_watch()
 
     def _on_pause_toggle(self) -> None:
         """Toggle between pause and unpause."""
         self.player.pause()
+        self._arm_end_watch()
 
     def _on_stop(self) -> None:
         """Stop playback."""
         self.player.stop()
+        self._arm_end_watch()
+
+    def _on_seek(self, position: float) -> None:
+        """Seek bar released: continue the track from there."""
+        self.player.seek(position)
+        self._arm_end_watch()
 
     def _on_volume(self, _evt=None) -> None:
         """Volume slider callback (0..100 mapped to 0.0..1.0)."""
         self.player.set_volume(self.vol.get() / 100.0)
+        self._publish_state()
 
     def _on_add_current_to_playlist(self) -> None:
         """Add the currently loaded file to the selected playlist (with metadata)."""
-        if self.current_file is None:
+        if self.controller.current_file is None:
             messagebox.showinfo("No file", "Load an MP3 first.")
             return
         pl = self.playlist_combo.get()
         if not pl:
             messagebox.showinfo("No playlist", "Create/select a playlist first.")
             return
-        title, artist, duration = read_metadata(self.current_file)
-        display_title = f"{title} – {artist}" if title and artist else (title or self.current_file.stem)
-        self.store.add_track(pl, self.current_file, title=display_title, duration=duration)
-        self._refresh_tracks()
+        if not self._editable(pl):
+            return
+        self.controller.add_file(pl, self.controller.current_file)
 
     def _on_new_playlist(self) -> None:
         """Create a new (empty) playlist."""
@@ -253,6 +449,137 @@ class App(BaseTk):
         except ValueError as e:
             messagebox.showerror("Error", str(e))
 
+    def _on_smart_playlist(self) -> None:
+        """Create a smart playlist, or edit the rule of the selected one."""
+        current = self.playlist_combo.get()
+        if self.smart.is_smart(current):
+            name = current
+        else:
+            name = simpledialog.askstring("Smart Playlist", "Enter smart playlist name:")
+            if not name:
+                return
+        rule_text = simpledialog.askstring(
+            "Smart Playlist",
+            "Tracks matching (fields: title, artist, duration, path, folder), e.g.\n"
+            "artist is Queen and duration < 3:00",
+            initialvalue=str(self.smart.rules[name]) if self.smart.is_smart(name) else "",
+        )
+        if not rule_text:
+            return
+        try:
+            self.smart.define(name, SmartRule.parse(rule_text))
+            self._refresh_playlists(select=name.strip())
+        except ValueError as e:
+            messagebox.showerror("Error", str(e))
+
+    def _on_import_playlist_file(self) -> None:
+        """Import an M3U/M3U8/PLS file as a new playlist: read off the Tk thread, written a chunk per tick."""
+        chosen = filedialog.askopenfilename(title="Import playlist", filetypes=PLAYLIST_FILETYPES)
+        if not chosen:
+            return
+        path = Path(chosen)
+        try:
+            temp = self.controller.begin_import(path.stem)
+        except (OSError, ValueError) as e:
+            messagebox.showerror("Error", f"Could not import {path.name}: {e}")
+            return
+        chunks: "queue.Queue[object]" = queue.Queue(maxsize=IMPORT_AHEAD)
+        cancel = threading.Event()
+        self._imports[temp] = cancel
+
+        def put(item: object) -> None:
+            while not cancel.is_set():
+                try:
+                    chunks.put(item, timeout=0.1)
+                    return
+                except queue.Full:
+                    continue
+
+        def read() -> None:
+            """Worker: stream the file as lists of entries; None at the end, or the error."""
+            try:
+                entries = read_playlist(path)
+                while not cancel.is_set():
+                    chunk = list(islice(entries, IMPORT_CHUNK))
+                    put(chunk or None)
+                    if not chunk:
+                        return
+            except (OSError, ValueError) as e:
+                put(e)
+
+        self.status_var.set(f"Reading {path.name}…")
+        reader = ThreadPoolExecutor(max_workers=1, thread_name_prefix="playlist-read")
+        reader.submit(read)
+        reader.shutdown(wait=False)
+        self.after(LOAD_POLL_MS, self._poll_playlist_file, path, temp, chunks, cancel, 0)
+
+    def _poll_playlist_file(self, path: Path, temp: str, chunks: "queue.Queue[object]",
+                            cancel: threading.Event, added: int) -> None:
+        """Write the next chunk the reader produced; rename the playlist into place once it reports the end."""
+        try:
+            item = chunks.get_nowait()
+        except queue.Empty:
+            self.after(LOAD_POLL_MS, self._poll_playlist_file, path, temp, chunks, cancel, added)
+            return
+        error: Exception | None = item if isinstance(item, Exception) else None
+        name = None
+        try:
+            if isinstance(item, list):
+                added += self.controller.import_chunk(temp, item)
+                self.status_var.set(f"Importing {path.name}… {added:,} tracks")
+                self.after(1, self._poll_playlist_file, path, temp, chunks, cancel, added)
+                return
+            if error is None:
+                name = self.controller.finish_import(temp, path.stem)
+        except (OSError, ValueError) as e:
+            error = e
+        cancel.set()
+        del self._imports[temp]
+        self.status_var.set("")
+        if error is not None:
+            try:
+                self.controller.abort_import(temp)
+            except (OSError, ValueError):
+                pass  # Left under its "(importing…)" name for the user to delete
+            messagebox.showerror("Error", f"Could not import {path.name}: {error}")
+            return
+        self._refresh_playlists(select=name)
+        self.status_var.set(f"Imported {added} tracks from {path.name}")
+
+    def _on_export_playlist_file(self) -> None:
+        """Write the selected playlist as M3U8/M3U/PLS (by the chosen extension) off the Tk thread."""
+        name = self.playlist_combo.get()
+        if not name:
+            messagebox.showinfo("No playlist", "Create/select a playlist first.")
+            return
+        path = filedialog.asksaveasfilename(
+            title="Export playlist", initialfile=f"{name}.m3u8", defaultextension=".m3u8", filetypes=PLAYLIST_FILETYPES,
+        )
+        if not path:
+            return
+        tracks = self.store.get_tracks(name)
+        writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="playlist-write")
+        future = writer.submit(write_playlist, path, tracks)
+        writer.shutdown(wait=False)
+        self.after(LOAD_POLL_MS, self._poll_export, Path(path), future)
+
+    def _poll_export(self, path: Path, future: "Future[int]") -> None:
+        """Report the finished export (or why it failed)."""
+        if not future.done():
+            self.after(LOAD_POLL_MS, self._poll_export, path, future)
+            return
+        try:
+            self.status_var.set(f"Exported {future.result()} tracks to {path.name}")
+        except (OSError, ValueError) as e:
+            messagebox.showerror("Error", f"Could not write {path.name}: {e}")
+
+    def _editable(self, playlist: str) -> bool:
+        """False (after telling the user) for smart playlists, whose tracks come from their rule."""
+        if self.smart.is_smart(playlist):
+            messagebox.showinfo("Smart playlist", "This playlist is filled by its rule; use “Smart…” to change it.")
+            return False
+        return True
+
     def _on_rename_playlist(self) -> None:
         """Rename the currently selected playlist."""
         old = self.playlist_combo.get()
@@ -283,68 +610,35 @@ class App(BaseTk):
         if not name:
             messagebox.showinfo("No playlist", "Create/select a playlist first.")
             return
-        tracks = self.store.get_tracks(name)
-        if not tracks:
+        if not self.controller.play_playlist(name):
             messagebox.showinfo("Empty playlist", "Add tracks to this playlist first.")
             return
-
-        self.player.load_queue(tracks)
-
-        # Reset shuffle history for a new play session
-        self.history = []
-        self.history_pos = -1
-
-        if self.shuffle:
-            self._init_shuffle_pool()
-            self._play_next_shuffle()
-        else:
-            self.player.play_queue_from_start()
-            self._record_history(self.player.queue_index)
-
         self._update_now_playing_label_from_queue()
+        self._arm_end_watch()
 
     def _on_next(self) -> None:
         """Advance to the next track, honoring repeat-one and shuffle behavior."""
-        if self.repeat_one and self.player.queue_len() > 0 and self.player.queue_index != -1:
-            # Repeat current track
-            self.player.play_index(self.player.queue_index)
-            self._record_history(self.player.queue_index)
-        elif self.shuffle and self.player.queue_len() > 0:
-            # Random next track (but with reproducible history)
-            self._play_next_shuffle()
-        else:
-            # Regular sequential next
-            self.player.next_in_queue()
-            if self.player.queue_index != -1:
-                self._record_history(self.player.queue_index)
+        if self.player.queue_len() == 0:
+            return
+        self.controller.next()
         self._update_now_playing_label_from_queue()
+        self._arm_end_watch()
 
     def _on_prev(self) -> None:
-        """Go to the previous track. In shuffle, use the history list to step back."""
-        if self.shuffle and self.history_pos > 0:
-            # Move backward in shuffle history
-            self.history_pos -= 1
-            idx = self.history[self.history_pos]
-            self.player.play_index(idx)
-        else:
-            # Sequential previous
-            self.player.prev_in_queue()
-            if self.player.queue_index != -1:
-                self._record_history(self.player.queue_index)
+        """Go to the previous track. In shuffle, use the history to step back."""
+        self.controller.prev()
         self._update_now_playing_label_from_queue()
+        self._arm_end_watch()
 
     def _on_remove_track(self) -> None:
-        """Remove the selected track from the current playlist."""
+        """Remove the selected track(s) from the current playlist in one save."""
         name = self.playlist_combo.get()
         if not name:
             return
-        sel = self.tree.selection()
-        if not sel:
+        indices = self.track_table.selected_indices()
+        if not indices or not self._editable(name):
             return
-        # First column (#) is 1-based for display; convert to 0-based index
-        index = int(self.tree.item(sel[0], "values")[0]) - 1
-        self.store.remove_track_at(name, index)
-        self._refresh_tracks()
+        self.store.remove_tracks_at(name, indices)
 
     def _on_drop_files(self, event) -> None:
         """Handle drag-and-drop: parse OS-provided path list and add MP3s."""
@@ -372,66 +666,279 @@ class App(BaseTk):
         if token:
             paths.append(token)
 
-        added = 0
         current_pl = self.playlist_combo.get()
         if not current_pl:
             messagebox.showinfo("No playlist", "Create/select a playlist first.")
             return
+        if not self._editable(current_pl):
+            return
 
-        for p in paths:
-            P = Path(p)
-            if P.suffix.lower() != ".mp3":
-                continue  # Ignore non-MP3 files quietly
-            title, artist, duration = read_metadata(P)
-            display_title = f"{title} – {artist}" if title and artist else (title or P.stem)
-            self.store.add_track(current_pl, P, title=display_title, duration=duration)
-            added += 1
+        # Folders are imported recursively; other non-MP3 files are ignored quietly
+        folders = [Path(p) for p in paths if Path(p).is_dir()]
+        mp3s = [Path(p) for p in paths if Path(p).suffix.lower() == ".mp3"]
+        if folders:
+            self._import_folders(current_pl, folders, mp3s)
+        elif mp3s:
+            self._scan_and_add(current_pl, mp3s)
+
+    def _scan_and_add(self, playlist: str, paths: list[Path]) -> None:
+        """Read metadata for paths in the background, then add them to playlist in one batch."""
+        if self.scanner.busy:
+            messagebox.showinfo("Busy", "Still adding files from the previous drop; try again shortly.")
+            return
 
-        if added:
-            self._refresh_tracks()
+        def on_progress(done: int, total: int) -> None:
+            self.status_var.set(f"Reading tags… {done}/{total}")
+
+        def on_done(results, cancelled: bool) -> None:
+            self.btn_cancel_scan.grid_remove()
+            self.status_var.set("")
+            if cancelled or not results:
+                return
+            try:
+                self.controller.add_scanned(playlist, results)
+            except ValueError as e:
+                # e.g. the playlist was deleted while the scan was running
+                messagebox.showerror("Error", str(e))
+
+        self.btn_cancel_scan.grid(row=0, column=9, padx=2)
+        self.scanner.start(paths, on_progress, on_done)
+
+    def _on_import_folder(self) -> None:
+        """Pick a folder and import its MP3s (recursively) into the selected playlist."""
+        name = self.playlist_combo.get()
+        if not name:
+            messagebox.showinfo("No playlist", "Create/select a playlist first.")
+            return
+        if not self._editable(name):
+            return
+        folder = filedialog.askdirectory(title="Import folder")
+        if folder:
+            self._import_folders(name, [Path(folder)])
+
+    def _import_folders(self, playlist: str, roots: list[Path], files: list[Path] | None = None) -> None:
+        """Walk roots off the Tk thread, read tags of new/changed files, then apply in one save."""
+        if self.scanner.busy:
+            messagebox.showinfo("Busy", "Still adding files from the previous drop; try again shortly.")
+            return
+        self.status_var.set("Scanning folders…")
+        paths = [t.path for t in self.store.get_tracks(playlist)]
+        walker = ThreadPoolExecutor(max_workers=1, thread_name_prefix="library-walk")
+        future = walker.submit(plan_import, roots, playlist, paths, self.library, files or ())
+        walker.shutdown(wait=False)
+        self.after(LOAD_POLL_MS, self._poll_import, playlist, future)
+
+    def _poll_import(self, playlist: str, future: "Future[ImportPlan]") -> None:
+        """Wait for the folder walk, then hand the files that need tags to the scanner."""
+        if not future.done():
+            self.after(LOAD_POLL_MS, self._poll_import, playlist, future)
+            return
+        self.status_var.set("")
+        try:
+            plan = future.result()
+        except ValueError as e:
+            messagebox.showerror("Error", str(e))
+            return
+        if self.scanner.busy:  # A drop started a scan while the walk ran
+            messagebox.showinfo("Busy", "Still adding files from the previous drop; try again shortly.")
+            return
+
+        def on_progress(done: int, total: int) -> None:
+            self.status_var.set(f"Reading tags… {done}/{total}")
+
+        def on_done(results, cancelled: bool) -> None:
+            self.btn_cancel_scan.grid_remove()
+            self.status_var.set("")
+            if cancelled:
+                return
+            try:
+                added, updated, removed = self.controller.apply_import(playlist, plan, results)
+            except ValueError as e:
+                messagebox.showerror("Error", str(e))
+                return
+            self.library.commit(plan)
+            self.status_var.set(f"Imported: {added} new, {updated} updated, {removed} removed")
+
+        self.btn_cancel_scan.grid(row=0, column=9, padx=2)
+        self.scanner.start([Path(p) for p in plan.to_read], on_progress, on_done)
+
+    def _on_find_duplicates(self) -> None:
+        """Look for duplicate entries in every regular playlist (off the Tk thread), then offer removal."""
+        playlists = {n: self.store.get_tracks(n) for n in self.store.list_playlists() if not self.smart.is_smart(n)}
+        self.status_var.set("Looking for duplicates…")
+        worker = ThreadPoolExecutor(max_workers=1, thread_name_prefix="dedupe-scan")
+        future = worker.submit(find_duplicates, playlists, self.fingerprints)
+        worker.shutdown(wait=False)
+        self.after(LOAD_POLL_MS, self._poll_duplicates, future)
+
+    def _poll_duplicates(self, future: "Future[list[DuplicateGroup]]") -> None:
+        """Wait for the duplicate scan; report the groups and remove the extras on request."""
+        if not future.done():
+            self.after(LOAD_POLL_MS, self._poll_duplicates, future)
+            return
+        self.status_var.set("")
+        groups = future.result()
+        if not groups:
+            messagebox.showinfo("Duplicates", "No duplicates found.")
+            return
+        extra = sum(g.extra for g in groups)
+        lines = [
+            f"{g.playlist}: {g.tracks[0].title or Path(g.tracks[0].path).stem} ×{len(g.tracks)} ({g.reason})"
+            for g in groups[:DUPLICATES_LISTED]
+        ]
+        if len(groups) > DUPLICATES_LISTED:
+            lines.append(f"… and {len(groups) - DUPLICATES_LISTED} more")
+        if messagebox.askyesno(
+            "Duplicates",
+            f"{extra} duplicate entries in {len(groups)} groups:\n\n" + "\n".join(lines)
+            + "\n\nRemove them (keeping the first of each)?",
+        ):
+            removed = remove_duplicates(self.store, groups)
+            self.status_var.set(f"Removed {removed} duplicates")
+
+    def _on_check_files(self) -> None:
+        """Stat every entry of the regular playlists (off the Tk thread) to find missing files."""
+        playlists = {n: self.store.get_tracks(n) for n in self.store.list_playlists() if not self.smart.is_smart(n)}
+        self.status_var.set("Checking files…")
+        worker = ThreadPoolExecutor(max_workers=1, thread_name_prefix="relink-check")
+        future = worker.submit(find_missing, playlists)
+        worker.shutdown(wait=False)
+        self.after(LOAD_POLL_MS, self._poll_missing, future)
+
+    def _poll_missing(self, future: "Future[list[Missing]]") -> None:
+        """Wait for the check; offer to look for the missing files under another folder."""
+        if not future.done():
+            self.after(LOAD_POLL_MS, self._poll_missing, future)
+            return
+        self.status_var.set("")
+        missing = future.result()
+        if not missing:
+            messagebox.showinfo("Check Files", "Every playlist entry points at an existing file.")
+            return
+        files = len({m.track.path for m in missing})
+        if not messagebox.askyesno(
+            "Check Files",
+            f"{len(missing)} entries point at {files} missing files.\n\nLook for them in another folder?",
+        ):
+            return
+        folder = filedialog.askdirectory(title="Folder to look in")
+        if not folder:
+            return
+        self.status_var.set("Matching missing files…")
+        worker = ThreadPoolExecutor(max_workers=1, thread_name_prefix="relink-plan")
+        future = worker.submit(plan_relinks, missing, folder, self.fingerprints, self.library)
+        worker.shutdown(wait=False)
+        self.after(LOAD_POLL_MS, self._poll_relinks, future)
+
+    def _poll_relinks(self, future: "Future[RelinkPlan]") -> None:
+        """Wait for the matching; relink the matched entries (one save) on request."""
+        if not future.done():
+            self.after(LOAD_POLL_MS, self._poll_relinks, future)
+            return
+        self.status_var.set("")
+        try:
+            plan = future.result()
+        except ValueError as e:
+            messagebox.showerror("Error", str(e))
+            return
+        summary = f"{len(plan.relinks)} entries matched"
+        if plan.ambiguous:
+            summary += f", {len(plan.ambiguous)} with several candidates"
+        if plan.unmatched:
+            summary += f", {len(plan.unmatched)} not found"
+        if not plan.relinks:
+            messagebox.showinfo("Check Files", summary + ".")
+            return
+        if messagebox.askyesno("Check Files", summary + ".\n\nRelink the matched entries?"):
+            updated = apply_relinks(self.store, plan.relinks)
+            self.status_var.set(f"Relinked {updated} entries")
+
+    def _on_analyze_loudness(self) -> None:
+        """Measure every track's loudness in the background; a stopped run resumes where it left off."""
+        if not LOUDNESS_AVAILABLE:
+            messagebox.showinfo("Loudness", "Loudness analysis needs NumPy and pygame (pip install numpy pygame).")
+            return
+        if self.loudness.busy:
+            messagebox.showinfo("Busy", "Loudness analysis is already running.")
+            return
+        paths = [t.path for n in self.store.list_playlists() if not self.smart.is_smart(n) for t in self.store.get_tracks(n)]
+
+        def on_progress(done: int, total: int) -> None:
+            self.status_var.set(f"Analyzing loudness… {done}/{total}")
+
+        def on_done(analyzed: int, cancelled: bool, error: Exception | None) -> None:
+            self.btn_cancel_loudness.grid_remove()
+            if error is not None:
+                self.status_var.set(f"Loudness analysis failed after {analyzed} tracks: {error}")
+            else:
+                note = " (stopped; run again to continue)" if cancelled else ""
+                self.status_var.set(f"Loudness analyzed for {analyzed} tracks{note}")
+            self.player.apply_gain()  # The current track may have just been measured
+
+        self.status_var.set("Analyzing loudness…")
+        self.btn_cancel_loudness.grid(row=0, column=10, padx=2)
+        self.loudness.start(paths, on_progress, on_done)
 
     # ---------------- Helpers ----------------
+    def _open_perf_panel(self) -> None:
+        """Show the performance panel (or raise it if it is already open)."""
+        if self._perf_panel is not None and self._perf_panel.winfo_exists():
+            self._perf_panel.lift()
+            return
+        self._perf_panel = PerfPanel(self, self._playback_stats)
+
+    def _open_search(self) -> None:
+        """Show the search window (or raise it if it is already open)."""
+        if self._search_panel is not None and self._search_panel.winfo_exists():
+            self._search_panel.lift()
+            return
+        self._search_panel = SearchPanel(self, self.search_index, self._play_search_results)
+
+    def _play_search_results(self, hits: list[SearchHit], start: int) -> None:
+        """Play search results as a queue, starting with the chosen one."""
+        if self.controller.play_tracks([h.track for h in hits], start):
+            self._update_now_playing_label_from_queue()
+            self._arm_end_watch()
+
     def _toggle_shuffle(self) -> None:
         """Enable/disable shuffle mode."""
-        self.shuffle = not self.shuffle
+        self.controller.set_shuffle(not self.controller.shuffle)
+
+    def _toggle_normalize(self) -> None:
+        """Turn per-track volume normalization on/off (applies to the current track right away)."""
+        self.player.gain_for = self._track_gain if self.normalize_var.get() else None
+        self.player.apply_gain()
+
+    def _track_gain(self, path: str) -> float:
+        """Player.gain_for: volume factor from the track's stored loudness (1.0 if not analyzed)."""
+        return track_gain(self.meta.loudness(path))
+
+    def _on_crossfade(self, _evt=None) -> None:
+        """Switch between gapless playback (music stream) and crossfading (decoded Sounds, two channels)."""
+        seconds = CROSSFADE_CHOICES[self.crossfade_combo.get()]
+        try:
+            if not seconds:
+                if self.player.crossfade:
+                    self.player.switch_backend(PygameBackend())
+            elif self.player.crossfade:
+                self.player.backend.crossfade = seconds
+            else:
+                self.player.switch_backend(CrossfadeBackend(seconds))
+        except Exception as e:  # pygame.error (undecodable current track) or RuntimeError (no pygame)
+            messagebox.showerror("Crossfade", f"Could not switch playback: {e}")
+            self.crossfade_combo.set(next(k for k, v in CROSSFADE_CHOICES.items() if v == self.player.crossfade))
+        self._arm_end_watch()  # The wake-up point moved
+
+    def _playback_stats(self) -> Dict[str, float]:
+        """Extra rows for the perf panel: inter-track gaps and, when crossfading, the decode buffers."""
+        stats = {f"gap_{k}": v for k, v in self.player.gap_stats().items()}
+        if self.player.crossfade:
+            stats.update(self.player.backend.stats())
+        return stats
 
     def _toggle_repeat(self) -> None:
         """Enable/disable repeat-one mode."""
-        self.repeat_one = bool(self.repeat_var.get())
-
-    def _init_shuffle_pool(self) -> None:
-        """Create a shuffled list of all track indices (excluding current if set)."""
-        n = self.player.queue_len()
-        self.shuffle_pool = list(range(n))
-        random.shuffle(self.shuffle_pool)
-        # If a track is already selected, remove it to avoid immediate repeat.
-        if self.player.queue_index in self.shuffle_pool:
-            self.shuffle_pool.remove(self.player.queue_index)
-
-    def _play_next_shuffle(self) -> None:
-        """Pick the next track via shuffle, respecting back/forward history."""
-        # If we previously pressed Prev in shuffle, let Next step forward through history first.
-        if 0 <= self.history_pos < len(self.history) - 1:
-            self.history_pos += 1
-            idx = self.history[self.history_pos]
-            self.player.play_index(idx)
-            return
-
-        # Otherwise take next from the random pool; when empty, start a new cycle.
-        if not self.shuffle_pool:
-            self._init_shuffle_pool()
-        idx = self.shuffle_pool.pop(0)
-        self.player.play_index(idx)
-        self._record_history(idx)
-
-    def _record_history(self, idx: int) -> None:
-        """Append an index to history, trimming any 'forward' entries if we had gone back."""
-        # If we went back and then chose a different path, discard the forward branch.
-        if 0 <= self.history_pos < len(self.history) - 1:
-            self.history = self.history[: self.history_pos + 1]
-        if not self.history or self.history[-1] != idx:
-            self.history.append(idx)
-        self.history_pos = len(self.history) - 1
+        self.controller.set_repeat_one(bool(self.repeat_var.get()))
 
     def _refresh_playlists(self, select: str | None = None) -> None:
         """Update playlist dropdown and refresh track table."""
@@ -445,74 +952,50 @@ class App(BaseTk):
             self.playlist_combo.set("")
         self._refresh_tracks()
 
+    def _watch_store(self) -> None:
+        """Timer: pick up playlist edits made by another window or a script (two stat() calls when idle).
+
+        The table and the play queue follow the store's ops; only the dropdown needs a hand.
+        """
+        if self.store.refresh():
+            names = self.store.list_playlists()
+            self.playlist_combo["values"] = names
+            if self.playlist_combo.get() not in names:
+                follow = self.track_table.playlist  # The table follows a rename
+                self.playlist_combo.set("")
+                self._refresh_playlists(select=follow)
+        self.after(STORE_WATCH_MS, self._watch_store)
+
+    @perf.timed("ui.refresh_tracks")
     def _refresh_tracks(self) -> None:
-        """Reload the track table for the selected playlist."""
-        # Clear existing rows
-        for iid in self.tree.get_children():
-            self.tree.delete(iid)
-
+        """Show the selected playlist in the track table (rows are drawn lazily)."""
         name = self.playlist_combo.get()
-        if not name:
-            return
-
-        tracks = self.store.get_tracks(name)
-        for i, t in enumerate(tracks, start=1):
-            # Backfill duration/title if missing (non-destructive to disk)
-            title = t.get("title") or Path(t["path"]).stem
-            duration = t.get("duration")
-            if duration is None:
-                # Try reading metadata for display; if unavailable use placeholder
-                _title, _artist, _dur = read_metadata(Path(t["path"]))
-                if _title and _artist:
-                    title = f"{_title} – {_artist}"
-                duration = _dur or "--:--"
-
-            # Insert row: display index is 1-based
-            self.tree.insert("", "end", values=(i, title, duration, t["path"]))
-
-    def _poll_playback(self) -> None:
-        """Poll periodically to detect track end and auto-advance if a queue is active."""
-        try:
-            # If we are not paused, not currently playing, but had a valid queue item, move on.
-            if (
-                not self.player.paused
-                and not self.player.is_playing()
-                and self.player.queue_len() > 0
-                and self.player.queue_index != -1
-            ):
-                # Decide next step based on repeat/shuffle mode
-                if self.repeat_one:
-                    self.player.play_index(self.player.queue_index)
-                elif self.shuffle:
-                    self._play_next_shuffle()
-                else:
-                    self.player.next_in_queue()
-                self._update_now_playing_label_from_queue()
-        finally:
-            # Re-arm the poll timer regardless of what happened above
-            self.after(POLL_MS, self._poll_playback)
+        self.track_table.show(name, self.store.get_tracks(name) if name else [])
+
+    def _arm_end_watch(self) -> None:
+        """(Re)schedule the track-end check for the current playback state (none while stopped/paused)."""
+        if self._end_watch is not None:
+            self.after_cancel(self._end_watch)
+            self._end_watch = None
+        delay = self.controller.next_check_ms()
+        if delay is not None:
+            self._end_watch = self.after(delay, self._on_end_watch)
+        self.seek_bar.refresh()  # Play, pause, seek, stop and track changes all pass through here
+        self._publish_state()
+
+    @perf.timed("ui.end_watch")
+    def _on_end_watch(self) -> None:
+        """Timer callback: let the controller advance on a track end, then re-arm."""
+        self._end_watch = None
+        if self.controller.check_end():
+            self._update_now_playing_label_from_queue()
+        self._arm_end_watch()
 
     def _update_now_playing_label_from_queue(self) -> None:
         """Update the 'Now playing' label from the player's current queue entry."""
-        tr = self.player.current_track()
-        if tr:
-            p = Path(tr["path"])
-            # Prefer stored title; fall back to metadata or filename
-            title = tr.get("title") or p.stem
-            if META_AVAILABLE and (not tr.get("title") or " – " not in tr.get("title", "")):
-                _t, _a, _ = read_metadata(p)
-                if _t and _a:
-                    title = f"{_t} – {_a}"
-            self.current_label_var.set(f"Now playing: {title}")
-            self.current_file = p
-        else:
-            # No active queue item; show last loaded file or default message
-            if self.current_file:
-                self.current_label_var.set(f"Loaded: {self.current_file.name}")
-            else:
-                self.current_label_var.set("No file loaded")
-
+        self.current_label_var.set(self.controller.now_playing())
 
 if __name__ == "__main__":
-    app = App()
+    # --startup-report: print time to first frame / interactive, then exit
+    app = App(startup_report="--startup-report" in sys.argv)
     app.mainloop()
@@ -0,0 +1,272 @@
+"""Track metadata helpers: ID3 title/artist and duration, plus a persistent cache.
+
+read_metadata() opens the file with mutagen on every call. MetadataCache sits in
+front of it so each file is parsed once per (path, size, mtime_ns):
+- a bounded in-memory LRU answers repeated lookups without touching the disk
+- a sidecar SQLite file (metadata_cache.sqlite) keeps results across sessions
+- a changed size or mtime invalidates the entry and the file is parsed again
+The same database keeps each file's loudness measurement (see loudness.py),
+validated the same way.
+"""
+
+from __future__ import annotations
+import importlib.util
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Iterable, List, Optional, Tuple
+
+import perf
+
+# --- Metadata support (ID3 tags and duration) ---
+# mutagen reads MP3 tags like Title/Artist and audio length. It is imported on the
+# first read rather than at startup; here we only check that it is installed.
+META_AVAILABLE = importlib.util.find_spec("mutagen") is not None  # pip install mutagen
+
+# (title, artist, duration_str) as returned by read_metadata()
+Meta = Tuple[Optional[str], Optional[str], Optional[str]]
+
+
+def fmt_duration(secs: float | int | None) -> str:
+    """Format seconds as MM:SS. Return placeholder for unknown."""
+    if secs is None:
+        return "--:--"
+    try:
+        secs = int(round(secs))
+        m, s = divmod(secs, 60)
+        return f"{m:02d}:{s:02d}"
+    except Exception:
+        return "--:--"
+
+
+def parse_duration(text: str | None) -> int | None:
+    """Inverse of fmt_duration: "MM:SS" -> seconds, None if missing or malformed."""
+    if not text:
+        return None
+    try:
+        m, s = text.split(":")
+        return int(m) * 60 + int(s)
+    except ValueError:
+        return None
+
+
+@perf.timed("metadata.read")
+def read_metadata(path: Path) -> Meta:
+    """Return (title, artist, duration_str). Falls back to (None, None, None) if unavailable."""
+    if not META_AVAILABLE:
+        return None, None, None
+    try:
+        from mutagen.mp3 import MP3  # Cheap after the first call (already in sys.modules)
+        from mutagen.id3 import ID3
+        # MP3(..., ID3=ID3) ensures we can read tag frames like TIT2 (title) and TPE1 (artist).
+        audio = MP3(str(path), ID3=ID3)
+        title = None
+        artist = None
+        if audio.tags:
+            t = audio.tags.get("TIT2")  # Title frame
+            a = audio.tags.get("TPE1")  # Lead artist frame
+            title = str(t.text[0]) if t and t.text else None
+            artist = str(a.text[0]) if a and a.text else None
+        # audio.info.length is the length in seconds (float)
+        duration = fmt_duration(getattr(audio.info, "length", None))
+        return title, artist, duration
+    except Exception:
+        # Malformed or missing tags shouldn't crash the app.
+        return None, None, None
+
+
+class MetadataCache:
+    """read_metadata() with an in-memory LRU and an on-disk SQLite cache in front of it.
+
+    Entries are keyed by path and validated against the file's (size, mtime_ns), so
+    editing or replacing a file is picked up automatically. Safe to call from worker
+    threads.
+    """
+
+    def __init__(self, db_path: Path | str = "metadata_cache.sqlite", max_entries: int = 4096) -> None:
+        self.db_path = Path(db_path)
+        self.max_entries = max_entries
+        # path -> (size, mtime_ns, meta); most recently used at the end
+        self._lru: "OrderedDict[str, tuple[int, int, Meta]]" = OrderedDict()
+        self._lock = threading.Lock()
+        # Counters: memory hits, disk (SQLite) hits, and misses that needed a parse
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._db: Optional[sqlite3.Connection] = self._open_db()
+
+    def _open_db(self) -> Optional[sqlite3.Connection]:
+        """Open (or create) the sidecar database; run memory-only if that fails."""
+        try:
+            db = sqlite3.connect(str(self.db_path), check_same_thread=False)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS metadata ("
+                " path TEXT PRIMARY KEY, size INTEGER NOT NULL, mtime_ns INTEGER NOT NULL,"
+                " title TEXT, artist TEXT, duration TEXT)"
+            )
+            # lufs/peak are NULL for files that were analyzed but are silent or undecodable.
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS loudness ("
+                " path TEXT PRIMARY KEY, size INTEGER NOT NULL, mtime_ns INTEGER NOT NULL, lufs REAL, peak REAL)"
+            )
+            db.commit()
+            return db
+        except sqlite3.Error:
+            return None
+
+    # ---- lookups ----
+    def get(self, path: Path | str) -> Meta:
+        """Return (title, artist, duration_str) for path, parsing the file only on a miss."""
+        key = str(path)
+        try:
+            st = os.stat(key)
+        except OSError:
+            # Missing/unreadable files are not cached; read_metadata reports the failure.
+            return read_metadata(Path(key))
+        size, mtime_ns = st.st_size, st.st_mtime_ns
+
+        with self._lock:
+            entry = self._lru.get(key)
+            if entry is not None and entry[0] == size and entry[1] == mtime_ns:
+                self._lru.move_to_end(key)
+                self.hits += 1
+                return entry[2]
+            meta = self._db_get(key, size, mtime_ns)
+            if meta is not None:
+                self._remember(key, size, mtime_ns, meta)
+                self.disk_hits += 1
+                return meta
+
+        # Parse outside the lock so worker threads don't serialize on mutagen.
+        meta = read_metadata(Path(key))
+        with self._lock:
+            self.misses += 1
+            self._remember(key, size, mtime_ns, meta)
+            # Without mutagen every result is (None, None, None); don't persist that.
+            if META_AVAILABLE:
+                self._db_put(key, size, mtime_ns, meta)
+        return meta
+
+    def invalidate(self, path: Path | str) -> None:
+        """Drop any cached entry for path (memory and disk)."""
+        key = str(path)
+        with self._lock:
+            self._lru.pop(key, None)
+            if self._db is not None:
+                try:
+                    self._db.execute("DELETE FROM metadata WHERE path = ?", (key,))
+                    self._db.commit()
+                except sqlite3.Error:
+                    pass
+
+    def stats(self) -> dict[str, int]:
+        """Hit/miss counters plus the current LRU size."""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "lru_entries": len(self._lru),
+            }
+
+    # ---- loudness ----
+    def loudness(self, path: Path | str) -> Optional[Tuple[float, float]]:
+        """(integrated LUFS, sample peak) measured for path's current contents, or None."""
+        key = str(path)
+        try:
+            st = os.stat(key)
+        except OSError:
+            return None
+        with self._lock:
+            if self._db is None:
+                return None
+            try:
+                row = self._db.execute(
+                    "SELECT size, mtime_ns, lufs, peak FROM loudness WHERE path = ?", (key,)
+                ).fetchone()
+            except sqlite3.Error:
+                return None
+        if row is None or row[0] != st.st_size or row[1] != st.st_mtime_ns or row[2] is None:
+            return None
+        return row[2], row[3]
+
+    def put_loudness(self, path: str, size: int, mtime_ns: int, value: Optional[Tuple[float, float]]) -> None:
+        """Store a measurement (None: analyzed, nothing to measure) for path at (size, mtime_ns)."""
+        lufs, peak = value if value is not None else (None, None)
+        with self._lock:
+            if self._db is None:
+                return
+            try:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO loudness (path, size, mtime_ns, lufs, peak) VALUES (?, ?, ?, ?, ?)",
+                    (path, size, mtime_ns, lufs, peak),
+                )
+                self._db.commit()
+            except sqlite3.Error:
+                pass
+
+    def without_loudness(self, paths: Iterable[str]) -> List[Tuple[str, int, int]]:
+        """(path, size, mtime_ns) of the existing files among paths that have no valid measurement."""
+        with self._lock:
+            known = {}
+            if self._db is not None:
+                try:
+                    known = {p: (s, m) for p, s, m in self._db.execute("SELECT path, size, mtime_ns FROM loudness")}
+                except sqlite3.Error:
+                    pass
+        todo = []
+        for p in paths:
+            try:
+                st = os.stat(p)
+            except OSError:
+                continue
+            if known.get(p) != (st.st_size, st.st_mtime_ns):
+                todo.append((p, st.st_size, st.st_mtime_ns))
+        return todo
+
+    def close(self) -> None:
+        """Close the SQLite connection (the in-memory LRU keeps working)."""
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+    # ---- internals (caller holds self._lock) ----
+    def _remember(self, key: str, size: int, mtime_ns: int, meta: Meta) -> None:
+        """Insert into the LRU, evicting the least recently used entries past the cap."""
+        self._lru[key] = (size, mtime_ns, meta)
+        self._lru.move_to_end(key)
+        while len(self._lru) > self.max_entries:
+            self._lru.popitem(last=False)
+
+    def _db_get(self, key: str, size: int, mtime_ns: int) -> Optional[Meta]:
+        """Fetch a still-valid row from SQLite, or None."""
+        if self._db is None:
+            return None
+        try:
+            row = self._db.execute(
+                "SELECT size, mtime_ns, title, artist, duration FROM metadata WHERE path = ?", (key,)
+            ).fetchone()
+        except sqlite3.Error:
+            return None
+        if row is None or row[0] != size or row[1] != mtime_ns:
+            return None
+        return row[2], row[3], row[4]
+
+    def _db_put(self, key: str, size: int, mtime_ns: int, meta: Meta) -> None:
+        """Insert or replace the row for key."""
+        if self._db is None:
+            return
+        try:
+            self._db.execute(
+                "INSERT OR REPLACE INTO metadata (path, size, mtime_ns, title, artist, duration)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (key, size, mtime_ns, *meta),
+            )
+            self._db.commit()
+        except sqlite3.Error:
+            pass
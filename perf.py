@@ -0,0 +1,173 @@
+"""Lightweight timing instrumentation for hot paths.
+
+Decorate a function with @timed("name") (or wrap a block in span("name")) and,
+while instrumentation is enabled, every call adds its duration to a Stat:
+call count, total, max and a log-scale histogram (eighth-octave buckets, so
+percentiles are within ~9% and memory stays constant however long it runs).
+
+Disabled (the default) a decorated call costs one global flag check. Enable it
+with the MP3_PLAYER_PERF=1 environment variable, perf.enable(), or by opening
+the debug panel (F12 in the app, see perf_panel.py). snapshot() returns the
+numbers, export(path) writes them as JSON (or CSV for a .csv path).
+"""
+
+from __future__ import annotations
+import functools
+import json
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, TypeVar
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+BUCKETS_PER_OCTAVE = 8
+
+_enabled = os.environ.get("MP3_PLAYER_PERF", "") not in ("", "0")
+_lock = threading.Lock()  # Metadata reads are timed on worker threads
+
+
+class Stat:
+    """Counters and latency histogram for one instrumented name (seconds)."""
+
+    __slots__ = ("count", "total", "max", "buckets")
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.buckets: Dict[int, int] = {}  # bucket -> samples; bucket b covers [2^(b/8), 2^((b+1)/8)) µs
+
+    def add(self, seconds: float) -> None:
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+        b = math.floor(math.log2(max(seconds, 1e-7) * 1e6) * BUCKETS_PER_OCTAVE)
+        self.buckets[b] = self.buckets.get(b, 0) + 1
+
+    def percentile(self, q: float) -> float:
+        """Upper edge of the bucket holding the q-th quantile (0..1), capped at max."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for b in sorted(self.buckets):
+            seen += self.buckets[b]
+            if seen >= rank:
+                return min(self.max, 2 ** ((b + 1) / BUCKETS_PER_OCTAVE) / 1e6)
+        return self.max
+
+    def summary(self) -> Dict[str, float]:
+        """count, mean/p50/p95/max in milliseconds, total in seconds."""
+        return {
+            "count": self.count,
+            "total_s": self.total,
+            "mean_ms": self.total / self.count * 1000 if self.count else 0.0,
+            "p50_ms": self.percentile(0.50) * 1000,
+            "p95_ms": self.percentile(0.95) * 1000,
+            "max_ms": self.max * 1000,
+        }
+
+
+_stats: Dict[str, Stat] = {}
+
+
+# ---- switches ----
+def enable() -> None:
+    """Start collecting."""
+    global _enabled
+    _enabled = True
+
+
+def disable() -> None:
+    """Stop collecting (numbers gathered so far are kept)."""
+    global _enabled
+    _enabled = False
+
+
+def enabled() -> bool:
+    return _enabled
+
+
+def reset() -> None:
+    """Forget everything recorded so far."""
+    with _lock:
+        _stats.clear()
+
+
+# ---- recording ----
+def record(name: str, seconds: float) -> None:
+    """Add one sample (no-op while disabled)."""
+    if not _enabled:
+        return
+    with _lock:
+        stat = _stats.get(name)
+        if stat is None:
+            stat = _stats[name] = Stat()
+        stat.add(seconds)
+
+
+def timed(name: str) -> Callable[[F], F]:
+    """Decorator: time every call of the function under name."""
+    def decorate(fn: F) -> F:
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return fn(*args, **kwargs)
+            t0 = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                record(name, time.perf_counter() - t0)
+        return wrapper  # type: ignore[return-value]
+    return decorate
+
+
+@contextmanager
+def span(name: str) -> Iterator[None]:
+    """Context manager: time the enclosed block under name."""
+    if not _enabled:
+        yield
+        return
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(name, time.perf_counter() - t0)
+
+
+# ---- reporting ----
+def snapshot() -> Dict[str, Dict[str, float]]:
+    """Summary per name (see Stat.summary), sorted by name."""
+    with _lock:
+        return {name: _stats[name].summary() for name in sorted(_stats)}
+
+
+def report() -> str:
+    """Plain-text table of snapshot()."""
+    lines = [f"{'name':<28} {'count':>8} {'mean ms':>9} {'p50 ms':>9} {'p95 ms':>9} {'max ms':>9}"]
+    for name, s in snapshot().items():
+        lines.append(
+            f"{name:<28} {s['count']:>8} {s['mean_ms']:>9.2f} {s['p50_ms']:>9.2f} {s['p95_ms']:>9.2f} {s['max_ms']:>9.2f}"
+        )
+    return "\n".join(lines)
+
+
+def export(path: Path | str) -> None:
+    """Write snapshot() to path: CSV if it ends in .csv, JSON otherwise."""
+    path = Path(path)
+    data = snapshot()
+    if path.suffix.lower() == ".csv":
+        import csv
+        with path.open("w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(["name", "count", "total_s", "mean_ms", "p50_ms", "p95_ms", "max_ms"])
+            for name, s in data.items():
+                writer.writerow([name, s["count"], s["total_s"], s["mean_ms"], s["p50_ms"], s["p95_ms"], s["max_ms"]])
+    else:
+        payload = {"created": time.strftime("%Y-%m-%dT%H:%M:%S"), "stats": data}
+        path.write_text(json.dumps(payload, indent=2), encoding="utf-8")
@@ -0,0 +1,95 @@
+"""Debug window showing live perf.py numbers (opened with F12 from the main window)."""
+
+from __future__ import annotations
+import tkinter as tk
+from tkinter import filedialog, ttk
+from typing import Callable, Dict, Optional
+
+import perf
+
+REFRESH_MS = 1000  # Table refresh interval.
+
+_COLUMNS = (
+    ("count", "Calls", 70),
+    ("mean_ms", "Mean ms", 80),
+    ("p50_ms", "p50 ms", 80),
+    ("p95_ms", "p95 ms", 80),
+    ("max_ms", "Max ms", 80),
+)
+
+
+class PerfPanel(tk.Toplevel):
+    """Table of instrumented hot paths with Reset / Export; collection stays on while it is open.
+
+    extra, if given, returns further live values (e.g. playback gaps, decode buffers)
+    shown on a line below the table.
+    """
+
+    def __init__(self, master, extra: Optional[Callable[[], Dict[str, float]]] = None) -> None:
+        super().__init__(master)
+        self.title("Performance")
+        self.geometry("560x320")
+        self.columnconfigure(0, weight=1)
+        self.rowconfigure(0, weight=1)
+        self._was_enabled = perf.enabled()
+        perf.enable()
+
+        self.tree = ttk.Treeview(self, columns=[c for c, _, _ in _COLUMNS], show="tree headings")
+        self.tree.heading("#0", text="Name")
+        self.tree.column("#0", width=200)
+        for key, text, width in _COLUMNS:
+            self.tree.heading(key, text=text)
+            self.tree.column(key, width=width, anchor=tk.E)
+        self.tree.grid(row=0, column=0, sticky="nsew", padx=8, pady=8)
+
+        self._extra = extra
+        self.extra_var = tk.StringVar()
+        ttk.Label(self, textvariable=self.extra_var, wraplength=540).grid(row=2, column=0, sticky="w", padx=8, pady=(0, 8))
+
+        btns = ttk.Frame(self)
+        btns.grid(row=1, column=0, sticky="e", padx=8, pady=(0, 8))
+        ttk.Button(btns, text="Reset", command=self._on_reset).pack(side=tk.LEFT, padx=2)
+        ttk.Button(btns, text="Export…", command=self._on_export).pack(side=tk.LEFT, padx=2)
+
+        self.protocol("WM_DELETE_WINDOW", self._on_close)
+        self._job = None
+        self._refresh()
+
+    def _refresh(self) -> None:
+        """Redraw the table from perf.snapshot() and re-arm the timer."""
+        stats = perf.snapshot()
+        for name in set(self.tree.get_children()) - set(stats):
+            self.tree.delete(name)
+        for name, s in stats.items():
+            values = [s["count"]] + [f"{s[key]:.2f}" for key, _, _ in _COLUMNS[1:]]
+            if self.tree.exists(name):
+                self.tree.item(name, values=values)
+            else:
+                self.tree.insert("", "end", iid=name, text=name, values=values)
+        if self._extra is not None:
+            self.extra_var.set("   ".join(
+                f"{k} {v:.2f}" if isinstance(v, float) else f"{k} {v}" for k, v in self._extra().items()
+            ))
+        self._job = self.after(REFRESH_MS, self._refresh)
+
+    def _on_reset(self) -> None:
+        perf.reset()
+        self.tree.delete(*self.tree.get_children())
+
+    def _on_export(self) -> None:
+        path = filedialog.asksaveasfilename(
+            parent=self,
+            title="Export timings",
+            defaultextension=".json",
+            filetypes=[("JSON", "*.json"), ("CSV", "*.csv")],
+        )
+        if path:
+            perf.export(path)
+
+    def _on_close(self) -> None:
+        """Stop the timer; turn collection back off unless it was on before the panel opened."""
+        if self._job is not None:
+            self.after_cancel(self._job)
+        if not self._was_enabled:
+            perf.disable()
+        self.destroy()
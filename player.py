@@ -1,73 +1,309 @@
-"""Audio playback helper built on pygame.mixer.music. Keeps track of:
+"""Audio playback helper on top of an AudioBackend (pygame.mixer.music by default). Keeps track of:
 - current file
 - a queue (list of dicts, each with at least {"path": ...})
 - a queue index
 - paused state
+- when the current track started, so the caller knows when it should end
+
+Track ends are reported by the backend itself (pygame posts MUSIC_END when a
+track finishes) and take_end_event() drains them. Callers schedule a check
+around seconds_remaining() instead of polling get_busy(). All times come from
+the backend's clock, so with audio.NullBackend playback runs on virtual time.
+
+Gapless transitions: the caller predicts the next queue index and calls
+prefetch(index) once a track starts; the file is read ahead on a background
+thread (warming the OS cache). Shortly before the end, queue_prefetched() hands
+it to the backend's queue(), so the mixer switches tracks itself. When the
+end event arrives, advance_to(index) adopts the already-playing queued track,
+or loads the requested one if the prediction was wrong. Every transition's gap
+is recorded (see gap_stats()).
+
+Crossfading: with a backend whose crossfade is > 0 (crossfade.CrossfadeBackend)
+the controller queues the next track `crossfade` seconds before the end; the
+backend starts it at once and reports the end, so advance_to() adopts it while
+the old track fades out. switch_backend() swaps backends mid-track.
+
+Position: elapsed() is worked out from the backend's monotonic clock and an
+anchor that play(), pause() and seek() move, so reading it costs nothing and
+nothing polls the mixer. start_at() resumes a track at a position, playing
+or paused (session restore).
+
+Volume normalization: if gain_for is set, each track plays at the user volume
+times gain_for(path) (a factor in [0, 1], see loudness.track_gain), applied
+when the track is loaded or adopted from the mixer's queue.
 """
 
 from __future__ import annotations
-import pygame
+from collections import deque
 from pathlib import Path
-from typing import List, Dict, Optional
+from typing import Callable, Deque, List, Dict, Optional
+
+import perf
+from audio import AudioBackend, PygameBackend
+from track import Track
 
 
 class Player:
-    """Thin wrapper around pygame.mixer.music for MP3 playback and simple queues."""
+    """Thin wrapper around an audio backend for MP3 playback and simple queues."""
 
-    def __init__(self) -> None:
-        # Initialize the mixer subsystem (opens audio device)
-        pygame.mixer.init()
+    def __init__(self, backend: Optional[AudioBackend] = None) -> None:
+        # Default backend (pygame.mixer) is only opened on first use; see the backend property.
+        self._backend = backend
+        self._volume = 0.7  # Start at 70% volume (applied when the backend opens)
+        self._gain = 1.0    # Normalization factor of the current track
+        self.gain_for: Optional[Callable[[str], float]] = None  # Per-track gain lookup (None: off)
+        if backend is not None:
+            backend.set_volume(self._volume)
         self.current_file: Optional[Path] = None
-        self.queue: List[Dict[str, str]] = []  # each: {"path": str, "title": str, ...}
+        self.queue: List[Track] = []  # Shared with the playlist store
         self.queue_index: int = -1
         self.paused: bool = False
-        pygame.mixer.music.set_volume(0.7)  # Start at 70% volume
+        self.length: Optional[float] = None   # Length of current_file in seconds, if known
+        self._anchor: float = 0.0             # clock() at which position 0 would have played
+        self._paused_at: Optional[float] = None
+        self._started: bool = False           # play() called and no end/stop seen since
+        self._ended_at: Optional[float] = None  # clock() when the last end event was seen
+        self._prefetch_index: Optional[int] = None  # Predicted next queue index
+        self._queued_index: Optional[int] = None    # Index handed to music.queue(), if any
+        self.gaps_ms: Deque[float] = deque(maxlen=200)  # Recent inter-track gaps
 
     # ---- low level ----
-    def load(self, file_path: Path | str) -> None:
-        """Load an MP3 into the mixer (does not start playback)."""
+    @property
+    def backend(self) -> AudioBackend:
+        """The audio backend, opened on first use (starting pygame's mixer takes a while)."""
+        if self._backend is None:
+            self._backend = PygameBackend()
+            self._backend.set_volume(self._volume * self._gain)
+        return self._backend
+
+    @perf.timed("player.load")
+    def load(self, file_path: Path | str, length: float | None = None) -> None:
+        """Load an MP3 into the mixer (does not start playback). length is in seconds, if known."""
         self.current_file = Path(file_path)
-        pygame.mixer.music.load(str(self.current_file))
+        self.backend.load(str(self.current_file), length)
+        self.length = self.backend.length() or length
+        self._queued_index = None  # load() drops anything queued in the mixer
+        self.apply_gain()
 
+    @perf.timed("player.play")
     def play(self, start_pos: float = 0.0) -> None:
         """Start playback at start_pos seconds (default 0)."""
         if self.current_file is None:
             return
-        pygame.mixer.music.play(start=start_pos)
+        self.backend.play(start_pos)
+        # Replacing a playing track posts an end event for it; that one isn't ours.
+        self.backend.discard_end()
+        self._queued_index = None
+        self._prefetch_index = None  # A new track needs a new prediction
+        self._anchor = self.backend.clock() - start_pos
+        self._paused_at = None
+        self._started = True
         self.paused = False
 
     def pause(self) -> None:
         """Toggle pause/unpause."""
         if self.paused:
-            pygame.mixer.music.unpause()
+            self.backend.unpause()
+            if self._paused_at is not None:
+                self._anchor += self.backend.clock() - self._paused_at
+            self._paused_at = None
             self.paused = False
         else:
-            pygame.mixer.music.pause()
+            self.backend.pause()
+            self._paused_at = self.backend.clock()
             self.paused = True
 
+    def seek(self, position: float) -> None:
+        """Continue the current track from position seconds (clamped to it; paused stays paused)."""
+        if self._started:
+            self.start_at(position, self.paused)
+
+    def start_at(self, position: float, paused: bool = False) -> None:
+        """Play the loaded file from position seconds, or sit paused there without a sound."""
+        if self.current_file is None:
+            return
+        position = max(0.0, position)
+        if self.length is not None:
+            position = min(position, self.length)
+        if not paused:
+            self.play(position)
+            return
+        self.backend.set_volume(0.0)  # Silence the moment between play() and pause()
+        self.play(position)
+        self.pause()
+        self.backend.set_volume(self._volume * self._gain)
+
     def stop(self) -> None:
         """Stop playback and clear paused flag."""
-        pygame.mixer.music.stop()
+        if self._backend is not None:  # Nothing to stop if audio was never opened
+            self._backend.stop()
+            self._backend.discard_end()  # A manual stop is not a track end.
+        self._queued_index = None
+        self._prefetch_index = None
+        self._started = False
+        self._paused_at = None
         self.paused = False
 
+    @property
+    def crossfade(self) -> float:
+        """Seconds the next track overlaps the current one (0: gapless hand-off at the end)."""
+        return self._backend.crossfade if self._backend is not None else 0.0
+
+    def switch_backend(self, backend: AudioBackend) -> None:
+        """Replace the audio backend, continuing the current track from where it was (paused stays paused)."""
+        position, was_active, was_paused = self.elapsed(), self._started, self.paused
+        if self._backend is not None:
+            self._backend.stop()
+            self._backend.close()
+        self._backend = backend
+        backend.set_volume(self._volume * self._gain)
+        self._queued_index = None
+        self._prefetch_index = None
+        if self.current_file is None:
+            return
+        self.load(self.current_file, self.length)
+        if was_active:
+            self.play(position)
+            if was_paused:
+                self.pause()
+
+    @property
+    def volume(self) -> float:
+        """User volume in [0.0, 1.0] (before normalization gain)."""
+        return self._volume
+
     def set_volume(self, vol: float) -> None:
         """Set volume in [0.0, 1.0]. Input is clamped to this range."""
-        pygame.mixer.music.set_volume(max(0.0, min(1.0, vol)))
+        self._volume = max(0.0, min(1.0, vol))
+        if self._backend is not None:
+            self._backend.set_volume(self._volume * self._gain)
+
+    def apply_gain(self) -> None:
+        """Look up the current file's normalization gain and apply it (also after gain_for changes)."""
+        gain = 1.0
+        if self.gain_for is not None and self.current_file is not None:
+            gain = max(0.0, min(1.0, self.gain_for(str(self.current_file))))
+        if gain != self._gain:
+            self._gain = gain
+            self.set_volume(self._volume)
 
     def is_playing(self) -> bool:
         """True if audio is playing (not paused)."""
         # get_busy() is True while playing OR paused; we add our paused flag.
-        return pygame.mixer.music.get_busy() and not self.paused
+        return self.backend.get_busy() and not self.paused
+
+    # ---- end-of-track detection ----
+    @property
+    def active(self) -> bool:
+        """True from play() until that track ends or is stopped (paused counts as active)."""
+        return self._started
+
+    def elapsed(self) -> float:
+        """Seconds played of the current track (frozen while paused)."""
+        if not self._started:
+            return 0.0
+        now = self._paused_at if self._paused_at is not None else self.backend.clock()
+        return max(0.0, now - self._anchor)
+
+    def seconds_remaining(self) -> Optional[float]:
+        """Expected seconds until the current track ends, or None if its length is unknown."""
+        if self.length is None or not self._started:
+            return None
+        return max(0.0, self.length - self.elapsed())
+
+    def take_end_event(self) -> bool:
+        """True (once) if the playing track has finished since the last call."""
+        if not self._started or self.paused:
+            return False
+        ended = self.backend.take_end()
+        if ended:
+            self._started = False
+            self._ended_at = self.backend.clock()
+        return ended
+
+    # ---- gapless hand-off ----
+    @property
+    def prefetched_index(self) -> Optional[int]:
+        """Queue index predicted by the last prefetch() for the current track, if any."""
+        return self._prefetch_index
+
+    def prefetch(self, index: Optional[int]) -> None:
+        """Predict the next queue index and start reading its file ahead (None clears it).
+
+        If a different track was already queued in the mixer, it is replaced.
+        """
+        if index is not None and not 0 <= index < len(self.queue):
+            index = None
+        self._prefetch_index = index
+        if index is None:
+            return
+        self.backend.preload(self.queue[index].path)
+        if self._queued_index is not None and self._queued_index != index:
+            self.queue_prefetched()
+
+    def queue_prefetched(self) -> None:
+        """Hand the predicted next track to the mixer so it starts without a gap."""
+        index = self._prefetch_index
+        if index is None or index == self._queued_index or not self._started:
+            return
+        track = self.queue[index]
+        if self.backend.queue(track.path, track.seconds):
+            self._queued_index = index
+        else:
+            self._queued_index = None  # Unreadable file: advance_to() will report it on load.
+
+    def advance_to(self, index: Optional[int]) -> None:
+        """After an end event, move to queue index (None = end of queue, stop).
+
+        Adopts the mixer's queued track if it is the one requested; otherwise loads it.
+        """
+        ended_at = self._ended_at if self._ended_at is not None else self.backend.clock()
+        queued, self._queued_index = self._queued_index, None
+        self._prefetch_index = None
+        if index is None or not self.queue:
+            self.stop()
+            self.queue_index = -1
+            return
+        if index == queued and self.backend.get_busy():
+            # The mixer already started it when the previous track ended.
+            track = self.queue[index]
+            self.queue_index = index
+            self.current_file = Path(track.path)
+            self.length = self.backend.length() or track.seconds
+            self.apply_gain()  # The mixer switched by itself; the new track's gain lands now
+            self._anchor = ended_at
+            self._paused_at = None
+            self._started = True
+            self.paused = False
+            self.gaps_ms.append(0.0)
+            return
+        self.play_index(index)
+        self.gaps_ms.append((self.backend.clock() - ended_at) * 1000.0)
+
+    def gap_stats(self) -> Dict[str, float]:
+        """Inter-track gap stats in ms: count/last/mean/max.
+
+        A gap is the time from seeing a track's end event to the next track playing;
+        it is 0 when the mixer switched to the queued track by itself.
+        """
+        if not self.gaps_ms:
+            return {"count": 0, "last": 0.0, "mean": 0.0, "max": 0.0}
+        return {
+            "count": len(self.gaps_ms),
+            "last": self.gaps_ms[-1],
+            "mean": sum(self.gaps_ms) / len(self.gaps_ms),
+            "max": max(self.gaps_ms),
+        }
 
     # ---- queue / playlist ----
-    def play_file_now(self, file_path: Path | str) -> None:
+    def play_file_now(self, file_path: Path | str, length: float | None = None) -> None:
         """Clear the queue and immediately play a single file."""
         self.queue = []
         self.queue_index = -1
-        self.load(file_path)
+        self.load(file_path, length)
         self.play()
 
-    def load_queue(self, tracks: List[Dict[str, str]]) -> None:
+    def load_queue(self, tracks: List[Track]) -> None:
         """Replace the queue with a new list of tracks (dicts with at least 'path')."""
         self.queue = list(tracks)
         self.queue_index = -1
@@ -106,7 +342,26 @@ class Player:
         self.queue_index = max(0, self.queue_index - 1)
         self._play_current_from_queue()
 
-    def current_track(self) -> Optional[Dict[str, str]]:
+    def remove_from_queue(self, index: int) -> bool:
+        """Drop queue entry index, keeping queue_index on the same track.
+
+        Returns True if the removed entry was the current track; queue_index then
+        points at the entry that followed it.
+        """
+        if not 0 <= index < len(self.queue):
+            return False
+        self.queue.pop(index)
+        self._prefetch_index = None  # Indices moved; the caller re-predicts
+        if self._queued_index is not None and self._queued_index > index:
+            self._queued_index -= 1
+        elif self._queued_index == index:
+            self._queued_index = -1  # Queued in the mixer but gone from the queue: never adopt it
+        if index < self.queue_index:
+            self.queue_index -= 1
+            return False
+        return index == self.queue_index
+
+    def current_track(self) -> Optional[Track]:
         """Return the current track dict from the queue, or None."""
         if self.queue and 0 <= self.queue_index < len(self.queue):
             return self.queue[self.queue_index]
@@ -119,5 +374,5 @@ class Player:
     def _play_current_from_queue(self) -> None:
         """Helper: load & play the track at queue_index."""
         track = self.queue[self.queue_index]
-        self.load(track["path"])
+        self.load(track.path, track.seconds)
         self.play()
@@ -0,0 +1,212 @@
+"""Read and write playlist files (M3U/M3U8 and PLS) for exchange with other players.
+
+Readers are generators: they read the file line by line and yield one Entry at
+a time, so memory stays flat however long the playlist is, and the caller can
+feed the entries straight into store.add_tracks() (one save for the batch).
+Writers likewise stream tracks to a temp file that replaces the target only
+once it is complete.
+
+Paths:
+- relative entries are resolved against the playlist file's folder; on export,
+  tracks under that folder are written relative to it (so the folder can be
+  moved as a whole) and everything else absolutely
+- file:// URLs are converted to paths; other URLs (streams) are skipped
+- backslash separators from Windows playlists are accepted on any OS
+
+Encodings: .m3u8 is UTF-8 by definition. Plain .m3u has no declared encoding;
+each line is decoded as UTF-8 and, failing that, as Windows-1252 (what older
+Windows players write). Both are written as UTF-8, as is .pls.
+"""
+
+from __future__ import annotations
+import os
+import re
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, NamedTuple, Optional
+from urllib.parse import urlsplit
+
+import perf
+from track import Track
+
+PLAYLIST_EXTENSIONS = frozenset({".m3u", ".m3u8", ".pls"})
+LEGACY_ENCODING = "cp1252"  # Fallback for plain .m3u lines that aren't UTF-8
+
+_URL = re.compile(r"^[a-z][a-z0-9+.-]+://", re.IGNORECASE)
+_PLS_KEY = re.compile(r"^(file|title|length)(\d+)$", re.IGNORECASE)
+
+
+class Entry(NamedTuple):
+    """One playlist file entry; title and seconds are None when the file doesn't give them."""
+
+    path: str
+    title: Optional[str]
+    seconds: Optional[int]
+
+
+# ---- reading ----
+def read_playlist(path: Path | str) -> Iterator[Entry]:
+    """Entries of an .m3u, .m3u8 or .pls file. Raises ValueError for other extensions."""
+    ext = Path(path).suffix.lower()
+    if ext == ".pls":
+        return read_pls(path)
+    if ext in (".m3u", ".m3u8"):
+        return read_m3u(path)
+    raise ValueError(f"Unsupported playlist type: {ext or Path(path).name}")
+
+
+def _lines(path: Path | str, encoding: Optional[str]) -> Iterator[str]:
+    """Stripped, non-empty lines; encoding None means UTF-8 with a per-line legacy fallback."""
+    with open(path, "rb") as f:
+        first = True
+        for raw in f:
+            if first:
+                raw = raw.removeprefix(b"\xef\xbb\xbf")
+                first = False
+            if encoding is not None:
+                line = raw.decode(encoding, errors="replace")
+            else:
+                try:
+                    line = raw.decode("utf-8")
+                except UnicodeDecodeError:
+                    line = raw.decode(LEGACY_ENCODING, errors="replace")
+            line = line.strip()
+            if line:
+                yield line
+
+
+def _resolve(ref: str, base: str) -> Optional[str]:
+    """Absolute local path for a playlist reference, or None for a remote URL."""
+    if _URL.match(ref):
+        parts = urlsplit(ref)
+        if parts.scheme.lower() != "file":
+            return None
+        from urllib.request import url2pathname  # Pulls in http.client, email...: only when a file:// URL shows up
+        ref = url2pathname(parts.path)
+    if os.sep == "/" and "\\" in ref:
+        ref = ref.replace("\\", "/")
+    if not os.path.isabs(ref):
+        ref = os.path.join(base, ref)
+    return os.path.normpath(ref)
+
+
+def _seconds(text: str) -> Optional[int]:
+    """Length field as whole seconds; None if missing, negative ("unknown") or malformed."""
+    try:
+        secs = int(round(float(text)))
+    except ValueError:
+        return None
+    return secs if secs >= 0 else None
+
+
+def read_m3u(path: Path | str) -> Iterator[Entry]:
+    """Entries of an M3U/M3U8 file, with #EXTINF length and title when present."""
+    base = os.path.dirname(os.path.abspath(path))
+    encoding = "utf-8" if Path(path).suffix.lower() == ".m3u8" else None
+    title: Optional[str] = None
+    seconds: Optional[int] = None
+    for line in _lines(path, encoding):
+        if line.startswith("#"):
+            if line[:8].upper() == "#EXTINF:":
+                # "#EXTINF:<seconds>[ attr="..."],<title>"
+                head, _, text = line[8:].partition(",")
+                seconds = _seconds(head.split(None, 1)[0]) if head.strip() else None
+                title = text.strip() or None
+            continue
+        resolved = _resolve(line, base)
+        if resolved is not None:
+            yield Entry(resolved, title, seconds)
+        title = seconds = None
+
+
+def read_pls(path: Path | str) -> Iterator[Entry]:
+    """Entries of a PLS file, in entry-number order.
+
+    Keys are expected grouped by entry (File1, Title1, Length1, File2, ...), as
+    every player writes them, so only the entries not yet emitted are held: an
+    entry is emitted once a key for a higher number appears.
+    """
+    base = os.path.dirname(os.path.abspath(path))
+    pending: Dict[int, Dict[str, str]] = {}  # Entry number -> {"file": ..., "title": ..., "length": ...}
+
+    def flush(below: Optional[int]) -> Iterator[Entry]:
+        for n in sorted(k for k in pending if below is None or k < below):
+            fields = pending.pop(n)
+            ref = fields.get("file")
+            resolved = _resolve(ref, base) if ref else None
+            if resolved is not None:
+                yield Entry(resolved, fields.get("title") or None, _seconds(fields.get("length", "")))
+
+    for line in _lines(path, "utf-8"):
+        key, sep, value = line.partition("=")
+        m = _PLS_KEY.match(key.strip()) if sep else None
+        if m is None:
+            continue  # [playlist], NumberOfEntries, Version, comments
+        n = int(m.group(2))
+        if n not in pending:
+            yield from flush(n)
+        pending.setdefault(n, {})[m.group(1).lower()] = value.strip()
+    yield from flush(None)
+
+
+# ---- writing ----
+def _ref(track_path: str, prefix: Optional[str]) -> str:
+    """How track_path is written: relative if it lies under the folder prefix (None: always absolute).
+
+    A string prefix test rather than os.path.relpath, which costs more than the rest of the export.
+    """
+    if prefix is not None and os.path.normcase(track_path[:len(prefix)]) == prefix:
+        return track_path[len(prefix):]
+    return track_path
+
+
+def _write(path: Path | str, lines: Iterable[str]) -> None:
+    """Write lines to path atomically (temp file + rename)."""
+    target = Path(path)
+    tmp = target.with_name(target.name + ".tmp")
+    try:
+        with tmp.open("w", encoding="utf-8", newline="\n") as f:
+            for line in lines:
+                f.write(line)
+                f.write("\n")
+        os.replace(tmp, target)
+    finally:
+        if tmp.exists():
+            tmp.unlink()
+
+
+def write_playlist(path: Path | str, tracks: Iterable[Track], relative: bool = True) -> int:
+    """Write tracks as .m3u/.m3u8 (extended) or .pls by path's extension. Returns the count written.
+
+    Raises ValueError for other extensions.
+    """
+    ext = Path(path).suffix.lower()
+    if ext not in PLAYLIST_EXTENSIONS:
+        raise ValueError(f"Unsupported playlist type: {ext or Path(path).name}")
+    folder = os.path.dirname(os.path.abspath(path))
+    prefix = os.path.normcase(os.path.join(folder, "")) if relative else None  # "/music/" -> "a/b.mp3"
+    count = 0
+
+    def m3u() -> Iterator[str]:
+        nonlocal count
+        yield "#EXTM3U"
+        for t in tracks:
+            secs = t.seconds if t.seconds is not None else -1
+            yield f"#EXTINF:{secs},{t.title or Path(t.path).stem}"
+            yield _ref(t.path, prefix)
+            count += 1
+
+    def pls() -> Iterator[str]:
+        nonlocal count
+        yield "[playlist]"
+        for t in tracks:
+            count += 1
+            yield f"File{count}={_ref(t.path, prefix)}"
+            yield f"Title{count}={t.title or Path(t.path).stem}"
+            yield f"Length{count}={t.seconds if t.seconds is not None else -1}"
+        # Readers treat these as a trailer as readily as a header, and we only know the count now.
+        yield f"NumberOfEntries={count}"
+        yield "Version=2"
+
+    with perf.span("playlist_files.write"):
+        _write(path, pls() if ext == ".pls" else m3u())
+    return count
@@ -7,42 +7,619 @@ Structure example on the disk (playlists.json):
       {"path": "C:/music/track1.mp3", "title": "Bohemian Rhapsody – Queen", "duration": "05:55"},
       {"path": "C:/music/track2.mp3", "title": "track2"}
     ]
-  }
+  },
+  "seq": 42
 }
+
+Every mutation is expressed as a small operation record ("op"), applied to the
+in-memory data and then persisted:
+- default mode: the whole snapshot is rewritten (atomically) after each op
+- journal mode: the op is appended as one JSON line to playlists.json.journal and
+  the snapshot is only rewritten ("compacted") once the journal grows past a
+  size threshold and past the snapshot itself, so a run of large adds rewrites
+  it a logarithmic number of times rather than once per add
+
+"seq" numbers every op. The snapshot records the last op it contains, so replay
+on load skips journal records that were already folded in (e.g. after a crash
+between writing the snapshot and truncating the journal).
+
+Bulk edits go through transaction(): ops are applied in memory as usual but
+persisted together when the block exits (one snapshot write, one journal
+append, one SQL transaction). If the block raises, the in-memory state is
+rolled back and nothing is written.
+
+Listeners registered with subscribe() receive each op after it has been
+persisted, so views can update incrementally instead of reloading everything.
+
+Several processes (two app windows, a script) can share the files. Every write
+holds an advisory lock (playlists.json.lock) and first catches up with what
+the others wrote; "seq" doubles as the version stamp, so op numbers stay
+unique across processes. Catching up is cheap: (inode, size, mtime) stamps of
+the files show whether anything changed; if only the journal grew, just its
+new records are applied, otherwise the snapshot is re-read and only the
+differences are applied (as ops). refresh() does the same from a UI timer.
+Listeners see other processes' ops with "remote": True. An edit that was
+based on state another process has since changed (e.g. removing tracks by
+index from a playlist that changed meanwhile) is refused with StoreConflict.
 """
 
 from __future__ import annotations
 import json
+import os
+import threading
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Dict, List
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, TypeVar
+
+import perf
+from track import Track, to_seconds
+
+if os.name == "nt":
+    import msvcrt
+else:
+    import fcntl
+
+COMPACT_BYTES = 256 * 1024  # Journal size that triggers compaction (once it also outgrows the snapshot).
+
+T = TypeVar("T")
+Listener = Callable[[Dict[str, Any]], None]
+BatchListener = Callable[[List[Dict[str, Any]]], None]
+Stamp = Optional[Tuple[int, int, int]]  # (inode, size, mtime_ns) of a file, None if missing
+
+
+class StoreConflict(ValueError):
+    """Another process changed what an edit was based on; the edit was not applied."""
+
+
+def move_items(items: List[T], indices: Sequence[int], to: int) -> List[T]:
+    """Return items with the entries at indices moved, in order, to start at position to.
+
+    to is a position in the final list (clamped to its bounds).
+    """
+    picked = set(indices)
+    block = [items[i] for i in sorted(picked)]
+    rest = [item for i, item in enumerate(items) if i not in picked]
+    to = max(0, min(to, len(rest)))
+    return rest[:to] + block + rest[to:]
+
+
+def _encode(obj: Any) -> Dict[str, Any]:
+    """json.dumps default: Track objects serialize as their playlists.json entry."""
+    if isinstance(obj, Track):
+        return obj.to_dict()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+_dumps = json.JSONEncoder(ensure_ascii=False).encode  # One line, C-accelerated (indent= is not)
+
+
+def _write_snapshot(f, playlists: Dict[str, List[Track]], seq: int) -> None:
+    """Write playlists.json in the layout shown above: one track entry per line."""
+    f.write('{\n  "playlists": {')
+    for n, (name, tracks) in enumerate(playlists.items()):
+        f.write(("," if n else "") + f"\n    {_dumps(name)}: [")
+        if tracks:
+            f.write("\n      " + ",\n      ".join(_dumps(t.to_dict()) for t in tracks) + "\n    ")
+        f.write("]")
+    f.write(("\n  " if playlists else "") + f'}},\n  "seq": {seq}\n}}\n')
+
+
+# ---- cross-process coordination ----
+def _lock_file(fd: int) -> None:
+    """Block until this process holds the advisory lock on fd."""
+    if os.name == "nt":
+        os.lseek(fd, 0, os.SEEK_SET)
+        while True:
+            try:
+                msvcrt.locking(fd, msvcrt.LK_LOCK, 1)  # Gives up after about 10 s; keep waiting
+                return
+            except OSError:
+                continue
+    fcntl.flock(fd, fcntl.LOCK_EX)
+
+
+def _unlock_file(fd: int) -> None:
+    if os.name == "nt":
+        os.lseek(fd, 0, os.SEEK_SET)
+        msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+    else:
+        fcntl.flock(fd, fcntl.LOCK_UN)
+
+
+class FileLock:
+    """Exclusive advisory lock on a lock file, for all processes sharing a store.
+
+    Reentrant within a process (nested holds only count); its threads take turns.
+    """
+
+    def __init__(self, path: Path | str) -> None:
+        self.path = Path(path)
+        self._mutex = threading.RLock()
+        self._fd: Optional[int] = None
+        self._depth = 0
+
+    @property
+    def mutex(self) -> threading.RLock:
+        """The in-process half: holding it keeps this process's other threads out, not other processes."""
+        return self._mutex
+
+    def __enter__(self) -> "FileLock":
+        self._mutex.acquire()
+        if self._depth == 0:
+            fd = -1
+            try:
+                fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+                _lock_file(fd)
+            except BaseException:
+                if fd >= 0:
+                    os.close(fd)
+                self._mutex.release()
+                raise
+            self._fd = fd
+        self._depth += 1
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self._depth -= 1
+        if self._depth == 0:
+            fd, self._fd = self._fd, None
+            try:
+                _unlock_file(fd)
+            finally:
+                os.close(fd)
+        self._mutex.release()
+
+
+def _file_stamp(path: Path) -> Stamp:
+    """(inode, size, mtime_ns) of path, or None if it doesn't exist."""
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return st.st_ino, st.st_size, st.st_mtime_ns
+
+
+def _fsync_dir(folder: Path) -> None:
+    """Make a rename in folder durable (POSIX; Windows can't open directories for this)."""
+    if os.name == "nt":
+        return
+    fd = os.open(folder, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def _key(t: Track) -> tuple:
+    return t.path, t.title, t.seconds, t.extra
+
+
+def _diff_tracks(name: str, old: List[Track], new: List[Track]) -> List[Dict[str, Any]]:
+    """Ops turning track list old into new; the common head and tail are left alone."""
+    n, m = len(old), len(new)
+    head = 0
+    while head < min(n, m) and _key(old[head]) == _key(new[head]):
+        head += 1
+    tail = 0
+    while tail < min(n, m) - head and _key(old[n - 1 - tail]) == _key(new[m - 1 - tail]):
+        tail += 1
+    gone, fresh = range(head, n - tail), new[head:m - tail]
+    if len(gone) == len(fresh) and all(old[i].to_dict().keys() <= t.to_dict().keys() for i, t in zip(gone, fresh)):
+        # Same shape: edited in place
+        return [
+            {"op": "update", "playlist": name, "index": i, "fields": t.to_dict()}
+            for i, t in zip(gone, fresh) if _key(old[i]) != _key(t)
+        ]
+    ops: List[Dict[str, Any]] = []
+    if gone:
+        ops.append({"op": "remove", "playlist": name, "indices": list(gone)})
+    if fresh:
+        ops.append({"op": "add", "playlist": name, "items": list(fresh)})
+        if tail:
+            start = n - len(gone)
+            ops.append({"op": "move", "playlist": name, "indices": list(range(start, start + len(fresh))), "to": head})
+    return ops
+
+
+def _diff(old: Dict[str, Any], new: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Ops turning playlists old into new. Track lists that are None (not loaded) are not compared."""
+    ops: List[Dict[str, Any]] = [{"op": "delete", "name": name} for name in old if name not in new]
+    for name, tracks in new.items():
+        if name not in old:
+            ops.append({"op": "create", "name": name})
+            if tracks:
+                ops.append({"op": "add", "playlist": name, "items": list(tracks)})
+        elif old[name] is not None and tracks is not None:
+            ops.extend(_diff_tracks(name, old[name], tracks))
+    return ops
+
+
+def _conflicts(op: Dict[str, Any], remote: List[Dict[str, Any]], playlists: Dict[str, Any]) -> bool:
+    """True if op, checked against the state before the remote ops, no longer means the same."""
+    kind = op["op"]
+    if kind == "create":
+        return op["name"] in playlists
+    if kind == "delete":
+        return op["name"] not in playlists
+    if kind == "rename":
+        return op["old"] not in playlists or op["new"] in playlists
+    if op["playlist"] not in playlists:
+        return True
+    if kind == "add":
+        return False  # Appending still appends
+    # update/remove/move address tracks by index, which a remote edit may have shifted
+    return any(op["playlist"] in (r.get("playlist"), r.get("name"), r.get("new")) for r in remote)
 
 
 class PlaylistStore:
-    """Simple JSON persistence for playlists."""
+    """Simple JSON persistence for playlists, with an optional append-only journal."""
 
-    def __init__(self, db_path: Path | str = "playlists.json") -> None:
+    def __init__(
+        self,
+        db_path: Path | str = "playlists.json",
+        journal: bool = False,
+        compact_bytes: int = COMPACT_BYTES,
+    ) -> None:
         self.db_path = Path(db_path)
-        # Top-level dict with a single key "playlists".
-        self.data: Dict[str, Dict[str, List[Dict[str, str]]]] = {"playlists": {}}
-        self._load()
+        self.journal = journal
+        self.journal_path = self.db_path.with_name(self.db_path.name + ".journal")
+        self.compact_bytes = compact_bytes
+        self.lock_path = self.db_path.with_name(self.db_path.name + ".lock")
+        self._lock = FileLock(self.lock_path)
+        self.seq = 0  # Sequence number of the last applied op (the version, across processes)
+        self._seen: Any = None   # _stamp() when memory last matched the files
+        self._journal_pos = 0    # Journal bytes already applied
+        # Open transaction: pending ops plus what we need to roll back (see transaction()).
+        self._txn_ops: Optional[List[Dict[str, Any]]] = None
+        self._txn_names: Dict[str, Any] = {}
+        self._txn_lists: Dict[int, Tuple[List[Track], List[Track]]] = {}
+        self._txn_items: List[Tuple[Track, Track]] = []
+        self._txn_seq = 0
+        self._listeners: List[Listener] = []
+        self._batch_listeners: List[BatchListener] = []
+        # Top-level dict with a single key "playlists" (entries are Track objects in memory).
+        self.data: Dict[str, Dict[str, List[Track]]] = {"playlists": {}}
+        with self._lock:
+            self._load()
+            self._mark_seen()
 
+    @perf.timed("store.load")
     def _load(self) -> None:
-        """Load playlists.json from disk (create file if it doesn't exist)."""
+        """Load playlists.json from disk, replay the journal, create the file if missing."""
         if self.db_path.exists():
             try:
-                self.data = json.loads(self.db_path.read_text(encoding="utf-8"))
-                # Guard against corrupt or unexpected structure
-                if "playlists" not in self.data or not isinstance(self.data["playlists"], dict):
-                    self.data = {"playlists": {}}
-            except Exception:
-                # Corrupt/unreadable file → reset to empty
+                playlists, self.seq = self._read_snapshot()
+                self.data = {"playlists": playlists}
+            except ValueError:
+                # Corrupt (our own writes are atomic, so someone else's): keep it aside, start empty.
+                os.replace(self.db_path, self.db_path.with_name(self.db_path.name + ".corrupt"))
                 self.data = {"playlists": {}}
+                self.seq = 0
+                self._save()
+            except OSError:
+                # Unreadable file → start empty
+                self.data = {"playlists": {}}
+                self.seq = 0
         else:
             self._save()
 
+        replayed = self._replay_journal()
+        # Outside journal mode, fold any leftover journal into the snapshot right away.
+        if replayed and not self.journal:
+            self._compact()
+
+    def _read_snapshot(self) -> Tuple[Dict[str, List[Track]], int]:
+        """Parse playlists.json into (playlists, seq). Raises ValueError if it isn't one, OSError if unreadable."""
+        data = json.loads(self.db_path.read_text(encoding="utf-8"))
+        try:
+            playlists = {name: [Track.from_dict(t) for t in tracks] for name, tracks in data["playlists"].items()}
+            return playlists, int(data.get("seq", 0))
+        except (AttributeError, KeyError, TypeError) as e:
+            raise ValueError(f"Not a playlists file: {e!r}") from e
+
+    def _replay_journal(self, start: int = 0) -> List[Dict[str, Any]]:
+        """Apply journal records from byte offset start that are newer than seq. Returns them."""
+        applied: List[Dict[str, Any]] = []
+        if not self.journal_path.exists():
+            return applied
+        good_end = start
+        torn = False
+        with self.journal_path.open("rb") as f:
+            f.seek(start)
+            for line in f:
+                try:
+                    if not line.endswith(b"\n"):
+                        raise ValueError("incomplete record")
+                    op = json.loads(line.decode("utf-8"))
+                except ValueError:
+                    torn = True  # Torn final write from a crash; everything before it is intact.
+                    break
+                good_end += len(line)
+                if op.get("seq", 0) <= self.seq:
+                    continue
+                try:
+                    if op["op"] == "add":
+                        op["items"] = [Track.from_dict(t) for t in op["items"]]  # Listeners get Tracks
+                    self._apply(op)
+                    applied.append(op)
+                except (KeyError, IndexError, TypeError):
+                    pass  # Record doesn't fit the state (hand-edited file); skip it.
+                self.seq = op["seq"]
+        if torn:
+            # Cut the partial record off so the next append starts on a clean line.
+            with self.journal_path.open("r+b") as f:
+                f.truncate(good_end)
+        return applied
+
+    @perf.timed("store.save")
     def _save(self) -> None:
-        """Write current data to disk in a human-readable way."""
-        self.db_path.write_text(json.dumps(self.data, indent=2, ensure_ascii=False), encoding="utf-8")
+        """Write the full snapshot atomically (temp file + rename) in a human-readable way."""
+        tmp = self.db_path.with_name(self.db_path.name + ".tmp")
+        with tmp.open("w", encoding="utf-8") as f:
+            _write_snapshot(f, self.data["playlists"], self.seq)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.db_path)
+        _fsync_dir(self.db_path.parent)
+
+    def compact(self) -> None:
+        """Fold the journal into a fresh snapshot and truncate it."""
+        with self._lock:
+            remote = self._sync()  # Records other processes appended must make it into the snapshot
+            self._compact()
+            self._mark_seen()
+        self._notify(remote)
+
+    def _compact(self) -> None:
+        """compact() for callers that hold the lock and are up to date."""
+        self._save()
+        if self.journal_path.exists():
+            # Safe even if we crash before this: replay skips seq <= snapshot seq.
+            self.journal_path.write_text("", encoding="utf-8")
+
+    # ---- other processes ----
+    def refresh(self) -> bool:
+        """Pick up changes other processes made to the files; True if there were any.
+
+        Listeners receive them as ops (with "remote": True). Costs two stat() calls
+        when nothing changed, so a UI timer can call it every second.
+        """
+        if self._txn_ops is not None or self._stamp() == self._seen:
+            return False
+        with self._lock:
+            remote = self._sync()
+        self._notify(remote)
+        return bool(remote)
+
+    def _stamp(self) -> Any:
+        """Cheap fingerprint of the files; it changes whenever any process writes them."""
+        return _file_stamp(self.db_path), _file_stamp(self.journal_path)
+
+    def _mark_seen(self) -> None:
+        """Record the files' stamp: memory now reflects everything in them (caller holds the lock)."""
+        self._seen = self._stamp()
+        journal = self._seen[1]
+        self._journal_pos = journal[1] if journal is not None else 0
+
+    def _sync(self) -> List[Dict[str, Any]]:
+        """Apply what other processes wrote since we last looked (caller holds the lock); returns those ops.
+
+        Listeners are not called; the caller notifies them once it is safe to.
+        """
+        stamp = self._stamp()
+        if stamp == self._seen:
+            return []
+        try:
+            ops = self._catch_up(stamp)
+        except (OSError, ValueError):
+            return []  # Caught mid-write by a program that doesn't replace files atomically: retry later
+        self._mark_seen()
+        for op in ops:
+            op["remote"] = True
+        return ops
+
+    def _catch_up(self, stamp: Any) -> List[Dict[str, Any]]:
+        """Bring memory up to the files: just the new journal records if only the journal grew, else a re-read."""
+        (snapshot, journal), (seen_snapshot, seen_journal) = stamp, self._seen
+        if (
+            snapshot == seen_snapshot
+            and journal is not None
+            and seen_journal is not None
+            and journal[0] == seen_journal[0]
+            and journal[1] >= self._journal_pos
+        ):
+            return self._replay_journal(self._journal_pos)
+        return self._reload()
+
+    def _reload(self) -> List[Dict[str, Any]]:
+        """Re-read snapshot and journal, then apply only the differences to the live playlists, as ops."""
+        fresh, seq = self._read_snapshot()  # A missing file raises too: retried, never read as "all deleted"
+        live, live_seq = self.data, self.seq
+        self.data, self.seq = {"playlists": fresh}, seq
+        try:
+            self._replay_journal()
+            seq = self.seq
+        finally:
+            self.data, self.seq = live, live_seq
+        ops = _diff(live["playlists"], fresh)
+        self._apply_all(ops, max(seq, live_seq))
+        return ops
+
+    def _apply_all(self, ops: List[Dict[str, Any]], seq: int) -> None:
+        """Apply catch-up ops in memory; they all carry seq, the version they bring us to."""
+        for op in ops:
+            self._apply(op)
+            op["seq"] = seq
+        self.seq = seq
+
+    @contextmanager
+    def transaction(self) -> Iterator["PlaylistStore"]:
+        """Group mutations so they persist once; roll back in memory if the block raises.
+
+        Nested transaction() blocks join the outermost one.
+        """
+        if self._txn_ops is not None:
+            yield self
+            return
+        with self._lock:  # Held for the whole block, so the edits are checked against current state
+            self._notify(self._sync())
+            self._txn_ops = []
+            self._txn_names = dict(self.data["playlists"])
+            self._txn_lists = {}
+            self._txn_items = []
+            self._txn_seq = self.seq
+            ops = self._txn_ops
+            try:
+                yield self
+                if ops:
+                    self._persist(ops)
+                    self._mark_seen()
+            except BaseException:
+                self._rollback()
+                raise
+            finally:
+                self._txn_ops = None
+                self._txn_names = {}
+                self._txn_lists = {}
+                self._txn_items = []
+        self._notify(ops)
+
+    def _rollback(self) -> None:
+        """Restore the in-memory state captured when the transaction began."""
+        for item, original in reversed(self._txn_items):
+            item.assign(original)
+        for tracks, original in self._txn_lists.values():
+            tracks[:] = original
+        playlists = self.data["playlists"]
+        playlists.clear()
+        playlists.update(self._txn_names)
+        self.seq = self._txn_seq
+
+    def _commit(self, op: Dict[str, Any]) -> None:
+        """Apply an op in memory, then persist it (or queue it in the open transaction).
+
+        Outside a transaction this first catches up with other processes, under the lock.
+        """
+        if self._txn_ops is None:
+            with self._lock:
+                remote = self._sync()
+                self._notify(remote)
+                if remote and _conflicts(op, remote, self.data["playlists"]):
+                    raise StoreConflict("The playlists were changed by another program; please try again.")
+                self._apply(op)
+                self.seq += 1
+                op["seq"] = self.seq
+                self._persist([op])
+                self._mark_seen()
+            self._notify([op])
+            return
+        if "playlist" in op:
+            # Back up each touched track list once (shallow), and each edited track.
+            tracks = self._tracks(op["playlist"])
+            if id(tracks) not in self._txn_lists:
+                self._txn_lists[id(tracks)] = (tracks, list(tracks))
+            if op["op"] == "update":
+                item = tracks[op["index"]]
+                self._txn_items.append((item, item.copy()))
+        self._apply(op)
+        self.seq += 1
+        op["seq"] = self.seq
+        self._txn_ops.append(op)
+
+    # ---- change notification ----
+    def subscribe(self, listener: Listener) -> None:
+        """Call listener(op) after every persisted op (see _apply for the op shapes).
+
+        Ops from other processes carry "remote": True; they are already persisted, and
+        whatever that process derived from them (e.g. smart playlist updates) follows as
+        ops of its own, so listeners must not write to the store in response.
+        """
+        self._listeners.append(listener)
+
+    def subscribe_batches(self, listener: BatchListener) -> None:
+        """Call listener(ops) once per group of ops persisted together (an op, a transaction, a catch-up).
+
+        Runs after the per-op listeners have seen the group. Unlike them, a batch listener
+        may write to the store in response to local ops, best in one transaction per call.
+        """
+        self._batch_listeners.append(listener)
+
+    def unsubscribe(self, listener: Listener | BatchListener) -> None:
+        """Stop notifying listener (no-op if it wasn't subscribed)."""
+        for listeners in (self._listeners, self._batch_listeners):
+            if listener in listeners:
+                listeners.remove(listener)
+
+    def _notify(self, ops: List[Dict[str, Any]]) -> None:
+        """Hand committed ops to listeners, in order, then the whole batch to batch listeners."""
+        for op in ops:
+            for listener in list(self._listeners):
+                listener(op)
+        if ops:
+            for batch_listener in list(self._batch_listeners):
+                batch_listener(ops)
+
+    @perf.timed("store.persist")
+    def _persist(self, ops: List[Dict[str, Any]]) -> None:
+        """Write already-applied ops to disk (journal append or snapshot rewrite)."""
+        if not self.journal:
+            self._save()
+            return
+        with self.journal_path.open("a", encoding="utf-8") as f:
+            start = f.tell()
+            try:
+                for op in ops:
+                    f.write(json.dumps(op, ensure_ascii=False, separators=(",", ":"), default=_encode) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            except BaseException:
+                # Don't leave half a batch behind for replay to pick up.
+                f.truncate(start)
+                raise
+            size = f.tell()
+        if size >= self.compact_bytes and size >= (_file_stamp(self.db_path) or (0, 0))[1]:
+            self._compact()
+
+    def _tracks(self, playlist: str) -> List[Track]:
+        """The live track list of an existing playlist (backends may load it on demand)."""
+        return self.data["playlists"][playlist]
+
+    def _apply(self, op: Dict[str, Any]) -> None:
+        """Apply one op record to self.data (no validation, no I/O).
+
+        Op shapes:
+          {"op": "create", "name"}              {"op": "delete", "name"}
+          {"op": "rename", "old", "new"}        {"op": "add", "playlist", "items"}
+          {"op": "update", "playlist", "index", "fields"}
+          {"op": "remove", "playlist", "indices"}
+          {"op": "move", "playlist", "indices", "to"}
+        """
+        playlists = self.data["playlists"]
+        kind = op["op"]
+        if kind == "create":
+            playlists[op["name"]] = []
+        elif kind == "delete":
+            playlists.pop(op["name"], None)
+        elif kind == "rename":
+            playlists[op["new"]] = playlists.pop(op["old"])
+        elif kind == "add":
+            # The op's Track objects become the stored tracks (listeners see the live objects);
+            # records replayed from the journal carry plain dicts.
+            self._tracks(op["playlist"]).extend(
+                t if isinstance(t, Track) else Track.from_dict(t) for t in op["items"]
+            )
+        elif kind == "update":
+            self._tracks(op["playlist"])[op["index"]].update(op["fields"])
+        elif kind == "remove":
+            tracks = self._tracks(op["playlist"])
+            # Older journals recorded a single "index".
+            for i in sorted(op.get("indices", [op.get("index")]), reverse=True):
+                tracks.pop(i)
+        elif kind == "move":
+            tracks = self._tracks(op["playlist"])
+            tracks[:] = move_items(tracks, op["indices"], op["to"])
+        else:
+            raise KeyError(kind)
 
     # ---- playlist operations ----
     def list_playlists(self) -> List[str]:
@@ -56,14 +633,12 @@ class PlaylistStore:
             raise ValueError("Playlist name cannot be empty.")
         if name in self.data["playlists"]:
             raise ValueError("A playlist with that name already exists.")
-        self.data["playlists"][name] = []
-        self._save()
+        self._commit({"op": "create", "name": name})
 
     def delete_playlist(self, name: str) -> None:
         """Delete a playlist (no-op if it doesn't exist)."""
         if name in self.data["playlists"]:
-            del self.data["playlists"][name]
-            self._save()
+            self._commit({"op": "delete", "name": name})
 
     def rename_playlist(self, old: str, new: str) -> None:
         """Rename an existing playlist to a new unique name."""
@@ -74,13 +649,23 @@ class PlaylistStore:
             return
         if new in self.data["playlists"] and new != old:
             raise ValueError("A playlist with that name already exists.")
-        self.data["playlists"][new] = self.data["playlists"].pop(old)
-        self._save()
+        self._commit({"op": "rename", "old": old, "new": new})
+
+    def snapshot(self) -> Tuple[int, Dict[str, List[Track]]]:
+        """(seq, a copy of every playlist's track list) as of one moment; callable from a worker thread.
+
+        No op is applied meanwhile, so a listener that subscribed before calling this can
+        skip the ops it is notified of whose seq is not above the one returned.
+        """
+        with self._lock.mutex:
+            return self.seq, {name: list(self._tracks(name)) for name in self.data["playlists"]}
 
     # ---- track operations ----
-    def get_tracks(self, playlist: str) -> List[Dict[str, str]]:
+    def get_tracks(self, playlist: str) -> List[Track]:
         """Return a shallow copy (list) of tracks for a playlist (empty if missing)."""
-        return list(self.data["playlists"].get(playlist, []))
+        if playlist not in self.data["playlists"]:
+            return []
+        return list(self._tracks(playlist))
 
     def add_track(
         self,
@@ -90,30 +675,58 @@ class PlaylistStore:
         duration: str | None = None,
     ) -> None:
         """Append a track entry to a playlist with optional title/duration."""
+        self.add_tracks(playlist, [(path, title, duration)])
+
+    def add_tracks(
+        self,
+        playlist: str,
+        items: Iterable[Tuple[Path | str, str | None, str | int | None]],
+    ) -> int:
+        """Append many (path, title, duration) entries with a single save. Returns the count added.
+
+        duration is "MM:SS" or whole seconds.
+        """
         if playlist not in self.data["playlists"]:
             raise ValueError("Playlist does not exist.")
-        p = Path(path)
-        title = title or p.stem
-        item: Dict[str, str] = {"path": str(p), "title": title}
-        if duration:
-            item["duration"] = duration
-        self.data["playlists"][playlist].append(item)
-        self._save()
+        entries: List[Track] = []
+        for path, title, duration in items:
+            p = Path(path)
+            entries.append(Track(str(p), title or p.stem, to_seconds(duration)))
+        if entries:
+            self._commit({"op": "add", "playlist": playlist, "items": entries})
+        return len(entries)
+
+    def remove_tracks_at(self, playlist: str, indices: Iterable[int]) -> int:
+        """Remove the tracks at the given indices (invalid ones are ignored) with a single save.
+
+        Returns the number removed.
+        """
+        if playlist not in self.data["playlists"]:
+            return 0
+        n = len(self._tracks(playlist))
+        valid = sorted({i for i in indices if 0 <= i < n})
+        if valid:
+            self._commit({"op": "remove", "playlist": playlist, "indices": valid})
+        return len(valid)
+
+    def move_tracks(self, playlist: str, indices: Iterable[int], to: int) -> None:
+        """Move the tracks at indices (kept in order) so the block starts at position to."""
+        if playlist not in self.data["playlists"]:
+            return
+        n = len(self._tracks(playlist))
+        valid = sorted({i for i in indices if 0 <= i < n})
+        if valid:
+            self._commit({"op": "move", "playlist": playlist, "indices": valid, "to": to})
 
     def update_track_at(self, playlist: str, index: int, **fields: str) -> None:
         """Update fields of a track at index (only for provided non-None fields)."""
         if playlist not in self.data["playlists"]:
             return
-        tracks = self.data["playlists"][playlist]
-        if 0 <= index < len(tracks):
-            tracks[index].update({k: v for k, v in fields.items() if v is not None})
-            self._save()
+        tracks = self._tracks(playlist)
+        changes = {k: v for k, v in fields.items() if v is not None}
+        if 0 <= index < len(tracks) and changes:
+            self._commit({"op": "update", "playlist": playlist, "index": index, "fields": changes})
 
     def remove_track_at(self, playlist: str, index: int) -> None:
         """Remove a track by index (if valid)."""
-        if playlist not in self.data["playlists"]:
-            return
-        tracks = self.data["playlists"][playlist]
-        if 0 <= index < len(tracks):
-            tracks.pop(index)
-            self._save()
+        self.remove_tracks_at(playlist, [index])
@@ -0,0 +1,194 @@
+"""Find playlist entries whose file is missing and relink them to files under another folder.
+
+Playlists store absolute paths, so moving the library (new drive letter, new
+mount point) breaks every entry at once. find_missing() stats each distinct
+path on a wide thread pool; on network storage each stat is mostly waiting,
+so dozens of them in flight are far faster than a sequential walk.
+
+plan_relinks() walks the target folder once (library.walk_audio) and
+matches each missing entry against that index:
+1. same file name (case-insensitive); among several, the one sharing the
+   longest run of trailing folders with the old path ("Artist/Album/01.mp3")
+2. still ambiguous, or no name match: the size and sampled-block hash recorded
+   for the old path by the library index / fingerprint cache, if any
+apply_relinks() rewrites every matched path in one store transaction (one save).
+"""
+
+from __future__ import annotations
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+import perf
+from dedupe import FingerprintCache, sample_hash
+from library import LibraryIndex, walk_audio
+from playlist_store import PlaylistStore
+from track import Track
+
+STAT_WORKERS = 32  # Concurrent stats; most of a network stat is waiting on the server
+STAT_BATCH = 256   # Paths per pool task (one future per path costs more than a local stat)
+TAIL_PARTS = 3     # Trailing path components matched: file name plus two folders
+
+_SEP = re.compile(r"[\\/]")
+
+
+class Missing(NamedTuple):
+    """A playlist entry whose file does not exist (index as of the check)."""
+
+    playlist: str
+    index: int
+    track: Track
+
+
+class Relink(NamedTuple):
+    """A proposed new path for a missing entry, and what matched it."""
+
+    missing: Missing
+    path: str
+    how: str  # "name", "folders", "size" or "fingerprint"
+
+
+class RelinkPlan(NamedTuple):
+    relinks: List[Relink]
+    ambiguous: List[Missing]  # Several equally good candidates
+    unmatched: List[Missing]  # No candidate at all
+
+
+def _absent(paths: List[str]) -> List[str]:
+    """The paths that can't be stat'ed."""
+    gone = []
+    for p in paths:
+        try:
+            os.stat(p)
+        except OSError:
+            gone.append(p)
+    return gone
+
+
+@perf.timed("relink.check")
+def find_missing(playlists: Dict[str, List[Track]], workers: int = STAT_WORKERS) -> List[Missing]:
+    """Entries of playlists (name -> tracks) whose file can't be stat'ed. Each distinct path is checked once."""
+    paths = list({t.path for tracks in playlists.values() for t in tracks})
+    batches = [paths[i:i + STAT_BATCH] for i in range(0, len(paths), STAT_BATCH)]
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="relink-stat") as pool:
+        gone = {p for batch in pool.map(_absent, batches) for p in batch}
+    return [
+        Missing(name, i, t)
+        for name, tracks in playlists.items()
+        for i, t in enumerate(tracks)
+        if t.path in gone
+    ]
+
+
+def _tail(path: str) -> Tuple[str, ...]:
+    """Last TAIL_PARTS components of path, case-folded (either separator)."""
+    return tuple(p.casefold() for p in _SEP.split(path)[-TAIL_PARTS:] if p)
+
+
+@perf.timed("relink.plan")
+def plan_relinks(
+    missing: Sequence[Missing],
+    target: Path | str,
+    fingerprints: Optional[FingerprintCache] = None,
+    library: Optional[LibraryIndex] = None,
+) -> RelinkPlan:
+    """Match missing entries to audio files under target. Raises ValueError if target is not a folder."""
+    target = os.path.abspath(target)
+    if not os.path.isdir(target):
+        raise ValueError(f"Folder not found: {target}")
+    files = walk_audio(target)
+    by_tail: Dict[Tuple[str, ...], List[str]] = {}  # ("01.mp3",), ("album", "01.mp3"), ... -> paths
+    by_size: Dict[int, List[str]] = {}
+    for path, (size, _mtime) in files.items():
+        tail = _tail(path)
+        for k in range(1, len(tail) + 1):
+            by_tail.setdefault(tail[-k:], []).append(path)
+        by_size.setdefault(size, []).append(path)
+    samples: Dict[str, Optional[str]] = {}  # Sampled hashes of target files, computed on demand
+
+    def sample_of(path: str) -> Optional[str]:
+        if path not in samples:
+            try:
+                samples[path] = sample_hash(path, files[path][0])
+            except OSError:
+                samples[path] = None
+        return samples[path]
+
+    def recorded(old: str) -> Tuple[Optional[int], Optional[str]]:
+        """Size and sampled hash remembered for the old path (either may be unknown)."""
+        known = fingerprints.last_known(old) if fingerprints is not None else None
+        if known is not None:
+            return known
+        stat = library.get(old) if library is not None else None
+        return (stat[0] if stat else None), None
+
+    relinks: List[Relink] = []
+    ambiguous: List[Missing] = []
+    unmatched: List[Missing] = []
+    decided: Dict[str, Optional[Tuple[str, str]]] = {}  # Old path -> (new path, how); shared by its entries
+    for m in missing:
+        old = m.track.path
+        if old not in decided:
+            decided[old] = _match(old, by_tail, by_size, files, sample_of, recorded)
+        result = decided[old]
+        if result is None:
+            unmatched.append(m)
+        elif result[0] == "":
+            ambiguous.append(m)
+        else:
+            relinks.append(Relink(m, result[0], result[1]))
+    return RelinkPlan(relinks, ambiguous, unmatched)
+
+
+def _match(old, by_tail, by_size, files, sample_of, recorded) -> Optional[Tuple[str, str]]:
+    """(new path, how) for one old path; ("", "") if ambiguous, None if nothing fits."""
+    tail = _tail(old)
+    candidates: List[str] = []
+    k = 0
+    for k in range(len(tail), 0, -1):  # Longest shared tail first
+        candidates = by_tail.get(tail[-k:], [])
+        if candidates:
+            break
+    if len(candidates) == 1:
+        return candidates[0], "name" if k == 1 else "folders"
+
+    size, digest = recorded(old)
+    if candidates:
+        if size is not None:
+            sized = [c for c in candidates if files[c][0] == size]
+            if len(sized) == 1:
+                return sized[0], "size"
+            candidates = sized or candidates
+        if digest is not None:
+            same = [c for c in candidates if sample_of(c) == digest]
+            if len(same) == 1:
+                return same[0], "fingerprint"
+        return "", ""
+    # Renamed as well as moved: only the content can tell.
+    if size is None or digest is None:
+        return None
+    same = [c for c in by_size.get(size, []) if sample_of(c) == digest]
+    if len(same) == 1:
+        return same[0], "fingerprint"
+    return ("", "") if same else None
+
+
+def apply_relinks(store: PlaylistStore, relinks: Sequence[Relink]) -> int:
+    """Point every relinked entry at its new path in one save. Returns the number updated.
+
+    Entries are found by identity, so edits made since the check don't misdirect the update.
+    """
+    wanted: Dict[str, Dict[int, str]] = {}
+    for r in relinks:
+        wanted.setdefault(r.missing.playlist, {})[id(r.missing.track)] = r.path
+    updated = 0
+    with store.transaction():
+        for name, paths in wanted.items():
+            for i, t in enumerate(store.get_tracks(name)):
+                new = paths.get(id(t))
+                if new is not None and t.path != new:
+                    store.update_track_at(name, i, path=new)
+                    updated += 1
+    return updated
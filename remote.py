@@ -0,0 +1,575 @@
+"""Local remote control: a JSON-lines command server for scripts, hotkey daemons and phone bridges.
+
+Started by the app when MP3_PLAYER_REMOTE is set to an address: "unix:/path"
+(or any path) for a Unix socket, readable by the owner only, or "host:port"
+(a bare port means 127.0.0.1) for TCP. If MP3_PLAYER_REMOTE_TOKEN is set,
+a connection has to send {"cmd": "auth", "token": ...} before anything else;
+a TCP host other than loopback is refused without one, since anyone who can
+reach it could queue any local file and drive playback.
+
+Protocol: one JSON object per line each way. A request is
+{"id": 1, "cmd": "volume", "value": 0.5}; its reply is
+{"id": 1, "ok": true, "result": ...} or {"id": 1, "ok": false, "error": "..."}
+(id is optional and echoed back). Requests on one connection run in order.
+Commands (see RemoteCommands): status, play [playlist | index], pause
+[paused], stop, next, prev, seek position, volume value (0..1), queue
+[offset] [limit], enqueue paths, dequeue index, move index to. "subscribe"
+replies with the status and then streams {"event": "now_playing", ...} lines
+whenever playback changes; "unsubscribe" stops them.
+
+The server runs an asyncio loop on its own thread; only the commands touch
+the player, and they run on the Tk thread. Requests are handed over through a
+queue, and the Tk loop is woken by a byte on a socket pair it watches with a
+file handler, so a command waits for the Tk loop to be free rather than for a
+timer (Windows Tk has no file handlers; there the queue is polled with after()).
+Time spent waiting and running is recorded in perf as "remote.wait" and
+"remote.command".
+
+  python remote.py ADDRESS COMMAND [key=value ...]   sends one command and prints the reply
+  python benchmarks/bench_remote.py                  load test
+"""
+
+from __future__ import annotations
+import asyncio
+import errno
+import hmac
+import json
+import os
+import queue
+import socket
+import stat
+import sys
+import threading
+import time
+from collections import deque
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Callable, Deque, Dict, Iterator, List, Optional, Set, Tuple
+
+import perf
+
+if TYPE_CHECKING:
+    from controller import PlayerController
+
+TOKEN_ENV = "MP3_PLAYER_REMOTE_TOKEN"
+LINE_LIMIT = 1024 * 1024           # Longest request line accepted (bytes)
+SUBSCRIBER_BUFFER = 256 * 1024     # A subscriber this far behind on reading is disconnected
+POLL_MS = 2                        # after() polling without file handlers, while clients are connected
+IDLE_POLL_MS = 100                 # ... and with none
+QUEUE_PAGE = 100                   # Tracks returned by "queue" unless a limit is given
+READ_ONLY = {"status", "queue"}    # Commands that change nothing (no on_change call)
+
+Handler = Callable[[Dict[str, Any]], Any]
+
+
+class RemoteError(Exception):
+    """A command was refused by the player (RemoteClient)."""
+
+
+def parse_address(text: str) -> Tuple[str, Any]:
+    """("unix", path) for "unix:/path" or a path; ("tcp", (host, port)) for "host:port" or "port".
+
+    Raises ValueError for anything else, or for a Unix socket where there are none (Windows).
+    """
+    text = text.strip()
+    if text.startswith("unix:") or "/" in text:
+        path = text[5:] if text.startswith("unix:") else text
+        if not path:
+            raise ValueError("The unix: address needs a socket path.")
+        if not hasattr(socket, "AF_UNIX"):
+            raise ValueError("Unix sockets are not available here; use host:port.")
+        return "unix", path
+    host, _, port = text.rpartition(":")
+    if not port.isdigit() or int(port) > 65535:
+        raise ValueError(f"Not a remote-control address: {text!r} (use host:port, a port, or unix:/path).")
+    return "tcp", (host.strip("[]") or "127.0.0.1", int(port))
+
+
+def is_loopback(host: str) -> bool:
+    """True for localhost and loopback addresses (127.0.0.0/8, ::1); a host name other than localhost is not."""
+    if host.lower() == "localhost":
+        return True
+    import ipaddress  # Only needed for TCP addresses
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+def _encode(obj: Dict[str, Any]) -> bytes:
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode() + b"\n"
+
+
+def _clear_stale_socket(path: str) -> None:
+    """Remove a socket file left by a player that crashed; raise OSError if one is still serving it."""
+    try:
+        if not stat.S_ISSOCK(os.stat(path).st_mode):
+            return  # Not ours to delete; bind() reports the clash
+    except FileNotFoundError:
+        return
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(path)
+    except OSError:
+        os.unlink(path)  # Nobody listening
+    else:
+        raise OSError(errno.EADDRINUSE, f"Another player is already serving {path}")
+    finally:
+        probe.close()
+
+
+def _settle(future: "asyncio.Future", reply: Dict[str, Any]) -> None:
+    if not future.done():  # Cancelled if the server closed meanwhile
+        future.set_result(reply)
+
+
+# ---- server ----
+class RemoteServer:
+    """JSON-lines server on an asyncio thread; handle(request) runs on the Tk thread.
+
+    root is any Tk widget (for after() and its interpreter's file handlers).
+    handle returns the command's result (JSON-serializable) and raises ValueError
+    for a bad request; any exception becomes an error reply.
+    """
+
+    def __init__(self, root, handle: Handler, address: str, token: Optional[str] = None) -> None:
+        self.root = root
+        self.handle = handle
+        self.kind, self.address = parse_address(address)
+        self.token = token or None
+        self.bound = ""  # Listening address in parse_address() form, once started
+        self._requests: "queue.SimpleQueue[Tuple[Dict[str, Any], asyncio.Future, float]]" = queue.SimpleQueue()
+        self._wake_r, self._wake_w = socket.socketpair()
+        self._wake_r.setblocking(False)
+        self._wake_w.setblocking(False)
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._thread: Optional[threading.Thread] = None
+        self._file_handler = False
+        self._poll_job: Optional[str] = None
+        self._writers: Set[asyncio.StreamWriter] = set()      # Every open connection
+        self._subscribers: Set[asyncio.StreamWriter] = set()  # Connections receiving events
+
+    @property
+    def subscribed(self) -> bool:
+        """True while any connection is subscribed to events (publish() is a no-op otherwise)."""
+        return bool(self._subscribers)
+
+    def start(self) -> None:
+        """Bind and start serving. Raises OSError (e.g. address in use) if the address can't be bound,
+        ValueError for a TCP host other than loopback without a token.
+        """
+        if self.kind == "tcp" and self.token is None and not is_loopback(self.address[0]):
+            raise ValueError(f"{self.address[0]} is not a loopback address; set {TOKEN_ENV} to serve on it.")
+        ready = threading.Event()
+        errors: List[BaseException] = []
+        self._thread = threading.Thread(target=self._run, args=(ready, errors), daemon=True, name="remote-control")
+        self._thread.start()
+        ready.wait()
+        if errors:
+            self._thread = None
+            raise errors[0]
+        tk = getattr(self.root, "tk", None)
+        if os.name != "nt" and hasattr(tk, "createfilehandler"):
+            import tkinter
+            tk.createfilehandler(self._wake_r.fileno(), tkinter.READABLE, lambda _fd, _mask: self._drain())
+            self._file_handler = True
+        else:
+            self._poll_job = self.root.after(IDLE_POLL_MS, self._poll)
+
+    def publish(self, event: Dict[str, Any]) -> None:
+        """Send event to every subscriber (callable from any thread)."""
+        loop = self._loop
+        if not self._subscribers or loop is None:
+            return
+        try:
+            loop.call_soon_threadsafe(self._broadcast, _encode(event))
+        except RuntimeError:  # Loop already closed
+            pass
+
+    def close(self) -> None:
+        """Stop serving, drop every connection and remove the socket file."""
+        if self._file_handler:
+            self.root.tk.deletefilehandler(self._wake_r.fileno())
+            self._file_handler = False
+        if self._poll_job is not None:
+            self.root.after_cancel(self._poll_job)
+            self._poll_job = None
+        if self._thread is not None and self._loop is not None:
+            self._loop.call_soon_threadsafe(self._shutdown)
+            self._thread.join(timeout=2)
+            self._thread = None
+        self._wake_r.close()
+        self._wake_w.close()
+
+    # ---- asyncio thread ----
+    def _run(self, ready: threading.Event, errors: List[BaseException]) -> None:
+        loop = asyncio.new_event_loop()
+        try:
+            if self.kind == "unix":
+                _clear_stale_socket(self.address)
+                server = loop.run_until_complete(
+                    asyncio.start_unix_server(self._serve, self.address, limit=LINE_LIMIT))
+                os.chmod(self.address, 0o600)  # Only this user may control the player
+                self.bound = f"unix:{self.address}"
+            else:
+                host, port = self.address
+                server = loop.run_until_complete(asyncio.start_server(self._serve, host, port, limit=LINE_LIMIT))
+                name = server.sockets[0].getsockname()
+                self.bound = f"[{name[0]}]:{name[1]}" if ":" in name[0] else f"{name[0]}:{name[1]}"
+        except (OSError, ValueError) as e:
+            errors.append(e)
+            loop.close()
+            ready.set()
+            return
+        self._loop, self._server = loop, server
+        ready.set()
+        try:
+            loop.run_forever()
+        finally:
+            if self.kind == "unix":
+                try:
+                    os.unlink(self.address)
+                except OSError:
+                    pass
+            loop.close()
+
+    def _shutdown(self) -> None:
+        self._server.close()
+        for writer in list(self._writers):
+            writer.close()
+        self._loop.stop()
+
+    async def _serve(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """One connection: read requests, answer each in turn."""
+        self._writers.add(writer)
+        authed = self.token is None
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except ValueError:  # Over LINE_LIMIT; the stream can't be resynchronized
+                    writer.write(_encode({"ok": False, "error": "Request too long."}))
+                    break
+                if not line:
+                    break
+                if not line.strip():
+                    continue
+                try:
+                    msg = json.loads(line)
+                except ValueError:
+                    msg = None
+                if not isinstance(msg, dict):
+                    writer.write(_encode({"ok": False, "error": "Requests are JSON objects, one per line."}))
+                    continue
+                cmd = msg.get("cmd")
+                if cmd == "auth":
+                    token = msg.get("token")
+                    authed = self.token is None or (
+                        isinstance(token, str) and hmac.compare_digest(token.encode(), self.token.encode()))
+                    reply = {"ok": True, "result": None} if authed else {"ok": False, "error": "Wrong token."}
+                elif not authed:
+                    reply = {"ok": False, "error": 'Not authenticated: send {"cmd": "auth", "token": ...} first.'}
+                elif cmd == "subscribe":
+                    reply = await self._dispatch({"cmd": "status"})
+                    self._subscribers.add(writer)
+                elif cmd == "unsubscribe":
+                    self._subscribers.discard(writer)
+                    reply = {"ok": True, "result": None}
+                else:
+                    reply = await self._dispatch(msg)
+                if "id" in msg:
+                    reply["id"] = msg["id"]
+                writer.write(_encode(reply))
+                if cmd == "auth" and not authed:
+                    break
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            self._writers.discard(writer)
+            self._subscribers.discard(writer)
+            writer.close()
+
+    async def _dispatch(self, msg: Dict[str, Any]) -> Dict[str, Any]:
+        """Queue a request for the Tk thread and wait for its reply."""
+        future = self._loop.create_future()
+        self._requests.put((msg, future, time.perf_counter()))
+        try:
+            self._wake_w.send(b"\0")
+        except (BlockingIOError, InterruptedError):
+            pass  # Pipe full: the Tk side has wake-ups pending anyway
+        return await future
+
+    def _broadcast(self, data: bytes) -> None:
+        for writer in list(self._subscribers):
+            if writer.transport.get_write_buffer_size() > SUBSCRIBER_BUFFER:
+                self._subscribers.discard(writer)  # Not reading its events
+                writer.close()
+            else:
+                writer.write(data)
+
+    # ---- Tk thread ----
+    def _drain(self) -> None:
+        """Run every queued request and hand the replies back to the asyncio thread."""
+        try:
+            while self._wake_r.recv(4096):
+                pass
+        except (BlockingIOError, InterruptedError):
+            pass
+        except OSError:
+            return  # Closed
+        while True:
+            try:
+                msg, future, queued = self._requests.get_nowait()
+            except queue.Empty:
+                return
+            perf.record("remote.wait", time.perf_counter() - queued)
+            try:
+                with perf.span("remote.command"):
+                    reply = {"ok": True, "result": self.handle(msg)}
+            except Exception as e:  # A failing command is the client's problem, not the UI's
+                reply = {"ok": False, "error": str(e) or type(e).__name__}
+            self._loop.call_soon_threadsafe(_settle, future, reply)
+
+    def _poll(self) -> None:
+        """after() fallback where Tk can't watch the wake-up socket."""
+        self._drain()
+        self._poll_job = self.root.after(POLL_MS if self._writers else IDLE_POLL_MS, self._poll)
+
+
+# ---- commands ----
+def _number(msg: Dict[str, Any], key: str) -> float:
+    value = msg.get(key)
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        raise ValueError(f'"{key}" must be a number.')
+    return float(value)
+
+
+def _integer(msg: Dict[str, Any], key: str, default: Optional[int] = None) -> int:
+    value = msg.get(key, default)
+    if isinstance(value, bool) or not isinstance(value, int):
+        raise ValueError(f'"{key}" must be an integer.')
+    return value
+
+
+class RemoteCommands:
+    """The protocol's commands against a PlayerController; knows nothing about Tk.
+
+    on_change(cmd) is called after every command that may have changed playback
+    or the queue, so the app can update its widgets and timers.
+    """
+
+    def __init__(self, controller: "PlayerController", on_change: Callable[[str], None] = lambda cmd: None) -> None:
+        self.controller = controller
+        self.player = controller.player
+        self.on_change = on_change
+
+    def __call__(self, msg: Dict[str, Any]) -> Any:
+        """Run one request. Raises ValueError for an unknown command or bad arguments."""
+        cmd = msg.get("cmd")
+        method = getattr(self, f"cmd_{cmd}", None) if isinstance(cmd, str) else None
+        if method is None:
+            raise ValueError(f"Unknown command: {cmd!r}")
+        result = method(msg)
+        if cmd not in READ_ONLY:
+            self.on_change(cmd)
+        return result
+
+    def cmd_status(self, msg: Dict[str, Any]) -> Dict[str, Any]:
+        """What is playing, where, and how loud."""
+        player, ctl = self.player, self.controller
+        track = player.current_track()
+        path = track.path if track is not None else (str(player.current_file) if player.current_file else None)
+        title = (track.title if track is not None else None) or (Path(path).stem if path else None)
+        return {
+            "state": "paused" if player.paused else "playing" if player.active else "stopped",
+            "title": title,
+            "path": path,
+            "index": player.queue_index,
+            "queue_length": player.queue_len(),
+            "playlist": ctl.playing_playlist,
+            "position": round(player.elapsed(), 3),
+            "length": player.length,
+            "volume": player.volume,
+            "shuffle": ctl.shuffle,
+            "repeat_one": ctl.repeat_one,
+        }
+
+    def cmd_play(self, msg: Dict[str, Any]) -> Dict[str, Any]:
+        """Play a playlist by name, jump to a queue index, or resume/restart the current track."""
+        if "playlist" in msg:
+            if not self.controller.play_playlist(str(msg["playlist"])):
+                raise ValueError(f"Playlist {msg['playlist']!r} is missing or empty.")
+        elif "index" in msg:
+            self.controller.jump(_integer(msg, "index"))
+        elif self.player.paused:
+            self.player.pause()
+        elif self.player.current_file is None:
+            raise ValueError("Nothing loaded.")
+        elif not self.player.active:
+            self.player.play()
+        return self.cmd_status(msg)
+
+    def cmd_pause(self, msg: Dict[str, Any]) -> Dict[str, Any]:
+        """Toggle pause, or set it with "paused": true/false."""
+        want = msg.get("paused", not self.player.paused)
+        if self.player.active and bool(want) != self.player.paused:
+            self.player.pause()
+        return self.cmd_status(msg)
+
+    def cmd_stop(self, msg: Dict[str, Any]) -> Dict[str, Any]:
+        self.player.stop()
+        return self.cmd_status(msg)
+
+    def cmd_next(self, msg: Dict[str, Any]) -> Dict[str, Any]:
+        self.controller.next()
+        return self.cmd_status(msg)
+
+    def cmd_prev(self, msg: Dict[str, Any]) -> Dict[str, Any]:
+        if self.player.queue_len():
+            self.controller.prev()
+        return self.cmd_status(msg)
+
+    def cmd_seek(self, msg: Dict[str, Any]) -> Dict[str, Any]:
+        """Jump to "position" seconds in the current track."""
+        position = _number(msg, "position")
+        if not self.player.active:
+            raise ValueError("Nothing is playing.")
+        self.player.seek(position)
+        return self.cmd_status(msg)
+
+    def cmd_volume(self, msg: Dict[str, Any]) -> Dict[str, Any]:
+        """Set the volume to "value" in [0, 1]."""
+        value = _number(msg, "value")
+        if not 0.0 <= value <= 1.0:
+            raise ValueError('"value" must be between 0 and 1.')
+        self.player.set_volume(value)
+        return self.cmd_status(msg)
+
+    def cmd_queue(self, msg: Dict[str, Any]) -> Dict[str, Any]:
+        """A page of the play queue: "offset" (default 0) and "limit" (default QUEUE_PAGE) entries."""
+        offset = max(0, _integer(msg, "offset", 0))
+        limit = max(0, _integer(msg, "limit", QUEUE_PAGE))
+        page = self.player.queue[offset:offset + limit]
+        return {
+            "index": self.player.queue_index,
+            "length": self.player.queue_len(),
+            "offset": offset,
+            "tracks": [{"path": t.path, "title": t.title, "seconds": t.seconds} for t in page],
+        }
+
+    def cmd_enqueue(self, msg: Dict[str, Any]) -> Dict[str, Any]:
+        """Append "paths" (a list, or one path) to the queue (and to the playing playlist, if any)."""
+        paths = msg.get("paths")
+        if isinstance(paths, str):
+            paths = [paths]
+        if not isinstance(paths, list) or not all(isinstance(p, str) for p in paths):
+            raise ValueError('"paths" must be a list of file paths.')
+        return {"added": self.controller.enqueue(paths), "length": self.player.queue_len()}
+
+    def cmd_dequeue(self, msg: Dict[str, Any]) -> Dict[str, Any]:
+        """Remove queue entry "index"."""
+        self.controller.dequeue(_integer(msg, "index"))
+        return {"length": self.player.queue_len(), "index": self.player.queue_index}
+
+    def cmd_move(self, msg: Dict[str, Any]) -> Dict[str, Any]:
+        """Move queue entry "index" to position "to"."""
+        self.controller.move_in_queue(_integer(msg, "index"), _integer(msg, "to"))
+        return {"length": self.player.queue_len(), "index": self.player.queue_index}
+
+
+# ---- client ----
+class RemoteClient:
+    """Blocking client for scripts: call("next"), call("volume", value=0.5); events() after subscribe."""
+
+    def __init__(self, address: str, token: Optional[str] = None, timeout: float = 5.0) -> None:
+        kind, addr = parse_address(address)
+        family = socket.AF_UNIX if kind == "unix" else socket.AF_INET6 if ":" in addr[0] else socket.AF_INET
+        self.sock = socket.socket(family, socket.SOCK_STREAM)
+        self.sock.settimeout(timeout)
+        self.sock.connect(addr)
+        if kind == "tcp":
+            self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self._file = self.sock.makefile("rb")
+        self._events: Deque[Dict[str, Any]] = deque()
+        self._id = 0
+        if token:
+            self.call("auth", token=token)
+
+    def call(self, cmd: str, **args: Any) -> Any:
+        """Send one command and return its result. Raises RemoteError if the player refused it."""
+        self._id += 1
+        self.sock.sendall(_encode(dict(args, id=self._id, cmd=cmd)))
+        while True:
+            msg = self._read()
+            if "event" in msg:
+                self._events.append(msg)
+            elif msg.get("id") == self._id or "id" not in msg:
+                break
+        if not msg.get("ok"):
+            raise RemoteError(msg.get("error", "Request failed."))
+        return msg.get("result")
+
+    def events(self) -> Iterator[Dict[str, Any]]:
+        """Events sent since subscribing, then new ones as they arrive (blocks; ends when the player quits)."""
+        self.sock.settimeout(None)
+        while True:
+            while self._events:
+                yield self._events.popleft()
+            try:
+                msg = self._read()
+            except ConnectionError:
+                return
+            if "event" in msg:
+                yield msg
+
+    def _read(self) -> Dict[str, Any]:
+        line = self._file.readline()
+        if not line:
+            raise ConnectionError("The player closed the connection.")
+        return json.loads(line)
+
+    def close(self) -> None:
+        self._file.close()
+        self.sock.close()
+
+
+def main(argv: List[str]) -> int:
+    """python remote.py ADDRESS COMMAND [key=value ...]; values are JSON where they parse, else strings."""
+    if len(argv) < 2:
+        print("usage: python remote.py ADDRESS COMMAND [key=value ...]\n"
+              "  e.g. python remote.py 127.0.0.1:8765 volume value=0.4\n"
+              "       python remote.py unix:/tmp/mp3-player.sock subscribe", file=sys.stderr)
+        return 2
+    args: Dict[str, Any] = {}
+    for item in argv[2:]:
+        key, sep, value = item.partition("=")
+        if not sep:
+            print(f"Arguments are key=value, not {item!r}.", file=sys.stderr)
+            return 2
+        try:
+            args[key] = json.loads(value)
+        except ValueError:
+            args[key] = value  # Paths and playlist names don't need quoting
+    try:
+        client = RemoteClient(argv[0], os.environ.get(TOKEN_ENV))
+    except (OSError, ValueError) as e:
+        print(f"Can't connect to {argv[0]}: {e}", file=sys.stderr)
+        return 1
+    try:
+        print(json.dumps(client.call(argv[1], **args), ensure_ascii=False, indent=2))
+        if argv[1] == "subscribe":
+            for event in client.events():
+                print(json.dumps(event, ensure_ascii=False), flush=True)
+    except RemoteError as e:
+        print(f"Refused: {e}", file=sys.stderr)
+        return 1
+    except KeyboardInterrupt:
+        pass
+    finally:
+        client.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,109 @@
+"""Background metadata scanner for bulk adds (drag-and-drop, imports).
+
+Tags are read on a thread pool (mutagen releases the GIL while it waits on file
+I/O, which is what dominates on network shares). Workers push results onto a
+queue; the Tk thread drains it with after(), reports progress and, once every
+file is done, hands the results back in their original order so the caller can
+commit them to the store in one batch.
+"""
+
+from __future__ import annotations
+import os
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, List, Optional, Sequence, Tuple
+
+from metadata import Meta, MetadataCache
+
+DRAIN_MS = 50  # How often the Tk loop drains finished results.
+
+ProgressFn = Callable[[int, int], None]                        # (done, total)
+DoneFn = Callable[[List[Tuple[Path, Meta]], bool], None]       # (results, cancelled)
+
+
+class MetadataScanner:
+    """Reads metadata for many files off the Tk thread; one scan at a time."""
+
+    def __init__(self, root, cache: MetadataCache, workers: int | None = None) -> None:
+        self.root = root  # any Tk widget; used only for after()
+        self.cache = cache
+        self.workers = workers or min(16, (os.cpu_count() or 2) * 2)
+        self._results: "queue.Queue[tuple[int, Meta]]" = queue.Queue()
+        self._cancel = threading.Event()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._paths: List[Path] = []
+        self._metas: List[Optional[Meta]] = []
+        self._done = 0
+        self._on_progress: Optional[ProgressFn] = None
+        self._on_done: Optional[DoneFn] = None
+
+    @property
+    def busy(self) -> bool:
+        """True while a scan is in flight."""
+        return self._executor is not None
+
+    def start(self, paths: Sequence[Path], on_progress: ProgressFn, on_done: DoneFn) -> None:
+        """Scan paths in the background; callbacks run on the Tk thread."""
+        if self.busy:
+            raise RuntimeError("A scan is already running.")
+        self._paths = list(paths)
+        self._metas = [None] * len(self._paths)
+        self._done = 0
+        self._on_progress = on_progress
+        self._on_done = on_done
+        self._cancel.clear()
+        self._results = queue.Queue()
+        if not self._paths:
+            on_done([], False)
+            return
+
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="meta-scan")
+        for i, p in enumerate(self._paths):
+            self._executor.submit(self._work, i, p, self._results)
+        on_progress(0, len(self._paths))
+        self.root.after(DRAIN_MS, self._drain)
+
+    def cancel(self) -> None:
+        """Stop the scan; pending files are skipped and on_done gets cancelled=True."""
+        if self.busy:
+            self._cancel.set()
+
+    # ---- internals ----
+    def _work(self, i: int, path: Path, results: "queue.Queue[tuple[int, Meta]]") -> None:
+        """Worker thread: read one file's metadata (skipped once cancelled)."""
+        if self._cancel.is_set():
+            return
+        results.put((i, self.cache.get(path)))
+
+    def _drain(self) -> None:
+        """Tk thread: collect finished results, report progress, finish or re-arm."""
+        if self._cancel.is_set():
+            self._finish(cancelled=True)
+            return
+        try:
+            while True:
+                i, meta = self._results.get_nowait()
+                self._metas[i] = meta
+                self._done += 1
+        except queue.Empty:
+            pass
+        total = len(self._paths)
+        if self._on_progress is not None:
+            self._on_progress(self._done, total)
+        if self._done >= total:
+            self._finish(cancelled=False)
+        else:
+            self.root.after(DRAIN_MS, self._drain)
+
+    def _finish(self, cancelled: bool) -> None:
+        """Tear down the pool and hand the ordered results to on_done."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+        results = [] if cancelled else [(p, m) for p, m in zip(self._paths, self._metas) if m is not None]
+        on_done = self._on_done
+        self._on_progress = self._on_done = None
+        if on_done is not None:
+            on_done(results, cancelled)
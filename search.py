@@ -0,0 +1,226 @@
+"""Full-text search over every playlist: an inverted index kept in step with the store.
+
+Each track is indexed under the words of its title, its artist (if the entry
+carries one) and the last few components of its path (file name, album and
+artist folders). Words are lower-cased and accent-folded, so "beyo" finds
+"Beyoncé". A query matches tracks that contain every query word as a prefix
+of one of their words ("queen bo" -> "Bohemian Rhapsody – Queen").
+
+The index subscribes to the store and mirrors each committed op (like
+TrackTable does), so adds, removes, updates and renames cost only the tracks
+they touch; nothing is rebuilt after the first load. That first build (about
+a second per 100k tracks) can run on a worker thread, snapshot of the store
+included (so the SQLite backend loads its playlists there too): ops
+committed meanwhile are buffered and replayed by ready() on the caller's
+thread, minus those the snapshot already had. Very large adds (playlist file
+imports) are indexed the same way.
+"""
+
+from __future__ import annotations
+import bisect
+import os
+import re
+import unicodedata
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+import perf
+from playlist_store import PlaylistStore, move_items
+from track import Track
+
+PATH_PARTS = 3        # File name plus this many - 1 parent folders are indexed
+FILTER_COST = 8       # Checking one candidate's words costs about this many set insertions
+BACKGROUND_ADD = 5000 # Adds at least this large are indexed on a worker thread
+
+_WORD = re.compile(r"\w+")
+
+
+class SearchHit(NamedTuple):
+    """One result: the track and where it currently sits."""
+
+    playlist: str
+    index: int
+    track: Track
+
+
+def words(text: str) -> List[str]:
+    """Lower-cased, accent-folded words of text."""
+    text = text.casefold()
+    if not text.isascii():
+        text = "".join(c for c in unicodedata.normalize("NFKD", text) if not unicodedata.combining(c))
+    return _WORD.findall(text)
+
+
+def track_words(track: Track) -> Tuple[str, ...]:
+    """The distinct words a track is indexed under."""
+    parts = track.path.replace("\\", "/").rsplit("/", PATH_PARTS)[-PATH_PARTS:]  # Windows paths too
+    parts[-1] = os.path.splitext(parts[-1])[0]
+    return tuple(dict.fromkeys(words(" ".join((track.title or "", track.get("artist") or "", *parts)))))
+
+
+class SearchIndex:
+    """Inverted index (word -> tracks) over all playlists of a store, updated incrementally."""
+
+    def __init__(self, store: PlaylistStore, background: bool = False) -> None:
+        self.store = store
+        self._postings: Dict[str, Set[Track]] = {}
+        self._vocab: List[str] = []               # Sorted words, for prefix ranges
+        self._words: Dict[Track, Tuple[str, ...]] = {}
+        # Mirror of each playlist, in store order, as of store version _seq (see _load)
+        self._lists: Dict[str, List[Track]] = {}
+        self._seq = 0
+        self._pending: Optional[List[Dict[str, Any]]] = None  # Ops that arrived during a background build
+        self._build_future: Optional[Future] = None
+        store.subscribe(self.apply)
+        if background:
+            self._in_background(self._load)
+        else:
+            self._load()
+
+    def _in_background(self, work: Callable[[], None]) -> None:
+        """Run work on a worker thread; ops are buffered until ready() sees it finish."""
+        self._pending = []
+        builder = ThreadPoolExecutor(max_workers=1, thread_name_prefix="search-build")
+        self._build_future = builder.submit(work)
+        builder.shutdown(wait=False)
+
+    def _load(self) -> None:
+        """Copy the playlists (subscribed already, so nothing is missed) and index them."""
+        self._seq, self._lists = self.store.snapshot()
+        self._build()
+
+    @perf.timed("search.build")
+    def _build(self) -> None:
+        for tracks in self._lists.values():
+            for t in tracks:
+                self._add(t)
+        self._vocab = sorted(self._postings)
+
+    def ready(self) -> bool:
+        """True once the index can be searched; finishes a background build (call from the store's thread)."""
+        if self._pending is None:
+            return True
+        if not self._build_future.done():
+            return False
+        self._build_future.result()  # Re-raise a failed build
+        pending, self._pending = self._pending, None
+        for op in pending:
+            if op["seq"] > self._seq:  # Older ones were in the snapshot
+                self.apply(op)  # May hand a large add to a new background job
+        return self._pending is None
+
+    def close(self) -> None:
+        """Stop following the store."""
+        self.store.unsubscribe(self.apply)
+
+    def __len__(self) -> int:
+        return len(self._words)
+
+    # ---- queries ----
+    @perf.timed("search.query")
+    def search(self, query: str, limit: int = 200) -> List[SearchHit]:
+        """Tracks matching every word of query (as a prefix), in playlist order, at most limit.
+
+        Empty until ready().
+        """
+        if not self.ready():
+            return []
+        ranges = []
+        for term in set(words(query)):
+            lo = bisect.bisect_left(self._vocab, term)
+            hi = bisect.bisect_left(self._vocab, term + "\U0010ffff", lo)
+            if lo == hi:
+                return []
+            ranges.append((sum(len(self._postings[w]) for w in self._vocab[lo:hi]), term, lo, hi))
+        if not ranges:
+            return []
+        ranges.sort()
+
+        candidates: Set[Track] | None = None
+        for cost, term, lo, hi in ranges:  # Most selective term first
+            if hi - lo == 1:
+                posting = self._postings[self._vocab[lo]]  # Never mutated below: & makes a new set
+                candidates = posting if candidates is None else candidates & posting
+            elif candidates is not None and len(candidates) * FILTER_COST < cost:
+                # Cheaper to check the remaining candidates' words than to union the postings.
+                candidates = {t for t in candidates if any(w.startswith(term) for w in self._words[t])}
+            else:
+                matched: Set[Track] = set()
+                for w in self._vocab[lo:hi]:
+                    matched |= self._postings[w]
+                candidates = matched if candidates is None else candidates & matched
+            if not candidates:
+                return []
+
+        hits: List[SearchHit] = []
+        for name in self.store.list_playlists():
+            for i, t in enumerate(self._lists.get(name, ())):
+                if t in candidates:
+                    hits.append(SearchHit(name, i, t))
+                    if len(hits) >= limit:
+                        return hits
+        return hits
+
+    # ---- store sync ----
+    def apply(self, op: Dict[str, Any]) -> None:
+        """Mirror a committed PlaylistStore op into the index."""
+        if self._pending is not None:
+            self._pending.append(op)
+            return
+        kind = op["op"]
+        if kind == "create":
+            self._lists[op["name"]] = []
+        elif kind == "delete":
+            for t in self._lists.pop(op["name"], ()):
+                self._remove(t)
+        elif kind == "rename":
+            self._lists[op["new"]] = self._lists.pop(op["old"], [])
+        elif kind == "add":
+            tracks = self._lists.setdefault(op["playlist"], [])
+            tracks.extend(op["items"])
+            if len(op["items"]) >= BACKGROUND_ADD:
+                # A big import: keep the word extraction off the store's (Tk) thread.
+                self._in_background(lambda: self._add_all(op["items"]))
+            else:
+                self._add_all(op["items"])
+        elif kind == "update":
+            t = self._lists[op["playlist"]][op["index"]]
+            self._remove(t)
+            self._add_all([t])
+        elif kind == "remove":
+            tracks = self._lists[op["playlist"]]
+            for i in sorted(op["indices"], reverse=True):
+                self._remove(tracks.pop(i))
+        elif kind == "move":
+            tracks = self._lists[op["playlist"]]
+            tracks[:] = move_items(tracks, op["indices"], op["to"])
+
+    # ---- internals ----
+    def _add(self, t: Track) -> List[str]:
+        """Index one track; returns the words that were new to the vocabulary."""
+        fresh = []
+        ws = self._words[t] = track_words(t)
+        for w in ws:
+            posting = self._postings.get(w)
+            if posting is None:
+                posting = self._postings[w] = set()
+                fresh.append(w)
+            posting.add(t)
+        return fresh
+
+    def _add_all(self, tracks: Iterable[Track]) -> None:
+        """Index tracks and merge their new words into the sorted vocabulary."""
+        fresh = [w for t in tracks for w in self._add(t)]
+        if len(fresh) > 32:
+            self._vocab = sorted(self._postings)
+        else:
+            for w in fresh:
+                bisect.insort(self._vocab, w)
+
+    def _remove(self, t: Track) -> None:
+        for w in self._words.pop(t, ()):
+            posting = self._postings[w]
+            posting.discard(t)
+            if not posting:
+                del self._postings[w]
+                del self._vocab[bisect.bisect_left(self._vocab, w)]
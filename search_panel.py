@@ -0,0 +1,83 @@
+"""Search window: type to query search.SearchIndex, Enter/double-click to play (Ctrl+F)."""
+
+from __future__ import annotations
+import tkinter as tk
+from tkinter import ttk
+from typing import Callable, List
+
+from search import SearchHit, SearchIndex
+
+DEBOUNCE_MS = 120  # Wait for a pause in typing before querying.
+RESULT_LIMIT = 500
+
+PlayFn = Callable[[List[SearchHit], int], None]  # (results, index of the one to start with)
+
+
+class SearchPanel(tk.Toplevel):
+    """Query box plus a results table; results play as an ad-hoc queue."""
+
+    def __init__(self, master, index: SearchIndex, on_play: PlayFn) -> None:
+        super().__init__(master)
+        self.title("Search")
+        self.geometry("640x420")
+        self.columnconfigure(0, weight=1)
+        self.rowconfigure(1, weight=1)
+        self.index = index
+        self.on_play = on_play
+        self.hits: List[SearchHit] = []
+        self._job: str | None = None
+
+        self.query_var = tk.StringVar()
+        entry = ttk.Entry(self, textvariable=self.query_var)
+        entry.grid(row=0, column=0, sticky="ew", padx=8, pady=(8, 4))
+        entry.focus_set()
+        self.query_var.trace_add("write", lambda *_: self._schedule())
+        entry.bind("<Return>", lambda e: self._play_selected())
+        entry.bind("<Down>", lambda e: self._focus_results())
+
+        self.tree = ttk.Treeview(self, columns=("playlist", "duration"), show="tree headings", selectmode="browse")
+        self.tree.heading("#0", text="Title")
+        self.tree.heading("playlist", text="Playlist")
+        self.tree.heading("duration", text="Duration")
+        self.tree.column("#0", width=360)
+        self.tree.column("playlist", width=160)
+        self.tree.column("duration", width=80, anchor=tk.E)
+        self.tree.grid(row=1, column=0, sticky="nsew", padx=8)
+        self.tree.bind("<Double-1>", lambda e: self._play_selected())
+        self.tree.bind("<Return>", lambda e: self._play_selected())
+
+        self.status_var = tk.StringVar(value="")
+        ttk.Label(self, textvariable=self.status_var).grid(row=2, column=0, sticky="w", padx=8, pady=(4, 8))
+        self.bind("<Escape>", lambda e: self.destroy())
+
+    def _schedule(self) -> None:
+        """Debounce keystrokes into one query."""
+        if self._job is not None:
+            self.after_cancel(self._job)
+        self._job = self.after(DEBOUNCE_MS, self._run_query)
+
+    def _run_query(self) -> None:
+        self._job = None
+        if not self.index.ready():
+            self.status_var.set("Indexing library…")
+            self._job = self.after(DEBOUNCE_MS, self._run_query)
+            return
+        self.hits = self.index.search(self.query_var.get(), limit=RESULT_LIMIT)
+        self.tree.delete(*self.tree.get_children())
+        for i, hit in enumerate(self.hits):
+            t = hit.track
+            self.tree.insert("", "end", iid=str(i), text=t.title or t.path, values=(hit.playlist, t.duration or "--:--"))
+        if self.hits:
+            self.tree.selection_set("0")
+        more = "+" if len(self.hits) >= RESULT_LIMIT else ""
+        self.status_var.set(f"{len(self.hits)}{more} tracks" if self.query_var.get().strip() else "")
+
+    def _focus_results(self) -> None:
+        if self.hits:
+            self.tree.focus_set()
+            self.tree.focus(self.tree.selection()[0] if self.tree.selection() else "0")
+
+    def _play_selected(self) -> None:
+        sel = self.tree.selection()
+        if self.hits:
+            self.on_play(self.hits, int(sel[0]) if sel else 0)
@@ -0,0 +1,113 @@
+"""Seek bar: position slider plus elapsed and total time for the player's current track.
+
+Nothing polls the player here. The position is read from Player.elapsed()
+(a clock minus an anchor, so the read is free), and the bar only redraws
+when something visible changes: refresh() is called at the anchor events
+(play, pause, seek, stop, track change), and between them a single after()
+timer wakes at the next moment the display changes. That is the next whole
+second for the time label, or the next pixel of the slider for short tracks
+on a wide bar, but never more often than REDRAW_MIN_MS. Paused or stopped
+means no timer at all. While the slider is dragged the player is left alone
+until the button is released.
+"""
+
+from __future__ import annotations
+import tkinter as tk
+from tkinter import ttk
+from typing import Callable, Optional, Tuple
+
+import perf
+from metadata import fmt_duration
+from player import Player
+
+REDRAW_MIN_MS = 100  # Shortest interval between redraws while playing
+
+
+class SeekBar(ttk.Frame):
+    """Elapsed time, slider and length of the current track; on_seek(seconds) when the user lets go."""
+
+    def __init__(self, master, player: Player, on_seek: Callable[[float], None]) -> None:
+        super().__init__(master)
+        self.player = player
+        self.on_seek = on_seek
+        self.columnconfigure(1, weight=1)
+        self.elapsed_var = tk.StringVar(value=fmt_duration(0))
+        self.length_var = tk.StringVar(value=fmt_duration(None))
+        ttk.Label(self, textvariable=self.elapsed_var, width=6).grid(row=0, column=0)
+        self.scale = ttk.Scale(self, from_=0.0, to=1.0)
+        self.scale.grid(row=0, column=1, sticky="ew", padx=4)
+        ttk.Label(self, textvariable=self.length_var, width=6).grid(row=0, column=2)
+        self.scale.bind("<ButtonPress-1>", self._on_press, add="+")
+        self.scale.bind("<B1-Motion>", self._on_drag, add="+")
+        self.scale.bind("<ButtonRelease-1>", self._on_release, add="+")
+        self.scale.bind("<Configure>", lambda e: self.refresh(), add="+")
+        self._dragging = False
+        self._job: Optional[str] = None
+        self._shown: Tuple[object, ...] = ()  # (second, pixel, length) on screen now
+
+    def refresh(self) -> None:
+        """Redraw now and re-plan the next redraw (call whenever the position's anchor moved)."""
+        if self._job is not None:
+            self.after_cancel(self._job)
+            self._job = None
+        self._shown = ()
+        self._draw()
+        self._schedule()
+
+    # ---- drawing ----
+    def _position(self) -> Tuple[float, Optional[float]]:
+        if not self.player.active:
+            return 0.0, None
+        return self.player.elapsed(), self.player.length
+
+    def _draw(self) -> None:
+        """Update the widgets, only if the second shown or the slider's pixel changed."""
+        if self._dragging:
+            return
+        position, length = self._position()
+        width = max(1, self.scale.winfo_width())
+        pixel = int(position / length * width) if length else 0
+        key = (int(position), pixel, length)
+        if key == self._shown:
+            return
+        self._shown = key
+        self.elapsed_var.set(fmt_duration(int(position)))
+        self.length_var.set(fmt_duration(length))
+        self.scale.configure(to=length or 1.0)
+        self.scale.set(min(position, length) if length else 0.0)
+        self.scale.state(["!disabled" if length else "disabled"])  # Nothing to seek in
+
+    def _schedule(self) -> None:
+        """One timer to the next visible change; none while nothing moves."""
+        player = self.player
+        if self._dragging or not player.active or player.paused:
+            return
+        position, length = self._position()
+        step = 1.0  # The time label changes every second...
+        if length:
+            step = min(step, length / max(1, self.scale.winfo_width()))  # ...the slider every pixel
+        step = max(step, REDRAW_MIN_MS / 1000)
+        delay = step - position % step  # Wake on the step grid, not a fixed interval after now
+        self._job = self.after(int(delay * 1000) + 1, self._tick)
+
+    @perf.timed("ui.seek_bar")
+    def _tick(self) -> None:
+        self._job = None
+        self._draw()
+        self._schedule()
+
+    # ---- dragging ----
+    def _on_press(self, _evt) -> None:
+        if self.player.active and self.player.length:  # No length: _draw() disabled the slider
+            self._dragging = True
+
+    def _on_drag(self, _evt) -> None:
+        if self._dragging:
+            self.elapsed_var.set(fmt_duration(int(self.scale.get())))
+
+    def _on_release(self, _evt) -> None:
+        if not self._dragging:
+            return
+        self._dragging = False
+        self.on_seek(self.scale.get())
+        self.refresh()
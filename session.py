@@ -0,0 +1,62 @@
+"""Playback session kept across restarts (session.json next to playlists.json).
+
+PlayerController.session_state() describes what is playing: the playlist (or
+the ad-hoc queue), queue index, shuffle cycle and history, position and
+whether it was paused. SessionFile writes it every SESSION_SAVE_MS and when
+the window closes, so a restart resumes at most that far back; a stop clears
+it. Saving is cheap by design: the state is a few hundred bytes for a
+playlist queue (the shuffle snapshot grows only with what was played), it is
+only written when it changed (so nothing is written while paused or stopped),
+and there is no fsync: a torn file after a crash just means no resume.
+"""
+
+from __future__ import annotations
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+import perf
+
+SESSION_SAVE_MS = 5000  # How often the session is saved while something plays
+
+
+class SessionFile:
+    """Reads and writes the session state as one small JSON file."""
+
+    def __init__(self, path: Path | str) -> None:
+        self.path = Path(path)
+        self._written: Optional[str] = None  # Text last written ("" = file removed)
+
+    def load(self) -> Optional[Dict[str, Any]]:
+        """The saved state, or None if there is none or it can't be read."""
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                text = f.read()
+            state = json.loads(text)
+        except (OSError, ValueError):
+            return None
+        self._written = text
+        return state if isinstance(state, dict) else None
+
+    @perf.timed("session.save")
+    def save(self, state: Optional[Dict[str, Any]]) -> bool:
+        """Write state (None removes the file) unless it is what was last written. True if written.
+
+        An OSError (read-only folder, full disk) is not raised: the session is a convenience.
+        """
+        text = "" if state is None else json.dumps(state, ensure_ascii=False, separators=(",", ":"))
+        if text == self._written:
+            return False
+        try:
+            if state is None:
+                self.path.unlink(missing_ok=True)
+            else:
+                tmp = self.path.with_name(self.path.name + ".tmp")
+                with open(tmp, "w", encoding="utf-8") as f:
+                    f.write(text)
+                os.replace(tmp, self.path)
+        except OSError:
+            return False
+        self._written = text
+        return True
@@ -0,0 +1,256 @@
+"""Shuffle order and play history for a queue of n tracks (indices 0..n-1).
+
+ShuffleEngine replaces the old "shuffle a list, then pop(0)" pool:
+- draws use a lazy Fisher–Yates over an array: the not-yet-played indices live
+  in order[:left]; each draw swaps a random one to the end of that region, so a
+  pick is O(1) and starting a new cycle is O(1) too (no reshuffle needed)
+- pos[] is the inverse of order[], so any index can be located in O(1) (used to
+  exclude the current track and to handle queue edits)
+- history is a fixed-capacity ring buffer with a cursor for Prev/Next, so long
+  sessions don't grow memory without bound
+- a seed gives reproducible orders (random.Random)
+
+Queue edits: appending a track is O(1). Removing tracks renumbers the indices
+after them; remove_many() does that in one O(n) pass for a whole selection
+(removing them one by one would be O(k·n)).
+"""
+
+from __future__ import annotations
+import random
+from array import array
+from bisect import bisect_left
+from typing import Any, Dict, Iterable, List, Optional
+
+HISTORY_CAP = 1000  # Default number of played indices remembered for Prev/Next.
+
+
+class ShuffleEngine:
+    """Random play order with O(1) picks and a bounded back/forward history."""
+
+    def __init__(self, n: int = 0, seed: int | None = None, history_cap: int = HISTORY_CAP) -> None:
+        self.rng = random.Random(seed)
+        self.history_cap = max(1, history_cap)
+        self._order = array("q")
+        self._pos = array("q")
+        self._left = 0                      # order[:left] = indices not yet drawn this cycle
+        self._peeked: Optional[int] = None  # Drawn early by peek_next(), handed out by the next draw
+        # History ring buffer: entries are _hist[(_hstart + k) % cap] for k in 0.._hlen-1
+        self._hist: List[int] = [0] * self.history_cap
+        self._hstart = 0
+        self._hlen = 0
+        self._hpos = -1                     # Cursor into history (k), -1 when empty
+        self.reset(n)
+
+    def __len__(self) -> int:
+        return len(self._order)
+
+    # ---- cycle management ----
+    def reset(self, n: int, exclude: int | None = None) -> None:
+        """Start over for a queue of n tracks: fresh cycle, empty history."""
+        self._order = array("q", range(n))
+        self._pos = array("q", range(n))
+        self._hstart = self._hlen = 0
+        self._hpos = -1
+        self._new_cycle(exclude)
+
+    def _new_cycle(self, exclude: int | None = None) -> None:
+        """Mark every index undrawn again (optionally keeping exclude out of this cycle)."""
+        self._left = len(self._order)
+        self._peeked = None
+        if exclude is not None and 0 <= exclude < len(self._order):
+            self._take(exclude)
+
+    def _swap(self, i: int, j: int) -> None:
+        """Swap two slots of order[] and keep pos[] in step."""
+        a, b = self._order[i], self._order[j]
+        self._order[i], self._order[j] = b, a
+        self._pos[a], self._pos[b] = j, i
+
+    def _take(self, index: int) -> None:
+        """Move an undrawn index out of the undrawn region."""
+        p = self._pos[index]
+        if p < self._left:
+            self._swap(p, self._left - 1)
+            self._left -= 1
+
+    def _draw(self) -> Optional[int]:
+        """One Fisher–Yates step; starts a new cycle (avoiding an immediate repeat) when empty."""
+        if self._peeked is not None:
+            idx, self._peeked = self._peeked, None
+            return idx
+        n = len(self._order)
+        if n == 0:
+            return None
+        if self._left == 0:
+            if n == 1:
+                return 0
+            self._new_cycle(exclude=self.current())
+        j = self.rng.randrange(self._left)
+        self._swap(j, self._left - 1)
+        self._left -= 1
+        return self._order[self._left]
+
+    # ---- navigation ----
+    def peek_next(self) -> Optional[int]:
+        """Index advance() would return, without moving (the draw is reserved)."""
+        if self._hpos < self._hlen - 1:
+            return self._hist_at(self._hpos + 1)
+        if self._peeked is None:
+            self._peeked = self._draw()
+        return self._peeked
+
+    def advance(self) -> Optional[int]:
+        """Next index: step forward through history if we went back, else draw and record."""
+        if self._hpos < self._hlen - 1:
+            self._hpos += 1
+            return self._hist_at(self._hpos)
+        idx = self._draw()
+        if idx is not None:
+            self.record(idx)
+        return idx
+
+    def can_go_back(self) -> bool:
+        """True if back() has an earlier history entry to return."""
+        return self._hpos > 0
+
+    def back(self) -> Optional[int]:
+        """Step back in history and return that index (None at the start)."""
+        if self._hpos <= 0:
+            return None
+        self._hpos -= 1
+        return self._hist_at(self._hpos)
+
+    def current(self) -> Optional[int]:
+        """History entry under the cursor (the track playing), if any."""
+        return self._hist_at(self._hpos) if self._hpos >= 0 else None
+
+    def record(self, idx: int) -> None:
+        """Append a played index, discarding 'forward' entries if we had gone back.
+
+        The index also counts as drawn for the current shuffle cycle.
+        """
+        if self._hpos < self._hlen - 1:
+            self._hlen = self._hpos + 1
+        if self._hlen and self._hist_at(self._hlen - 1) == idx:
+            self._hpos = self._hlen - 1
+            return
+        if self._hlen == self.history_cap:
+            self._hstart = (self._hstart + 1) % self.history_cap  # Overwrite the oldest
+        else:
+            self._hlen += 1
+        self._hist[(self._hstart + self._hlen - 1) % self.history_cap] = idx
+        self._hpos = self._hlen - 1
+        if 0 <= idx < len(self._order):
+            if self._peeked == idx:
+                self._peeked = None
+            self._take(idx)
+
+    def history(self) -> List[int]:
+        """History entries, oldest first (for inspection/persistence)."""
+        return [self._hist_at(k) for k in range(self._hlen)]
+
+    def _hist_at(self, k: int) -> int:
+        return self._hist[(self._hstart + k) % self.history_cap]
+
+    # ---- persistence ----
+    def snapshot(self) -> Dict[str, Any]:
+        """What restore() needs to continue this cycle and history: small, JSON-ready.
+
+        Only the indices drawn so far are kept (the undrawn ones are implied), so the
+        size follows how much has been played, not the queue length.
+        """
+        drawn = [i for i in self._order[self._left:] if i != self._peeked]  # A peek wasn't played
+        return {"n": len(self._order), "drawn": drawn, "history": self.history(), "cursor": self._hpos}
+
+    def restore(self, state: Any) -> bool:
+        """Continue from a snapshot() taken with a queue of the same length.
+
+        Returns False, leaving the engine as it was, if state doesn't fit.
+        """
+        try:
+            n, drawn, history, cursor = state["n"], state["drawn"], state["history"], state["cursor"]
+            ok = n == len(self._order) and isinstance(cursor, int) and all(
+                isinstance(i, int) and 0 <= i < n for i in (*drawn, *history))
+        except (KeyError, TypeError):
+            return False
+        if not ok:
+            return False
+        self.reset(n)
+        for i in drawn:
+            self._take(i)
+        kept = history[-self.history_cap:]
+        self._hist = kept + [0] * (self.history_cap - len(kept))
+        self._hlen = len(kept)
+        self._hpos = max(-1, min(cursor - (len(history) - len(kept)), self._hlen - 1))
+        return True
+
+    # ---- queue edits ----
+    def append(self) -> None:
+        """A track was appended to the queue; it joins the undrawn part of this cycle."""
+        idx = len(self._order)
+        self._order.append(idx)
+        self._pos.append(idx)
+        # order[left] is the first drawn slot; swap the newcomer into the undrawn region.
+        self._swap(idx, self._left)
+        self._left += 1
+
+    def remove(self, index: int) -> None:
+        """The track at index left the queue; indices after it shift down by one."""
+        self.remove_many([index])
+
+    def remove_many(self, indices: Iterable[int]) -> None:
+        """The tracks at indices left the queue; the others are renumbered in one pass.
+
+        O(n + k log k) for k indices however many go, and O(k) plus the history
+        when they are all at the end of the queue.
+        """
+        n = len(self._order)
+        gone = sorted({i for i in indices if 0 <= i < n})
+        if not gone:
+            return
+        if self._peeked is not None and self._peeked in gone:
+            self._peeked = None
+        for i in gone:
+            self._take(i)
+        # Each one now sits in the drawn region: swap it to the very end of order[] and drop it.
+        for i in gone:
+            self._swap(self._pos[i], len(self._order) - 1)
+            self._order.pop()
+        m = len(self._order)
+        if gone[0] == m:
+            del self._pos[m:]  # Only the tail went: nothing to renumber
+        else:
+            # Survivors keep their slots; an old id maps to itself minus the removed ids below it.
+            new_id = list(range(gone[0]))  # Lists: building arrays from iterators is slower
+            pos = self._pos[:gone[0]]
+            for j, (lo, hi) in enumerate(zip(gone, gone[1:] + [n]), 1):
+                new_id.append(-1)
+                new_id.extend(range(lo + 1 - j, hi - j))
+                pos.extend(self._pos[lo + 1:hi])
+            self._order = array("q", list(map(new_id.__getitem__, self._order)))
+            self._pos = pos
+        if self._peeked is not None:
+            self._peeked -= bisect_left(gone, self._peeked)
+
+        def renumber(v: int) -> Optional[int]:
+            k = bisect_left(gone, v)
+            return None if k < len(gone) and gone[k] == v else v - k
+
+        self._remap_history(renumber)
+
+    def _remap_history(self, fn) -> None:
+        """Rewrite history entries through fn (None drops an entry), keeping the cursor sane."""
+        old = self.history()
+        cursor = self._hpos
+        kept: List[int] = []
+        new_cursor = -1
+        for k, v in enumerate(old):
+            nv = fn(v)
+            if nv is not None:
+                kept.append(nv)
+            if k == cursor:
+                new_cursor = len(kept) - 1
+        self._hist = kept + [0] * (self.history_cap - len(kept))
+        self._hstart = 0
+        self._hlen = len(kept)
+        self._hpos = new_cursor
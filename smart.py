@@ -0,0 +1,517 @@
+"""Smart playlists: playlists whose tracks are defined by rules, kept up to date incrementally.
+
+A smart playlist is an ordinary playlist in the store (so the dropdown,
+Play Playlist, Player.load_queue and the journal all work unchanged) whose
+contents SmartPlaylists maintains: every distinct file in the regular
+playlists that matches its rule, once, in the order it was first added.
+
+Rules are conditions over title, artist, duration, path and folder, all of
+them ("and") or any of them ("or"):
+    artist is Queen and duration < 3:00
+    folder ends with /Live or title contains (live)
+Text comparisons ignore case; durations accept "MM:SS" or seconds. Artist is
+the entry's artist field if it has one, else the part after " – " in the
+display title ("Title – Artist"); folder is the directory of the path.
+
+SmartPlaylists subscribes to the store and mirrors the regular playlists
+(like SearchIndex), so an add, remove or update re-evaluates only the tracks
+it touched. The edits that follow from a batch of ops (one commit, or a
+whole transaction such as a relink) are collected and written in one
+transaction, placed through a path -> index map of each smart playlist
+rather than a scan of it. The mirror can be built on a worker thread from a store
+snapshot; ready() then replays the ops that arrived meanwhile and brings the
+smart playlists up to date on the caller's thread. Definitions live in a small JSON sidecar (smart_playlists.json).
+When several processes share the store, the one that makes an edit updates
+the smart playlists; the others only follow (definitions made elsewhere are
+picked up at the next start).
+"""
+
+from __future__ import annotations
+import json
+import os
+import re
+from bisect import bisect_left
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+from playlist_store import PlaylistStore, move_items
+from track import Track, to_seconds
+
+FIELDS = ("title", "artist", "duration", "path", "folder")
+TEXT_OPS = ("is", "is not", "contains", "does not contain", "starts with", "ends with")
+NUMBER_OPS = ("<", "<=", ">", ">=", "=")
+
+_CONDITION = re.compile(
+    r"^\s*(?P<field>\w+)\s+(?P<op>is not|is|does not contain|contains|starts with|ends with|<=|>=|<|>|=)\s+(?P<value>.+?)\s*$",
+    re.IGNORECASE,
+)
+
+# Where a rule splits into conditions: " and "/" or " outside quoted values. A quoted value
+# starts and ends at a word boundary, so apostrophes inside words (Don't, O'Brien) don't count.
+_JOINER = re.compile(r"""(?<!\S)"[^"]*"(?!\S)|(?<!\S)'[^']*'(?!\S)|\s+(and|or)\s+""", re.IGNORECASE)
+
+_TEXT: Dict[str, Callable[[str, str], bool]] = {
+    "is": lambda a, b: a == b,
+    "is not": lambda a, b: a != b,
+    "contains": lambda a, b: b in a,
+    "does not contain": lambda a, b: b not in a,
+    "starts with": lambda a, b: a.startswith(b),
+    "ends with": lambda a, b: a.endswith(b),
+}
+_NUMBER: Dict[str, Callable[[int, int], bool]] = {
+    "<": lambda a, b: a < b,
+    "<=": lambda a, b: a <= b,
+    ">": lambda a, b: a > b,
+    ">=": lambda a, b: a >= b,
+    "=": lambda a, b: a == b,
+}
+
+
+def track_field(t: Track, field: str) -> Any:
+    """Value of a rule field for a track (text fields as-is, duration in seconds or None)."""
+    if field == "duration":
+        return t.seconds
+    if field == "path":
+        return t.path
+    if field == "folder":
+        return os.path.dirname(t.path.replace("\\", "/"))
+    if field == "title":
+        return t.title or Path(t.path).stem
+    # artist
+    artist = t.get("artist")
+    if artist:
+        return artist
+    title = t.title or ""
+    return title.rpartition(" – ")[2] if " – " in title else ""
+
+
+class Condition(NamedTuple):
+    """One "field op value" test."""
+
+    field: str
+    op: str
+    value: str
+
+    def compile(self) -> Callable[[Track], bool]:
+        """A predicate for this condition; raises ValueError if it is malformed."""
+        field, op = self.field, self.op
+        if field not in FIELDS:
+            raise ValueError(f"Unknown field {field!r} (use one of: {', '.join(FIELDS)}).")
+        if field == "duration":
+            if op not in NUMBER_OPS:
+                raise ValueError(f"duration needs one of {' '.join(NUMBER_OPS)}.")
+            limit = to_seconds(self.value) if ":" in self.value else to_seconds(_number(self.value))
+            if limit is None:
+                raise ValueError(f"Not a duration: {self.value!r} (use MM:SS or seconds).")
+            cmp_num = _NUMBER[op]
+            return lambda t: t.seconds is not None and cmp_num(t.seconds, limit)
+        if op not in TEXT_OPS:
+            raise ValueError(f"{field} needs one of: {', '.join(TEXT_OPS)}.")
+        value = self.value.casefold()
+        if field == "folder":
+            value = value.replace("\\", "/")
+        cmp_text = _TEXT[op]
+        return lambda t: cmp_text(track_field(t, field).casefold(), value)
+
+
+def _quoted(value: str) -> str:
+    """value as parse() reads it back: quoted if it has " and "/" or ", outer spaces or quotes."""
+    if (re.search(r"\s(and|or)\s", value, re.IGNORECASE) or value != value.strip()
+            or (value[:1] in "\"'" and value)):
+        return f"'{value}'" if '"' in value else f'"{value}"'
+    return value
+
+
+def _number(text: str) -> Optional[float]:
+    try:
+        return float(text)
+    except ValueError:
+        return None
+
+
+class SmartRule:
+    """Conditions combined with "all" (and) or "any" (or)."""
+
+    def __init__(self, conditions: Iterable[Condition], match: str = "all") -> None:
+        self.conditions = list(conditions)
+        if not self.conditions:
+            raise ValueError("A smart playlist needs at least one condition.")
+        if match not in ("all", "any"):
+            raise ValueError("match must be 'all' or 'any'.")
+        self.match = match
+        self._tests = [c.compile() for c in self.conditions]
+
+    @classmethod
+    def parse(cls, text: str) -> "SmartRule":
+        """Parse "artist is Queen and duration < 3:00" (all "and" or all "or").
+
+        Quote a value that contains " and " or " or " itself:
+        'artist is "Simon and Garfunkel" or title contains "rock or roll"' has two conditions.
+        """
+        text = text.strip()
+        parts, joiners, start = [], set(), 0
+        for m in _JOINER.finditer(text):
+            if m[1] is not None:
+                parts.append(text[start:m.start()])
+                joiners.add(m[1].lower())
+                start = m.end()
+        parts.append(text[start:])
+        if len(joiners) > 1:
+            raise ValueError("Use either 'and' or 'or' between conditions, not both.")
+        has_or = joiners == {"or"}
+        conditions = []
+        for part in parts:
+            m = _CONDITION.match(part)
+            if m is None:
+                raise ValueError(f"Can't read condition {part!r} (expected e.g. 'artist is Queen').")
+            value = m["value"].strip()
+            if len(value) >= 2 and value[0] == value[-1] and value[0] in "\"'":
+                value = value[1:-1]
+            conditions.append(Condition(m["field"].lower(), m["op"].lower(), value))
+        return cls(conditions, "any" if has_or else "all")
+
+    def __str__(self) -> str:
+        joiner = " or " if self.match == "any" else " and "
+        return joiner.join(f"{c.field} {c.op} {_quoted(c.value)}" for c in self.conditions)
+
+    @classmethod
+    def from_dict(cls, d: Dict[str, Any]) -> "SmartRule":
+        return cls((Condition(*c) for c in d["conditions"]), d.get("match", "all"))
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"match": self.match, "conditions": [list(c) for c in self.conditions]}
+
+    def matches(self, t: Track) -> bool:
+        if self.match == "all":
+            return all(test(t) for test in self._tests)
+        return any(test(t) for test in self._tests)
+
+
+class SmartPlaylists:
+    """Keeps the store's smart playlists in step with the regular ones."""
+
+    def __init__(self, store: PlaylistStore, db_path: Path | str = "smart_playlists.json", background: bool = False) -> None:
+        self.store = store
+        self.db_path = Path(db_path)
+        self.rules: Dict[str, SmartRule] = {}
+        self._load()
+        # Mirror of the regular playlists (store order) and every copy of each file in them
+        self._lists: Dict[str, List[Track]] = {}
+        self._copies: Dict[str, List[Track]] = {}
+        self._filed: Dict[Track, str] = {}  # Path each mirrored entry is filed under in _copies
+        # Paths currently in each smart playlist
+        self._members: Dict[str, Set[str]] = {}
+        self._following = False  # Applying another process's op: mirror only, no writes
+        # Edits implied by the ops of the batch being applied, written together by _flush()
+        self._adds: Dict[str, Dict[str, Tuple[str, Optional[str], Optional[str]]]] = {}  # path -> (path, title, duration)
+        self._drops: Dict[str, Set[str]] = {}
+        self._updates: Dict[str, Dict[str, Track]] = {}  # path -> the source entry to copy title/duration from
+        self._flushing = False
+        # path -> index in each smart playlist, and its length (built on first use, see _positions)
+        self._where: Dict[str, Dict[str, int]] = {}
+        self._sizes: Dict[str, int] = {}
+        self._seq = 0            # Store version the mirror was built from
+        self._pending: Optional[List[Dict[str, Any]]] = None  # Ops that arrived during a background build
+        self._build_future: Optional[Future] = None
+        store.subscribe_batches(self.apply_batch)
+        if background:
+            self._pending = []
+            builder = ThreadPoolExecutor(max_workers=1, thread_name_prefix="smart-build")
+            self._build_future = builder.submit(self._mirror)
+            builder.shutdown(wait=False)
+        else:
+            self._mirror()
+            self._catch_up()
+
+    def _mirror(self) -> None:
+        """Copy the regular playlists and file every entry under its path (on the worker, if in the background)."""
+        self._seq, lists = self.store.snapshot()
+        self._lists = {name: tracks for name, tracks in lists.items() if name not in self.rules}
+        for tracks in self._lists.values():
+            for t in tracks:
+                self._copies.setdefault(t.path, []).append(t)
+                self._filed[t] = t.path
+
+    def _catch_up(self) -> None:
+        """Bring every smart playlist up to date with anything that changed while the rules were not being followed."""
+        with self.store.transaction():
+            for name in list(self.rules):
+                self.refresh(name)
+
+    def ready(self, wait: bool = False) -> bool:
+        """True once the mirror is built and the smart playlists caught up (call from the store's thread).
+
+        With wait, blocks until a background build is done instead of returning False.
+        """
+        if self._pending is None:
+            return True
+        if not (wait or self._build_future.done()):
+            return False
+        self._build_future.result()  # Re-raise a failed build
+        pending, self._pending = self._pending, None
+        self._following = True  # Mirror only: _catch_up() recomputes every smart playlist next
+        try:
+            for op in pending:
+                if op["seq"] > self._seq:  # Older ones were in the snapshot
+                    self._apply(op)
+        finally:
+            self._following = False
+        self._catch_up()
+        return True
+
+    # ---- definitions ----
+    def is_smart(self, name: str) -> bool:
+        return name in self.rules
+
+    def define(self, name: str, rule: SmartRule) -> None:
+        """Create smart playlist name (or change an existing one's rule) and fill it."""
+        self.ready(wait=True)
+        name = name.strip()
+        exists = name in self.store.list_playlists()
+        if exists and name not in self.rules:
+            raise ValueError("A regular playlist with that name already exists.")
+        if not exists:
+            self.store.create_playlist(name)
+        self._lists.pop(name, None)  # Not a source any more (it was just created, so it is empty)
+        self.rules[name] = rule
+        self._save()
+        self.refresh(name)
+
+    def refresh(self, name: str) -> None:
+        """Recompute one smart playlist from scratch (startup and rule changes only)."""
+        rule = self.rules[name]
+        wanted: Dict[str, Track] = {}
+        for path, copies in self._copies.items():
+            if rule.matches(copies[0]):
+                wanted[path] = copies[0]
+        current = self.store.get_tracks(name)
+        seen: Set[str] = set()
+        stale = []
+        for i, t in enumerate(current):
+            if t.path not in wanted or t.path in seen:
+                stale.append(i)
+            seen.add(t.path)
+        with self.store.transaction():
+            self.store.remove_tracks_at(name, stale)
+            self.store.add_tracks(name, [(t.path, t.title, t.duration) for p, t in wanted.items() if p not in seen])
+        self._members[name] = set(wanted)
+        self._forget_positions(name)
+
+    # ---- store sync ----
+    def apply_batch(self, ops: List[Dict[str, Any]]) -> None:
+        """Store batch listener: mirror ops committed together, then write what they imply in one transaction."""
+        for op in ops:
+            self.apply(op)
+        self._flush()
+
+    def apply(self, op: Dict[str, Any]) -> None:
+        """Re-evaluate the tracks a committed store op touched (the edits wait for _flush()).
+
+        For an op from another process ("remote") only the mirror is updated: that
+        process updates the smart playlists, and its edits arrive as ops as well.
+        """
+        if self._pending is not None:
+            self._pending.append(op)
+            return
+        if op.get("remote") and op.get("playlist") in self.rules:
+            self._members[op["playlist"]] = {t.path for t in self.store.get_tracks(op["playlist"])}
+            self._forget_positions(op["playlist"])
+            return
+        self._following = bool(op.get("remote"))
+        try:
+            self._apply(op)
+        finally:
+            self._following = False
+
+    def _apply(self, op: Dict[str, Any]) -> None:
+        kind = op["op"]
+        if kind == "create":
+            self._lists[op["name"]] = []
+        elif kind == "delete":
+            name = op["name"]
+            if self.rules.pop(name, None) is not None:
+                self._members.pop(name, None)
+                for edits in (self._adds, self._drops, self._updates):
+                    edits.pop(name, None)
+                self._forget_positions(name)
+                self._save()
+            else:
+                self._gone(self._lists.pop(name, []))
+        elif kind == "rename":
+            old, new = op["old"], op["new"]
+            if old in self.rules:
+                self.rules[new] = self.rules.pop(old)
+                self._members[new] = self._members.pop(old, set())
+                for state in (self._adds, self._drops, self._updates, self._where, self._sizes):
+                    if old in state:
+                        state[new] = state.pop(old)
+                self._save()
+            elif old in self._lists:
+                self._lists[new] = self._lists.pop(old)
+        elif op["playlist"] not in self._lists:
+            if not self._flushing:
+                self._forget_positions(op["playlist"])  # Edited by someone else: positions unknown
+            return  # An edit of a smart playlist (including our own)
+        elif kind == "add":
+            self._lists[op["playlist"]].extend(op["items"])
+            fresh = []
+            for t in op["items"]:
+                copies = self._copies.setdefault(t.path, [])
+                copies.append(t)
+                self._filed[t] = t.path
+                if len(copies) == 1:
+                    fresh.append(t)
+            for name, rule in list(self.rules.items()):
+                self._add(name, [t for t in fresh if rule.matches(t)])
+        elif kind == "remove":
+            tracks = self._lists[op["playlist"]]
+            self._gone([tracks.pop(i) for i in sorted(op["indices"], reverse=True)])
+        elif kind == "update":
+            t = self._lists[op["playlist"]][op["index"]]
+            if self._filed.get(t, t.path) != t.path:
+                # Relinked: leave the old path (and smart playlists, if it was the last copy), join the new one.
+                self._gone([t])
+                self._copies.setdefault(t.path, []).append(t)
+                self._filed[t] = t.path
+            self._changed(t)
+        elif kind == "move":
+            tracks = self._lists[op["playlist"]]
+            tracks[:] = move_items(tracks, op["indices"], op["to"])
+
+    # ---- internals ----
+    def _add(self, name: str, tracks: List[Track]) -> None:
+        """Queue tracks to be appended to smart playlist name."""
+        if not tracks or self._following:
+            return
+        self._members.setdefault(name, set()).update(t.path for t in tracks)
+        drops = self._drops.get(name, set())
+        adds = self._adds.setdefault(name, {})
+        for t in tracks:
+            if t.path in drops:
+                drops.discard(t.path)  # Dropped earlier in this batch: keep the entry, refresh it
+                self._updates.setdefault(name, {})[t.path] = t
+            else:
+                adds[t.path] = (t.path, t.title, t.duration)
+
+    def _drop(self, name: str, paths: Set[str]) -> None:
+        """Queue the entries for paths to be removed from smart playlist name."""
+        if self._following:
+            return
+        members = self._members.get(name, set())
+        paths = paths & members
+        if not paths:
+            return
+        members -= paths
+        adds = self._adds.get(name)
+        if adds:
+            queued = {path for path in paths if adds.pop(path, None) is not None}
+            paths = paths - queued  # Added earlier in this batch: just don't add them
+        if paths:
+            self._drops.setdefault(name, set()).update(paths)
+            for path in paths:
+                self._updates.get(name, {}).pop(path, None)
+
+    def _gone(self, removed: List[Track]) -> None:
+        """Regular-playlist entries were removed: files with no copies left leave every smart playlist."""
+        paths = set()
+        for t in removed:
+            path = self._filed.pop(t, None)
+            if path is None:
+                continue
+            copies = self._copies[path]
+            copies.remove(t)
+            if not copies:
+                del self._copies[path]
+                paths.add(path)
+        if paths:
+            for name in list(self.rules):
+                self._drop(name, paths)
+
+    def _changed(self, t: Track) -> None:
+        """A regular-playlist entry's title/duration changed: re-test it everywhere."""
+        if self._following:
+            return
+        for name, rule in list(self.rules.items()):
+            member = t.path in self._members.get(name, ())
+            if rule.matches(t):
+                if not member:
+                    self._add(name, [t])
+                else:
+                    self._updates.setdefault(name, {})[t.path] = t  # Compared with the entry in _flush()
+            elif member:
+                self._drop(name, {t.path})
+
+    def _flush(self) -> None:
+        """Write the queued smart playlist edits: removals, then appends, then title/duration updates."""
+        if not (self._adds or self._drops or self._updates):
+            return
+        adds, drops, updates = self._adds, self._drops, self._updates
+        self._adds, self._drops, self._updates = {}, {}, {}
+        self._flushing = True
+        try:
+            with self.store.transaction():
+                for name in [n for n in self.rules if n in adds or n in drops or n in updates]:
+                    where = self._positions(name)
+                    gone = sorted(where[p] for p in drops.get(name, ()) if p in where)
+                    if gone:
+                        self.store.remove_tracks_at(name, gone)
+                        # Later entries move up by the number of removed ones before them
+                        dropped = set(gone)
+                        self._where[name] = where = {
+                            p: i - bisect_left(gone, i) for p, i in where.items() if i not in dropped
+                        }
+                        self._sizes[name] -= len(gone)
+                    items = adds.get(name)
+                    if items:
+                        self.store.add_tracks(name, list(items.values()))
+                        for path in items:
+                            where.setdefault(path, self._sizes[name])
+                            self._sizes[name] += 1
+                    changed = [(where[p], t) for p, t in updates.get(name, {}).items() if p in where]
+                    if changed:
+                        current = self.store.get_tracks(name)
+                        for i, t in changed:
+                            s = current[i]
+                            if (s.title, s.seconds) != (t.title, t.seconds):
+                                self.store.update_track_at(name, i, title=t.title, duration=t.duration)
+        finally:
+            self._flushing = False
+
+    def _positions(self, name: str) -> Dict[str, int]:
+        """path -> index of its (first) entry in smart playlist name; built once, then kept up to date."""
+        where = self._where.get(name)
+        if where is None:
+            tracks = self.store.get_tracks(name)
+            where = {}
+            for i, t in enumerate(tracks):
+                where.setdefault(t.path, i)
+            self._where[name] = where
+            self._sizes[name] = len(tracks)
+        return where
+
+    def _forget_positions(self, name: str) -> None:
+        self._where.pop(name, None)
+        self._sizes.pop(name, None)
+
+    def _load(self) -> None:
+        if not self.db_path.exists():
+            return
+        try:
+            data = json.loads(self.db_path.read_text(encoding="utf-8"))
+            rules = {name: SmartRule.from_dict(d) for name, d in data.get("playlists", {}).items()}
+        except (ValueError, KeyError, TypeError):
+            return  # Unreadable: start without smart playlists rather than fail to open
+        # Definitions whose playlist is gone (deleted while the file was not being updated) are dropped.
+        names = set(self.store.list_playlists())
+        self.rules = {name: rule for name, rule in rules.items() if name in names}
+
+    def _save(self) -> None:
+        """Write the definitions atomically (temp file + rename)."""
+        payload = {"playlists": {name: rule.to_dict() for name, rule in sorted(self.rules.items())}}
+        tmp = self.db_path.with_name(self.db_path.name + ".tmp")
+        with tmp.open("w", encoding="utf-8") as f:
+            f.write(json.dumps(payload, indent=2, ensure_ascii=False))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.db_path)
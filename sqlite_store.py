@@ -0,0 +1,284 @@
+"""SQLite storage backend for playlists (same public API as PlaylistStore).
+
+Meant for large libraries where loading one monolithic playlists.json at startup
+no longer scales:
+- only playlist names are read at startup; a playlist's tracks are fetched the
+  first time it is used (get_tracks, add, update, remove)
+- each op (or each PlaylistStore.transaction() block) is one SQL transaction,
+  and a bulk add is a single executemany
+- tracks keep an explicit "pos" column, indexed per playlist, for ordering
+- other processes' commits are noticed through PRAGMA data_version (no I/O
+  when nothing changed); the loaded playlists are then re-read and only the
+  differences applied, as with the JSON store
+
+Schema:
+  playlists(id, name UNIQUE)
+  tracks(playlist_id -> playlists.id ON DELETE CASCADE, pos, path, title, duration, extra)
+  meta(key, value)          # currently just the op sequence number ("seq")
+
+"extra" holds any fields beyond path/title/duration as a JSON object.
+
+One-shot migration from the JSON layout:
+  python sqlite_store.py playlists.json playlists.db
+"""
+
+from __future__ import annotations
+import json
+import sqlite3
+import sys
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import perf
+from playlist_store import PlaylistStore, _diff, move_items
+from track import Track, to_seconds
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS playlists (
+    id   INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS tracks (
+    playlist_id INTEGER NOT NULL REFERENCES playlists(id) ON DELETE CASCADE,
+    pos         INTEGER NOT NULL,
+    path        TEXT NOT NULL,
+    title       TEXT,
+    duration    TEXT,
+    extra       TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_tracks_playlist_pos ON tracks(playlist_id, pos);
+CREATE INDEX IF NOT EXISTS idx_tracks_path ON tracks(path);
+CREATE TABLE IF NOT EXISTS meta (
+    key   TEXT PRIMARY KEY,
+    value INTEGER
+);
+"""
+
+
+def _row(playlist_id: int, pos: int, track: Track) -> tuple:
+    """Flatten a Track into a tracks-table row."""
+    return (
+        playlist_id,
+        pos,
+        track.path,
+        track.title,
+        track.duration,
+        json.dumps(track.extra, ensure_ascii=False) if track.extra else None,
+    )
+
+
+def _track(path: str, title: Optional[str], duration: Optional[str], extra: Optional[str]) -> Track:
+    """Build a Track from a tracks-table row."""
+    return Track(path, title, to_seconds(duration), json.loads(extra) if extra else None)
+
+
+class SqlitePlaylistStore(PlaylistStore):
+    """PlaylistStore persisted in SQLite, with per-playlist lazy loading."""
+
+    def __init__(self, db_path: Path | str = "playlists.db") -> None:
+        # The app opens the store on a background thread and then uses it on the Tk thread.
+        self._db = sqlite3.connect(str(db_path), check_same_thread=False)
+        self._db.execute("PRAGMA foreign_keys=ON")
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(_SCHEMA)
+        self._ids: Dict[str, int] = {}     # playlist name -> row id, as of the in-memory state
+        self._db_ids: Dict[str, int] = {}  # the same as of the database (what _write works against)
+        self._fetching = threading.Lock()  # One first-use fetch at a time (snapshot() may run on a worker)
+        super().__init__(db_path)
+
+    @perf.timed("store.load")
+    def _load(self) -> None:
+        """Read playlist names only; track lists stay unloaded (None) until used."""
+        self._db_ids = {name: pid for pid, name in self._db.execute("SELECT id, name FROM playlists")}
+        self._ids = dict(self._db_ids)
+        self.data = {"playlists": {name: None for name in self._ids}}
+        row = self._db.execute("SELECT value FROM meta WHERE key = 'seq'").fetchone()
+        self.seq = row[0] if row else 0
+
+    def _save(self) -> None:
+        """Nothing to do: every op is already committed to the database."""
+
+    def compact(self) -> None:
+        """Nothing to fold; SQLite has no separate journal to merge."""
+
+    def close(self) -> None:
+        """Close the database connection."""
+        self._db.close()
+
+    def _tracks(self, playlist: str) -> List[Track]:
+        """Return the cached track list, fetching it from the database on first use."""
+        tracks = self.data["playlists"][playlist]
+        if tracks is None:
+            with self._fetching:
+                tracks = self.data["playlists"][playlist]
+                if tracks is None:  # Not fetched by another thread meanwhile
+                    tracks = self._fetch(self._ids[playlist])
+                    self.data["playlists"][playlist] = tracks
+        return tracks
+
+    def _fetch(self, pid: int) -> List[Track]:
+        rows = self._db.execute(
+            "SELECT path, title, duration, extra FROM tracks WHERE playlist_id = ? ORDER BY pos", (pid,)
+        )
+        return [_track(*row) for row in rows]
+
+    # ---- other processes ----
+    def _stamp(self) -> Any:
+        """SQLite's data_version: changes when another connection commits (not for our own commits)."""
+        return self._db.execute("PRAGMA data_version").fetchone()[0]
+
+    def _mark_seen(self) -> None:
+        self._seen = self._stamp()
+
+    def _catch_up(self, stamp: Any) -> List[Dict[str, Any]]:
+        """Re-read names and the loaded playlists; apply the differences as ops."""
+        row = self._db.execute("SELECT value FROM meta WHERE key = 'seq'").fetchone()
+        seq = row[0] if row else 0
+        if seq == self.seq:
+            return []
+        ids = {name: pid for pid, name in self._db.execute("SELECT id, name FROM playlists")}
+        playlists = self.data["playlists"]
+        # Unloaded playlists stay unloaded; new ones are read so listeners get their tracks.
+        fresh = {name: None if playlists.get(name, []) is None else self._fetch(pid) for name, pid in ids.items()}
+        self._ids, self._db_ids = ids, dict(ids)
+        ops = _diff(playlists, fresh)
+        self._apply_all(ops, max(seq, self.seq))
+        return ops
+
+    def unload(self, playlist: str) -> None:
+        """Drop a playlist's cached tracks from memory (reloaded lazily on next use)."""
+        if playlist in self.data["playlists"]:
+            self.data["playlists"][playlist] = None
+
+    def _apply(self, op: Dict[str, Any]) -> None:
+        """As PlaylistStore._apply, keeping the name -> id map in step (an unloaded playlist
+        renamed earlier in a transaction is fetched under its new name)."""
+        kind = op["op"]
+        if kind == "rename" and op["old"] in self._ids:
+            self._ids[op["new"]] = self._ids.pop(op["old"])
+        elif kind == "delete":
+            self._ids.pop(op["name"], None)
+        super()._apply(op)
+
+    def _rollback(self) -> None:
+        super()._rollback()
+        self._ids = dict(self._db_ids)  # Nothing was written: back to the database's names
+
+    @perf.timed("store.persist")
+    def _persist(self, ops: List[Dict[str, Any]]) -> None:
+        """Write ops in a single transaction."""
+        ids = dict(self._db_ids)
+        try:
+            with self._db:
+                for op in ops:
+                    self._write(op)
+                self._db.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('seq', ?)", (self.seq,))
+        except BaseException:
+            self._db_ids = ids  # The SQL side was rolled back; keep the id map in step.
+            raise
+        self._ids = dict(self._db_ids)  # Now includes the ids of created playlists
+
+    def _renumber(self, pid: int, rowids: List[int], start: int = 0) -> None:
+        """Give rowids consecutive positions from start, in list order."""
+        self._db.executemany(
+            "UPDATE tracks SET pos = ? WHERE rowid = ?",
+            ((start + i, rowid) for i, rowid in enumerate(rowids)),
+        )
+
+    def _rowids(self, pid: int, from_pos: int = 0) -> List[int]:
+        """Rowids of a playlist's tracks at pos >= from_pos, in order."""
+        return [
+            r for (r,) in self._db.execute(
+                "SELECT rowid FROM tracks WHERE playlist_id = ? AND pos >= ? ORDER BY pos", (pid, from_pos)
+            )
+        ]
+
+    def _write(self, op: Dict[str, Any]) -> None:
+        """Translate one op into SQL against the database's current (pre-op) state."""
+        kind = op["op"]
+        if kind == "create":
+            cur = self._db.execute("INSERT INTO playlists (name) VALUES (?)", (op["name"],))
+            self._db_ids[op["name"]] = cur.lastrowid
+        elif kind == "delete":
+            pid = self._db_ids.pop(op["name"])
+            self._db.execute("DELETE FROM playlists WHERE id = ?", (pid,))
+        elif kind == "rename":
+            pid = self._db_ids.pop(op["old"])
+            self._db_ids[op["new"]] = pid
+            self._db.execute("UPDATE playlists SET name = ? WHERE id = ?", (op["new"], pid))
+        elif kind == "add":
+            pid = self._db_ids[op["playlist"]]
+            (start,) = self._db.execute("SELECT COUNT(*) FROM tracks WHERE playlist_id = ?", (pid,)).fetchone()
+            self._db.executemany(
+                "INSERT INTO tracks (playlist_id, pos, path, title, duration, extra) VALUES (?, ?, ?, ?, ?, ?)",
+                (_row(pid, start + i, item) for i, item in enumerate(op["items"])),
+            )
+        elif kind == "update":
+            pid = self._db_ids[op["playlist"]]
+            row = self._db.execute(
+                "SELECT path, title, duration, extra FROM tracks WHERE playlist_id = ? AND pos = ?",
+                (pid, op["index"]),
+            ).fetchone()
+            track = _track(*row)
+            track.update(op["fields"])
+            _, _, path, title, duration, extra = _row(pid, op["index"], track)
+            self._db.execute(
+                "UPDATE tracks SET path = ?, title = ?, duration = ?, extra = ? WHERE playlist_id = ? AND pos = ?",
+                (path, title, duration, extra, pid, op["index"]),
+            )
+        elif kind == "remove":
+            pid = self._db_ids[op["playlist"]]
+            indices = op.get("indices", [op.get("index")])
+            self._db.executemany(
+                "DELETE FROM tracks WHERE playlist_id = ? AND pos = ?", ((pid, i) for i in indices)
+            )
+            # Close the gaps: only rows after the first removed position move.
+            first = min(indices)
+            self._renumber(pid, self._rowids(pid, first), first)
+        elif kind == "move":
+            pid = self._db_ids[op["playlist"]]
+            self._renumber(pid, move_items(self._rowids(pid), op["indices"], op["to"]))
+        else:
+            raise KeyError(kind)
+
+
+def migrate_json_to_sqlite(json_path: Path | str, db_path: Path | str) -> int:
+    """Copy every playlist from a JSON store (snapshot + journal) into a new SQLite store.
+
+    Refuses to run if the target already has playlists. Returns the number of tracks copied.
+    """
+    source = PlaylistStore(json_path)
+    target = SqlitePlaylistStore(db_path)
+    try:
+        if target.list_playlists():
+            raise ValueError(f"{db_path} already contains playlists; refusing to migrate over it.")
+        copied = 0
+        with target._db:
+            for name in source.list_playlists():
+                cur = target._db.execute("INSERT INTO playlists (name) VALUES (?)", (name,))
+                tracks = source.get_tracks(name)
+                target._db.executemany(
+                    "INSERT INTO tracks (playlist_id, pos, path, title, duration, extra) VALUES (?, ?, ?, ?, ?, ?)",
+                    (_row(cur.lastrowid, i, t) for i, t in enumerate(tracks)),
+                )
+                copied += len(tracks)
+        return copied
+    finally:
+        target.close()
+
+
+def open_store(json_path: Path | str = "playlists.json", db_path: Optional[Path | str] = None) -> PlaylistStore:
+    """Use the SQLite store if it exists (i.e. the library was migrated), else the JSON one."""
+    db = Path(db_path) if db_path is not None else Path(json_path).with_suffix(".db")
+    if db.exists():
+        return SqlitePlaylistStore(db)
+    return PlaylistStore(json_path, journal=True)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        print("usage: python sqlite_store.py <playlists.json> <playlists.db>")
+        sys.exit(2)
+    n = migrate_json_to_sqlite(sys.argv[1], sys.argv[2])
+    print(f"Migrated {n} tracks into {sys.argv[2]}")
@@ -0,0 +1,128 @@
+"""Compact in-memory representation of a playlist entry.
+
+Tracks used to be plain dicts ({"path", "title", "duration": "MM:SS"}); with a
+large library the per-dict overhead and the repeated strings dominated memory.
+Track uses __slots__, interns path and title (the same file in several
+playlists shares one string), and keeps the duration as integer seconds.
+
+The store and the player share Track objects by reference. For existing
+callers a Track still answers the read-only dict idioms t["path"] and
+t.get("duration") ("MM:SS" string), and to_dict()/from_dict() convert to and
+from the playlists.json entry format.
+"""
+
+from __future__ import annotations
+import sys
+from functools import lru_cache
+from typing import Any, Dict, Iterator, Optional
+
+from metadata import fmt_duration, parse_duration
+
+_FIELDS = frozenset(("path", "title", "duration"))
+
+
+class Track:
+    """One playlist entry: path, display title, duration in seconds, optional extra fields."""
+
+    __slots__ = ("path", "title", "seconds", "extra")
+
+    def __init__(
+        self,
+        path: str,
+        title: Optional[str] = None,
+        seconds: Optional[int] = None,
+        extra: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        self.path: str = sys.intern(str(path))
+        self.title: Optional[str] = sys.intern(title) if title else None
+        self.seconds: Optional[int] = seconds
+        self.extra: Optional[Dict[str, Any]] = extra or None  # Fields beyond path/title/duration
+
+    # ---- conversion ----
+    @classmethod
+    def from_dict(cls, d: Dict[str, Any]) -> "Track":
+        """Build from a playlists.json entry."""
+        extra = None if d.keys() <= _FIELDS else {k: v for k, v in d.items() if k not in _FIELDS}
+        return cls(d["path"], d.get("title"), to_seconds(d.get("duration")), extra)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """The playlists.json entry for this track (duration as "MM:SS", omitted if unknown)."""
+        d: Dict[str, Any] = {"path": self.path}
+        if self.title is not None:
+            d["title"] = self.title
+        if self.seconds is not None:
+            d["duration"] = fmt_duration(self.seconds)
+        if self.extra:
+            d.update(self.extra)
+        return d
+
+    def copy(self) -> "Track":
+        """Independent copy (shares the interned strings)."""
+        return Track(self.path, self.title, self.seconds, dict(self.extra) if self.extra else None)
+
+    def assign(self, other: "Track") -> None:
+        """Overwrite this track's fields with other's (in place, keeping identity)."""
+        self.path, self.title, self.seconds = other.path, other.title, other.seconds
+        self.extra = dict(other.extra) if other.extra else None
+
+    def update(self, fields: Dict[str, Any]) -> None:
+        """Set fields by their playlists.json names ("duration" accepts "MM:SS" or seconds)."""
+        for key, value in fields.items():
+            if key == "path":
+                self.path = sys.intern(str(value))
+            elif key == "title":
+                self.title = sys.intern(value) if value else None
+            elif key == "duration":
+                self.seconds = to_seconds(value)
+            else:
+                if self.extra is None:
+                    self.extra = {}
+                self.extra[key] = value
+
+    # ---- read-only dict compatibility ----
+    @property
+    def duration(self) -> Optional[str]:
+        """Duration as "MM:SS", or None if unknown."""
+        return fmt_duration(self.seconds) if self.seconds is not None else None
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """dict.get() over the playlists.json field names."""
+        if key == "path":
+            return self.path
+        if key == "title":
+            return self.title if self.title is not None else default
+        if key == "duration":
+            return self.duration if self.seconds is not None else default
+        return self.extra.get(key, default) if self.extra else default
+
+    def __getitem__(self, key: str) -> Any:
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def __contains__(self, key: str) -> bool:
+        return self.get(key, _MISSING) is not _MISSING
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.to_dict())
+
+    def __repr__(self) -> str:
+        return f"Track({self.path!r}, title={self.title!r}, seconds={self.seconds!r})"
+
+
+_MISSING = object()
+
+# Durations repeat a lot across a library ("03:45"), so parsed strings are memoized.
+_parse_cached = lru_cache(maxsize=8192)(parse_duration)
+
+
+def to_seconds(value: Any) -> Optional[int]:
+    """Accept "MM:SS", a number of seconds, or None."""
+    if isinstance(value, str):
+        return _parse_cached(value)
+    if value is None or isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return int(round(value))
+    return None
@@ -0,0 +1,294 @@
+"""Virtualized track table for large playlists.
+
+A plain Treeview holding one item per track gets slow (and memory hungry) once a
+playlist has tens of thousands of rows, and rebuilding it after every add or
+remove makes that cost recur. TrackTable instead:
+- keeps a fixed pool of Treeview rows, just enough to fill the visible area, and
+  rewrites their values as the user scrolls (our own scrollbar drives "top")
+- applies PlaylistStore ops (add/remove/update/move) to its row model and only
+  redraws if the change touches the visible window
+- backfills missing title/duration for visible rows (plus a small buffer around
+  them) on a background thread, through the metadata cache
+"""
+
+from __future__ import annotations
+import queue
+import tkinter as tk
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from tkinter import ttk
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+import perf
+from metadata import MetadataCache
+from playlist_store import move_items
+from track import Track
+
+BUFFER_ROWS = 20     # Rows beyond the visible window whose metadata is prefetched.
+BACKFILL_CACHE = 2000  # Backfilled rows kept (least recently shown dropped first).
+DRAIN_MS = 50        # How often finished backfill results are collected.
+ROW_HEIGHT = 20      # Fallback if the theme doesn't report a Treeview rowheight.
+
+
+class TrackTable(ttk.Frame):
+    """Treeview + scrollbar that only materializes the visible rows of a playlist."""
+
+    def __init__(self, parent, meta: MetadataCache) -> None:
+        super().__init__(parent)
+        self.meta = meta
+        self.columnconfigure(0, weight=1)
+        self.rowconfigure(0, weight=1)
+
+        self.playlist: str = ""
+        self.tracks: List[Track] = []             # Row model (Track objects shared with the store)
+        self.top = 0                              # Index of the first visible track
+        self.selected: Set[int] = set()           # Selected track indices (survive scrolling)
+        self._pool: List[str] = []                # Treeview item ids, one per visible row
+
+        # Metadata backfill for tracks stored without a duration (display only).
+        # Keyed by the Track, not its path: an update rewrites the path in place before
+        # apply() sees it, so the entry must be found without the old path.
+        self._backfill: "OrderedDict[Track, Tuple[str | None, str]]" = OrderedDict()  # -> (title, duration)
+        self._pending: Dict[str, List[Track]] = {}  # path being read -> rows waiting for it
+        self._results: "queue.Queue[tuple[str, Any]]" = queue.Queue()
+        self._executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="row-meta")
+        self._draining = False
+
+        # Track table shows index, title, duration, and file path
+        cols = ("#", "Title", "Duration", "Path")
+        self.tree = ttk.Treeview(self, columns=cols, show="headings", height=1)
+        self.tree.grid(row=0, column=0, sticky="nsew")
+        self.tree.heading("#", text="#")
+        self.tree.heading("Title", text="Title")
+        self.tree.heading("Duration", text="Duration")
+        self.tree.heading("Path", text="Path")
+        self.tree.column("#", width=50, anchor=tk.CENTER)
+        self.tree.column("Title", width=280)
+        self.tree.column("Duration", width=90, anchor=tk.CENTER)
+        self.tree.column("Path", width=460)
+
+        # Our scrollbar moves "top" in the row model; the Treeview itself never scrolls.
+        self.vsb = ttk.Scrollbar(self, orient="vertical", command=self._on_scrollbar)
+        self.vsb.grid(row=0, column=1, sticky="ns")
+
+        self.tree.bind("<Configure>", lambda e: self._resize())
+        self.tree.bind("<<TreeviewSelect>>", self._on_select)
+        self.tree.bind("<MouseWheel>", self._on_wheel)
+        self.tree.bind("<Button-4>", lambda e: self._scroll_by(-3) or "break")
+        self.tree.bind("<Button-5>", lambda e: self._scroll_by(3) or "break")
+        self.tree.bind("<Up>", lambda e: self._on_arrow(-1))
+        self.tree.bind("<Down>", lambda e: self._on_arrow(1))
+        self.tree.bind("<Prior>", lambda e: self._scroll_by(-len(self._pool)) or "break")
+        self.tree.bind("<Next>", lambda e: self._scroll_by(len(self._pool)) or "break")
+
+    # ---- public API ----
+    def show(self, playlist: str, tracks: List[Track]) -> None:
+        """Display a (different) playlist from the top."""
+        self.playlist = playlist
+        self.tracks = tracks
+        self.top = 0
+        self.selected.clear()
+        self._render()
+
+    def apply(self, op: Dict[str, Any]) -> None:
+        """Apply a committed PlaylistStore op, redrawing only if visible rows changed."""
+        kind = op["op"]
+        if kind == "rename" and op["old"] == self.playlist:
+            self.playlist = op["new"]
+            return
+        if kind == "delete" and op["name"] == self.playlist:
+            self.show("", [])
+            return
+        if op.get("playlist") != self.playlist:
+            return
+
+        if kind == "add":
+            first = len(self.tracks)
+            self.tracks.extend(op["items"])
+        elif kind == "update":
+            first = op["index"]
+            self._backfill.pop(self.tracks[first], None)  # Re-read under the new path if shown
+        elif kind == "remove":
+            first = min(op["indices"])
+            for i in reversed(op["indices"]):
+                self.tracks.pop(i)
+            self.selected.clear()
+        elif kind == "move":
+            first = min(op["indices"] + [op["to"]])
+            self.tracks[:] = move_items(self.tracks, op["indices"], op["to"])
+            self.selected.clear()
+        else:
+            return
+
+        self.top = max(0, min(self.top, len(self.tracks) - len(self._pool)))
+        if first < self.top + len(self._pool):
+            self._render()
+        else:
+            self._update_scrollbar()  # Change is below the window; only the thumb moves.
+
+    def selected_indices(self) -> List[int]:
+        """Selected track indices (0-based, ascending)."""
+        return sorted(i for i in self.selected if i < len(self.tracks))
+
+    def close(self) -> None:
+        """Stop the backfill workers."""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    # ---- rendering ----
+    def _visible_rows(self) -> int:
+        """How many rows fit in the Treeview at its current height."""
+        style = ttk.Style(self)
+        try:
+            row_h = int(style.lookup("Treeview", "rowheight") or ROW_HEIGHT)
+        except (TypeError, ValueError):
+            row_h = ROW_HEIGHT
+        header = row_h + 4
+        return max(1, (self.tree.winfo_height() - header) // row_h)
+
+    def _resize(self) -> None:
+        """Grow/shrink the row pool to the visible height."""
+        want = self._visible_rows()
+        while len(self._pool) < want:
+            self._pool.append(self.tree.insert("", "end", values=("", "", "", "")))
+        while len(self._pool) > want:
+            self.tree.delete(self._pool.pop())
+        self.top = max(0, min(self.top, len(self.tracks) - len(self._pool)))
+        self._render()
+
+    @perf.timed("ui.render")
+    def _render(self) -> None:
+        """Rewrite the pooled rows for tracks[top : top + pool] and resync selection."""
+        n = len(self.tracks)
+        selection = []
+        for slot, iid in enumerate(self._pool):
+            i = self.top + slot
+            if i < n:
+                self.tree.item(iid, values=self._row_values(i))
+                if i in self.selected:
+                    selection.append(iid)
+            else:
+                self.tree.item(iid, values=("", "", "", ""))
+        # The resulting <<TreeviewSelect>> maps back to the same indices, so it's harmless.
+        self.tree.selection_set(selection)
+        self._update_scrollbar()
+        self._request_backfill()
+
+    def _row_values(self, i: int) -> tuple:
+        """Display values for track i (display index is 1-based)."""
+        t = self.tracks[i]
+        title = t.title or Path(t.path).stem
+        duration = t.duration
+        if duration is None:
+            # Backfill title/duration if missing (non-destructive to disk)
+            filled = self._backfill.get(t)
+            if filled is not None:
+                self._backfill.move_to_end(t)
+                title = filled[0] or title
+                duration = filled[1]
+            else:
+                duration = "--:--"
+        return (i + 1, title, duration, t.path)
+
+    def _update_scrollbar(self) -> None:
+        """Position the scrollbar thumb for the current window."""
+        n = len(self.tracks)
+        if n == 0:
+            self.vsb.set(0.0, 1.0)
+            return
+        self.vsb.set(self.top / n, min(1.0, (self.top + len(self._pool)) / n))
+
+    # ---- scrolling & selection ----
+    def _scroll_to(self, top: int) -> None:
+        """Move the window so track index top is the first visible row."""
+        top = max(0, min(top, len(self.tracks) - len(self._pool)))
+        if top != self.top:
+            self.top = top
+            self._render()
+
+    def _scroll_by(self, rows: int) -> None:
+        """Scroll by a number of rows (negative = up)."""
+        self._scroll_to(self.top + rows)
+
+    def _on_scrollbar(self, *args) -> None:
+        """Scrollbar command: ("moveto", fraction) or ("scroll", n, "units"|"pages")."""
+        if args[0] == "moveto":
+            self._scroll_to(int(float(args[1]) * len(self.tracks)))
+        elif args[0] == "scroll":
+            step = len(self._pool) if args[2] == "pages" else 1
+            self._scroll_by(int(args[1]) * step)
+
+    def _on_wheel(self, event) -> str:
+        """Mouse wheel (Windows/macOS): three rows per notch."""
+        self._scroll_by(-3 if event.delta > 0 else 3)
+        return "break"
+
+    def _on_arrow(self, step: int) -> Optional[str]:
+        """Keep keyboard navigation going past the edges of the row pool."""
+        focus = self.tree.focus()
+        if not focus or focus not in self._pool:
+            return None
+        slot = self._pool.index(focus)
+        at_edge = (step < 0 and slot == 0) or (step > 0 and slot == len(self._pool) - 1)
+        if not at_edge:
+            return None  # Let the Treeview move within the pool
+        target = self.top + slot + step
+        if not 0 <= target < len(self.tracks):
+            return "break"
+        self.selected = {target}
+        self._scroll_by(step)
+        self.tree.focus(self._pool[target - self.top])
+        return "break"
+
+    def _on_select(self, _evt=None) -> None:
+        """Mirror the Treeview selection (pool slots) into track indices."""
+        window = range(self.top, self.top + len(self._pool))
+        # Keep selections outside the window; replace the ones inside it.
+        self.selected = {i for i in self.selected if i not in window}
+        for iid in self.tree.selection():
+            i = self.top + self._pool.index(iid)
+            if i < len(self.tracks):
+                self.selected.add(i)
+
+    # ---- metadata backfill ----
+    def _request_backfill(self) -> None:
+        """Queue metadata reads for visible (and nearby) rows stored without a duration."""
+        lo = max(0, self.top - BUFFER_ROWS)
+        hi = min(len(self.tracks), self.top + len(self._pool) + BUFFER_ROWS)
+        for t in self.tracks[lo:hi]:
+            if t.seconds is None and t not in self._backfill:
+                waiting = self._pending.get(t.path)
+                if waiting is None:
+                    self._pending[t.path] = [t]
+                    self._executor.submit(self._read, t.path)
+                elif t not in waiting:
+                    waiting.append(t)
+        if self._pending and not self._draining:
+            self._draining = True
+            self.after(DRAIN_MS, self._drain)
+
+    def _read(self, path: str) -> None:
+        """Worker thread: fetch metadata through the cache."""
+        self._results.put((path, self.meta.get(path)))
+
+    def _drain(self) -> None:
+        """Tk thread: store finished reads and redraw if any landed in the window."""
+        got = False
+        try:
+            while True:
+                path, (title, artist, duration) = self._results.get_nowait()
+                nice = f"{title} – {artist}" if title and artist else None
+                for t in self._pending.pop(path, ()):
+                    if t.path == path:  # Not renamed while the read was in flight
+                        self._backfill[t] = (nice, duration or "--:--")
+                got = True
+        except queue.Empty:
+            pass
+        while len(self._backfill) > BACKFILL_CACHE:
+            self._backfill.popitem(last=False)
+        if got:
+            self._render()
+        if self._pending:
+            self.after(DRAIN_MS, self._drain)
+        else:
+            self._draining = False